@@ -1,5 +1,10 @@
 import requests
+import requests.adapters
 import json
+import os
+import threading
+import time
+import warnings
 from .exceptions import YggdrasilError
 
 #: The base url for Ygdrassil requests
@@ -8,6 +13,8 @@ SESSION_SERVER = "https://sessionserver.mojang.com/session/minecraft"
 # Need this content type, or authserver will complain
 CONTENT_TYPE = "application/json"
 HEADERS = {"content-type": CONTENT_TYPE}
+#: The default number of connections kept alive to each server
+SESSION_POOL_SIZE = 10
 
 
 class Profile(object):
@@ -109,6 +116,8 @@ class AuthenticationToken(object):
             "username": username,
             "password": password
         }
+        if self.client_token is not None:
+            payload["clientToken"] = self.client_token
 
         res = _make_request(AUTH_SERVER, "authenticate", payload)
 
@@ -177,8 +186,11 @@ class AuthenticationToken(object):
         if self.access_token is None:
             raise ValueError("'access_token' not set!")
 
-        res = _make_request(AUTH_SERVER, "validate",
-                            {"accessToken": self.access_token})
+        payload = {"accessToken": self.access_token}
+        if self.client_token is not None:
+            payload["clientToken"] = self.client_token
+
+        res = _make_request(AUTH_SERVER, "validate", payload)
 
         # Validate returns 204 to indicate success
         # http://wiki.vg/Authentication#Response_3
@@ -256,6 +268,192 @@ class AuthenticationToken(object):
         return True
 
 
+class TokenCache(object):
+    """
+    A file storing the `AuthenticationToken` of each of a number of accounts,
+    so that they need not be authenticated again whenever a program starts.
+
+    The file, at `path`, is created when a token is first stored, and holds
+    a JSON object mapping each username to its token. `TokenCache` objects
+    may be used from several threads at once.
+
+    A cached token that was obtained or validated less than `validate_after`
+    seconds ago is used without being validated again. A cache file that
+    cannot be parsed is treated, with a warning, as an empty cache.
+    """
+    def __init__(self, path, validate_after=300):
+        self.path = path
+        self.validate_after = validate_after
+        self._lock = threading.RLock()
+        self._tokens = None
+
+    def get_token(self, username, password, save=True):
+        """
+        Returns an authenticated `AuthenticationToken` for the given account.
+
+        If a token for `username` is cached, it is validated (unless it was
+        checked within the last `validate_after` seconds), or, failing that,
+        refreshed; only if neither succeeds is the account authenticated with
+        `password`. The resulting token is cached, and, if `save` is
+        ``True``, the cache is saved.
+
+        Raises:
+            minecraft.exceptions.YggdrasilError
+        """
+        with self._lock:
+            data = self._load().get(username)
+
+        token = None
+        checked_at = time.time()
+        if data is not None:
+            token = _token_from_dict(username, data)
+            if checked_at - data.get("checkedAt", 0) < self.validate_after:
+                checked_at = data["checkedAt"]
+            else:
+                try:
+                    if not token.validate():
+                        token.refresh()
+                except YggdrasilError:
+                    token = None
+        if token is None:
+            token = AuthenticationToken(
+                client_token=None if data is None else data["clientToken"])
+            token.authenticate(username, password)
+
+        with self._lock:
+            self._load()[username] = _token_to_dict(token, checked_at)
+            if save:
+                self.save()
+        return token
+
+    def get_tokens(self, accounts, threads=8):
+        """
+        Calls `get_token` for each of the given (username, password) pairs,
+        from up to `threads` threads at once, and then saves the cache.
+
+        Returns:
+            A `dict` mapping each username to its `AuthenticationToken`, or
+            to the exception raised in obtaining it.
+        """
+        accounts = iter(accounts)
+        results = {}
+
+        def get_tokens():
+            while True:
+                with self._lock:
+                    username, password = next(accounts, (None, None))
+                if username is None:
+                    return
+                try:
+                    results[username] = self.get_token(
+                        username, password, save=False)
+                except Exception as e:
+                    results[username] = e
+
+        workers = [threading.Thread(target=get_tokens)
+                   for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.save()
+        return results
+
+    def save(self):
+        """
+        Writes the cached tokens to the file, replacing it atomically.
+        """
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            # The tokens are secret, so the file is readable only by its owner.
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._load(), f, indent=2, sort_keys=True)
+            getattr(os, "replace", os.rename)(temp_path, self.path)
+
+    def _load(self):
+        # Returns the dict of cached tokens, reading it from the file if it
+        # has not yet been read. The caller must hold the lock.
+        if self._tokens is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._tokens = json.load(f)
+            except IOError:
+                self._tokens = {}
+            except ValueError as e:
+                warnings.warn("Ignoring the corrupt token cache %r: %s"
+                              % (self.path, e))
+                self._tokens = {}
+        return self._tokens
+
+
+def _token_to_dict(token, checked_at):
+    # 'checked_at' is the time at which the token was last obtained or
+    # validated, as given by 'time.time'.
+    return {"accessToken": token.access_token,
+            "clientToken": token.client_token,
+            "selectedProfile": token.profile.to_dict(),
+            "checkedAt": checked_at}
+
+
+def _token_from_dict(username, data):
+    token = AuthenticationToken(username=username,
+                                access_token=data["accessToken"],
+                                client_token=data["clientToken"])
+    token.profile.id_ = data["selectedProfile"]["id"]
+    token.profile.name = data["selectedProfile"]["name"]
+    return token
+
+
+def get_session():
+    """
+    Returns the `requests.Session` through which all requests to the
+    authentication and session servers are made, so that connections to them
+    are kept alive and reused. It is created, if necessary, as by
+    `configure_session` with the default arguments.
+
+    Each process has its own session: a process created by `os.fork` does
+    not reuse its parent's connections, whose sockets it shares.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _new_session(SESSION_POOL_SIZE)
+            _session_pid = os.getpid()
+        return _session
+
+
+def configure_session(pool_size=SESSION_POOL_SIZE):
+    """
+    Replaces the session returned by `get_session` with one that keeps up to
+    `pool_size` connections alive to each server, which should be at least
+    the number of threads making requests at once.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        old_session, _session = _session, _new_session(pool_size)
+        old_pid, _session_pid = _session_pid, os.getpid()
+    if old_session is not None and old_pid == os.getpid():
+        old_session.close()
+
+
+def _new_session(pool_size):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                            pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# The session returned by 'get_session', or None if it is not yet created,
+# and the ID of the process that created it.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
 def _make_request(server, endpoint, data):
     """
     Fires a POST with json-packed data to the given endpoint and returns
@@ -268,8 +466,8 @@ def _make_request(server, endpoint, data):
     Returns:
         A `requests.Request` object.
     """
-    res = requests.post(server + "/" + endpoint, data=json.dumps(data),
-                        headers=HEADERS)
+    res = get_session().post(server + "/" + endpoint, data=json.dumps(data),
+                             headers=HEADERS)
     return res
 
 
@@ -0,0 +1,364 @@
+"""
+Contains 'AsyncConnection', a version of 'Connection' that is driven by an
+asyncio event loop rather than by a networking thread of its own, so that any
+number of connections may share a single thread. This module requires Python
+3.5 or later.
+"""
+from collections import deque
+import asyncio
+import functools
+import inspect
+import sys
+
+from .connection import Connection
+from .framing import FrameReader, FrameWriter
+from . import encryption
+from ..exceptions import IgnorePacket, InvalidState
+
+
+class AsyncConnection(Connection):
+    """A 'Connection' whose networking is carried out by an asyncio event loop
+       instead of a networking thread. The same reactors, packets and packet
+       listeners are used as with 'Connection', and the constructor accepts
+       the same arguments, as well as 'loop', the event loop to use (by
+       default, the current event loop at the time of connecting), and
+       'login_executor', the executor in which the response to the server's
+       encryption request is prepared, as this involves joining the server's
+       session, which would otherwise block the event loop (by default, the
+       event loop's default executor).
+
+       The methods of this class must be called from the thread running the
+       event loop. 'connect' and 'status' return an 'asyncio.Task' which
+       completes once the server has been connected to, and 'wait_closed'
+       returns a future which completes when the connection terminates.
+
+       'write_packet' returns a future which may be awaited to wait until the
+       connection can accept more data (see 'drain'). Packets written during
+       the same iteration of the event loop are sent together.
+
+       Packet listeners may be coroutine functions, or otherwise return
+       awaitable objects. These are awaited one at a time, in the order in
+       which the packets were sent or received, but concurrently with the
+       handling of any subsequent packets, so raising 'IgnorePacket' from them
+       has no effect on other listeners.
+    """
+    def __init__(self, *args, **kwds):
+        self.loop = kwds.pop('loop', None)
+        self.login_executor = kwds.pop('login_executor', None)
+        super(AsyncConnection, self).__init__(*args, **kwds)
+
+        self.transport = None
+        self._protocol = None      # The _ConnectionProtocol now in use.
+        self._connect_task = None  # Completes when a transport is created.
+        self._closed = None        # Completes when the connection ends.
+        self._writable = None      # Pending while writing is paused.
+        self._flush_handle = None  # The scheduled call to _flush_packets.
+        self._encryptor = self._decryptor = None
+
+        # The coroutines of asynchronous packet listeners, which are yet to
+        # be run, and the task running them.
+        self._listener_queue = deque()
+        self._listener_task = None
+
+    def _get_loop(self):
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        return self.loop
+
+    def connect(self):
+        """
+        Attempt to begin connecting to the server, returning an
+        'asyncio.Task' which completes once a transport has been created.
+        May safely be called multiple times after the first, i.e. to reconnect.
+        """
+        super(AsyncConnection, self).connect()
+        return self._connect_task
+
+    def status(self, handle_status=None, handle_ping=False):
+        """Issue a status request to the server and then disconnect, as with
+        'Connection.status', returning an 'asyncio.Task' which completes once
+        a transport has been created.
+        """
+        super(AsyncConnection, self).status(handle_status, handle_ping)
+        return self._connect_task
+
+    def write_packet(self, packet, force=False):
+        """Writes a packet to the server.
+
+        The packet is serialised immediately, and sent either at the end of
+        the current iteration of the event loop, along with any other packets
+        written in the meantime, or immediately if force is set to true.
+
+        Returns the same future as 'drain', which the caller may await before
+        writing more packets, so as not to outpace the network.
+
+        :param packet: The :class:`network.packets.Packet` to write
+        :param force(bool): Specifies if the packet should be sent immediately
+        """
+        packet.context = self.context
+        self._write_packet(packet)
+        if force or self._frame_writer.pending >= \
+                self._frame_writer.buffer_size:
+            self._flush_packets()
+        elif self._flush_handle is None:
+            self._flush_handle = self._get_loop().call_soon(
+                self._flush_packets)
+        return self.drain()
+
+    def drain(self):
+        """Returns an 'asyncio.Future' which is complete if the connection is
+        ready to accept more data; or otherwise, if the transport's write
+        buffer is full, which completes when enough of its data has been sent
+        or when the connection is closed.
+        """
+        if self._writable is None:
+            self._writable = self._get_loop().create_future()
+            self._writable.set_result(None)
+        return self._writable
+
+    def wait_closed(self):
+        """Returns an 'asyncio.Future' which completes when the connection
+        terminates, other than in order to reconnect. If it terminates due to
+        an exception, and 'handle_exception' was None, the future's exception
+        is set to that exception; otherwise, its result is None.
+        """
+        if self._closed is None:
+            self._closed = self._get_loop().create_future()
+            self._closed.set_result(None)
+        return self._closed
+
+    def register_packet_listener(self, method, *packet_types, **kwds):
+        """As 'Connection.register_packet_listener', except that 'method' may
+        also return an awaitable object (as when it is a coroutine function),
+        which is awaited as described in the documentation for this class.
+        """
+        @functools.wraps(method)
+        def listener(packet):
+            result = method(packet)
+            if inspect.isawaitable(result):
+                self._run_listener(result)
+        super(AsyncConnection, self).register_packet_listener(
+            listener, *packet_types, **kwds)
+
+    def disconnect(self, immediate=False):
+        """Terminate the existing server connection, if there is one.
+           If 'immediate' is True, do not attempt to write any packets.
+        """
+        self.connected = False
+
+        if self._connect_task is not None and not self._connect_task.done():
+            self._connect_task.cancel()
+            if self.transport is None:
+                self._set_closed()
+
+        if self.transport is not None:
+            if immediate:
+                self.transport.abort()
+            else:
+                self._flush_packets()
+                self.transport.close()
+
+    def _check_connection(self):
+        if self._connect_task is not None and \
+           not self._connect_task.done() or \
+           self.transport is not None and self.connected:
+            raise InvalidState('There is an existing connection.')
+
+    def _start_network_thread(self):
+        # The event loop takes the place of the networking thread.
+        pass
+
+    def _connect(self):
+        # Begin connecting to the server. Any packets written before the
+        # connection is established are sent as soon as it is.
+        loop = self._get_loop()
+        self._protocol = self.transport = None
+        self._wake_writers()
+        self._frame_reader = FrameReader(None)
+        self._frame_writer = FrameWriter()
+        self._encryptor = self._decryptor = None
+        self.options.compression_enabled = False
+        self.options.compression_threshold = -1
+        self.connected = True
+        if self._closed is None or self._closed.done():
+            self._closed = loop.create_future()
+        self._connect_task = loop.create_task(self._open())
+
+    async def _open(self):
+        try:
+            await self._get_loop().create_connection(
+                lambda: _ConnectionProtocol(self),
+                self.options.address, self.options.port)
+        except Exception:
+            # As with 'Connection', failure to connect is reported only to
+            # the caller of 'connect'.
+            self.connected = False
+            self._set_closed()
+            raise
+
+    def _call_blocking(self, function, callback):
+        # Call 'function' in the login executor, and then 'callback' from the
+        # event loop, unless the connection has been closed in the meantime.
+        protocol = self._protocol
+        future = self._get_loop().run_in_executor(self.login_executor,
+                                                  function)
+
+        def done(future):
+            if protocol is not self._protocol or not self.connected:
+                return
+            try:
+                callback(future.result())
+            except Exception as e:
+                self._handle_exception(e, sys.exc_info())
+            self._flush_packets()
+        future.add_done_callback(done)
+
+    def _enable_encryption(self, secret):
+        cipher = encryption.create_AES_cipher(secret)
+        self._encryptor = cipher.encryptor()
+        self._decryptor = cipher.decryptor()
+        self._frame_reader.decrypt(self._decryptor)
+
+    def _flush_packets(self):
+        # Sends all packets written since the last flush to the transport,
+        # if it has been created; otherwise, they remain pending.
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.transport is not None and not self.transport.is_closing():
+            self._frame_writer.flush(self._protocol)
+
+    def _handle_exception(self, exc, exc_info):
+        handle_exception = self.handle_exception
+        try:
+            if self.reactor.handle_exception(exc, exc_info):
+                return
+            if handle_exception not in (None, False):
+                handle_exception(exc, exc_info)
+        except Exception as new_exc:
+            exc, exc_info = new_exc, sys.exc_info()
+
+        try:
+            exc.exc_info = exc_info  # For backward compatibility.
+        except (TypeError, AttributeError):
+            pass
+
+        self.exception, self.exc_info = exc, exc_info
+        self.disconnect(immediate=True)
+        self._set_closed(exc if handle_exception is None else None)
+
+    def _set_closed(self, exc=None):
+        if self._closed is not None and not self._closed.done():
+            if exc is None:
+                self._closed.set_result(None)
+            else:
+                self._closed.set_exception(exc)
+
+    def _run_listener(self, awaitable):
+        self._listener_queue.append(awaitable)
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = self._get_loop().create_task(
+                self._run_listeners())
+
+    async def _run_listeners(self):
+        # Await the results of asynchronous packet listeners one at a time. If
+        # any of them fails, the rest are discarded.
+        queue = self._listener_queue
+        while queue:
+            try:
+                await queue.popleft()
+            except IgnorePacket:
+                pass
+            except Exception as e:
+                while queue:
+                    close = getattr(queue.popleft(), 'close', None)
+                    if close is not None:
+                        close()
+                self._handle_exception(e, sys.exc_info())
+
+    # The following methods are called by the current _ConnectionProtocol.
+
+    def _connection_made(self, protocol, transport):
+        self._protocol, self.transport = protocol, transport
+        self._flush_packets()
+
+    def _data_received(self, protocol, data):
+        if protocol is not self._protocol:
+            return
+        if self._decryptor is not None:
+            data = self._decryptor.update(data)
+        self._frame_reader.feed(data)
+        try:
+            while protocol is self._protocol and self.connected:
+                frame = self._frame_reader.next_frame()
+                if frame is None:
+                    break
+                self._react(self.reactor.decode_packet(frame))
+        except Exception as e:
+            self._handle_exception(e, sys.exc_info())
+        self._flush_packets()
+
+    def _connection_lost(self, protocol, exc):
+        if protocol is not self._protocol:
+            return
+        self._protocol = self.transport = None
+        self._wake_writers()
+
+        if self.connected:
+            # The connection was not closed by us.
+            if exc is None:
+                exc = EOFError("Unexpected end of message.")
+            self._handle_exception(exc, (type(exc), exc, exc.__traceback__))
+
+        if self._protocol is None and self._connect_task.done() and \
+           not self._closed.done():
+            try:
+                self._handle_exit()
+            except Exception as e:
+                self._handle_exception(e, sys.exc_info())
+            if self._connect_task.done():
+                self._set_closed()
+
+    def _pause_writing(self, protocol):
+        if protocol is self._protocol and self.drain().done():
+            self._writable = self._get_loop().create_future()
+
+    def _resume_writing(self, protocol):
+        if protocol is self._protocol:
+            self._wake_writers()
+
+    def _wake_writers(self):
+        if self._writable is not None and not self._writable.done():
+            self._writable.set_result(None)
+
+
+class _ConnectionProtocol(asyncio.Protocol):
+    # Passes the events of one transport on to its AsyncConnection, which may
+    # have several protocols over time, if it reconnects.
+    def __init__(self, connection):
+        self.connection = connection
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connection._connection_made(self, transport)
+
+    def data_received(self, data):
+        self.connection._data_received(self, data)
+
+    def connection_lost(self, exc):
+        self.connection._connection_lost(self, exc)
+
+    def pause_writing(self):
+        self.connection._pause_writing(self)
+
+    def resume_writing(self):
+        self.connection._resume_writing(self)
+
+    def sendall(self, data):
+        # Writes 'data' to the transport, when flushed from a FrameWriter.
+        encryptor = self.connection._encryptor
+        if encryptor is None:
+            self.transport.write(bytes(data))
+        else:
+            self.transport.write(encryptor.update(data))
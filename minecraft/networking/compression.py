@@ -0,0 +1,50 @@
+"""
+Contains 'Compression', the settings with which a connection compresses the
+packets that it sends, and 'decompress', which decompresses received packets.
+"""
+import zlib
+
+
+__all__ = 'Compression', 'decompress'
+
+
+class Compression(object):
+    """The settings with which packets are compressed, once the server has
+       enabled compression, if their size exceeds the server's threshold.
+
+       'level' and 'strategy' are as for 'zlib.compressobj': a lower level,
+       such as 1, or even 0 (for no compression), reduces the time spent
+       compressing packets at the cost of sending more data, which is
+       worthwhile if the connection to the server is fast. If 'enabled' is
+       False, packets are never compressed, and are sent with a data length of
+       0, as if they were below the threshold; the server must accept this.
+    """
+    __slots__ = 'level', 'strategy', 'enabled'
+
+    def __init__(self, level=zlib.Z_DEFAULT_COMPRESSION,
+                 strategy=zlib.Z_DEFAULT_STRATEGY, enabled=True):
+        self.level = level
+        self.strategy = strategy
+        self.enabled = enabled
+
+    def compress(self, data):
+        """ Returns 'data' compressed as a complete zlib stream. """
+        # Each packet must be compressed as a separate zlib stream, so no
+        # compression state can be carried from one packet to the next.
+        if self.strategy == zlib.Z_DEFAULT_STRATEGY:
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(
+            self.level, zlib.DEFLATED, zlib.MAX_WBITS, 8, self.strategy)
+        return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, size):
+    """Returns the zlib stream 'data' decompressed into a buffer of 'size'
+       bytes, which is the size given in the packet's header. 'ValueError' is
+       raised if the decompressed data is not of this size.
+    """
+    decompressed_data = zlib.decompress(data, zlib.MAX_WBITS, size)
+    if len(decompressed_data) != size:
+        raise ValueError('Decompressed length %d, but expected %d.'
+                         % (len(decompressed_data), size))
+    return decompressed_data
@@ -2,11 +2,9 @@ from __future__ import print_function
 
 from collections import deque
 from threading import RLock
-import zlib
 import threading
 import socket
 import timeit
-import select
 import sys
 import json
 import re
@@ -17,6 +15,9 @@ from .types import VarInt
 from .packets import clientbound, serverbound
 from . import packets
 from . import encryption
+from .compression import Compression, decompress
+from .framing import FrameReader, FrameWriter
+from .connection_pool import PooledNetworkingThread
 from .. import SUPPORTED_PROTOCOL_VERSIONS, SUPPORTED_MINECRAFT_VERSIONS
 from ..exceptions import (
     VersionMismatch, LoginDisconnect, IgnorePacket, InvalidState
@@ -38,11 +39,13 @@ class ConnectionContext(object):
 
 class _ConnectionOptions(object):
     def __init__(self, address=None, port=None, compression_threshold=-1,
-                 compression_enabled=False):
+                 compression_enabled=False, compression=None):
         self.address = address
         self.port = port
         self.compression_threshold = compression_threshold
         self.compression_enabled = compression_enabled
+        self.compression = Compression() if compression is None \
+            else compression
 
 
 class Connection(object):
@@ -60,6 +63,9 @@ class Connection(object):
         allowed_versions=None,
         handle_exception=None,
         handle_exit=None,
+        pool=None,
+        reuse_packets=False,
+        compression=None,
     ):
         """Sets up an instance of this object to be able to connect to a
         minecraft server.
@@ -98,12 +104,35 @@ class Connection(object):
                             and not with the intention to automatically
                             reconnect. Exceptions raised in this handler
                             will be handled by handle_exception.
+        :param pool: A :class:`minecraft.networking.connection_pool.ConnectionPool`
+                     whose thread will carry out the networking for this
+                     connection, or None for it to start its own networking
+                     thread.
+        :param reuse_packets: If True, each packet received is decoded into
+                              the same object as the last packet of its type
+                              received in the same state of the connection,
+                              rather than into a new object, to reduce the
+                              allocation of memory for frequent packets.
+                              Packet listeners (and the awaitables returned
+                              by those of an 'AsyncConnection') must then
+                              copy any data that they keep from a packet,
+                              rather than keeping the packet itself.
+        :param compression: A :class:`minecraft.networking.compression.Compression`
+                            giving the level and strategy with which packets
+                            are compressed, or whether they are compressed at
+                            all, if the server enables compression; or None
+                            for zlib's defaults.
         """  # NOQA
 
         # This lock is re-entrant because it may be acquired in a re-entrant
         # manner from within an outgoing packet listener
         self._write_lock = RLock()
 
+        # Packets are written into this buffer and sent to the server when
+        # it is flushed, which happens once for each batch of packets written
+        # by the networking thread, and immediately for forced writes.
+        self._frame_writer = FrameWriter()
+
         self.networking_thread = None
         self.new_networking_thread = None
         self.packet_listeners = []
@@ -111,6 +140,13 @@ class Connection(object):
         self.outgoing_packet_listeners = []
         self.early_outgoing_packet_listeners = []
 
+        # A map from each packet type to the callbacks of the listeners in
+        # the above lists that apply to it, computed when the type is first
+        # dispatched, and replaced with an empty map whenever the lists are
+        # changed by 'register_packet_listener' or by
+        # 'unregister_packet_listener'.
+        self._listener_cache = {}
+
         def proto_version(version):
             if isinstance(version, str):
                 proto_version = SUPPORTED_MINECRAFT_VERSIONS.get(version)
@@ -136,7 +172,7 @@ class Connection(object):
         self.context = ConnectionContext(
             protocol_version=max(self.allowed_proto_versions))
 
-        self.options = _ConnectionOptions()
+        self.options = _ConnectionOptions(compression=compression)
         self.options.address = address
         self.options.port = port
         self.auth_token = auth_token
@@ -146,6 +182,14 @@ class Connection(object):
         self.handle_exception = handle_exception
         self.exception, self.exc_info = None, None
         self.handle_exit = handle_exit
+        self.pool = pool
+        self.reuse_packets = reuse_packets
+
+        # The number of packets received from and written to the server, in
+        # all connections made by this object, whether or not they were
+        # decoded or had any listeners.
+        self.packets_received = 0
+        self.packets_sent = 0
 
         # The reactor handles all the default responses to packets,
         # it should be changed per networking state
@@ -157,15 +201,20 @@ class Connection(object):
                not self.networking_thread.interrupt or \
                self.new_networking_thread is not None:
                 raise InvalidState('A networking thread is already running.')
-            elif self.networking_thread is None:
-                self.networking_thread = NetworkingThread(self)
+
+            # If the connection belongs to a pool, the pool's counterpart of
+            # a networking thread is started instead.
+            thread_type = NetworkingThread if self.pool is None \
+                else self.pool.networking_thread_type
+            if self.networking_thread is None:
+                self.networking_thread = thread_type(self)
                 self.networking_thread.start()
             else:
                 # This thread will wait until the existing thread exits, and
                 # then set 'networking_thread' to itself and
                 # 'new_networking_thread' to None.
                 self.new_networking_thread \
-                    = NetworkingThread(self, previous=self.networking_thread)
+                    = thread_type(self, previous=self.networking_thread)
                 self.new_networking_thread.start()
 
     def write_packet(self, packet, force=False):
@@ -184,8 +233,15 @@ class Connection(object):
         if force:
             with self._write_lock:
                 self._write_packet(packet)
+                self._flush_packets()
+                if self._frame_writer.blocked and self.pool is not None:
+                    # The pool's thread sends the rest once the socket
+                    # becomes writable.
+                    self.pool.notify(self)
         else:
             self._outgoing_packet_queue.append(packet)
+            if self.pool is not None:
+                self.pool.notify(self)
 
     def register_packet_listener(self, method, *packet_types, **kwds):
         """
@@ -218,10 +274,46 @@ class Connection(object):
             else self.outgoing_packet_listeners if not early \
             else self.early_outgoing_packet_listeners
         target.append(packets.PacketListener(method, *packet_types, **kwds))
+        self._listener_cache = {}
+
+    def unregister_packet_listener(self, method):
+        """
+        Removes every listener that was registered with the given method,
+        whichever packet types it listens for. Returns True if any listeners
+        were removed, or False if there were none.
+
+        :param method: The method previously given to register_packet_listener
+        """
+        removed = False
+        for listeners in (self.packet_listeners, self.early_packet_listeners,
+                          self.outgoing_packet_listeners,
+                          self.early_outgoing_packet_listeners):
+            for listener in list(listeners):
+                if getattr(listener.callback, '__wrapped__',
+                           listener.callback) == method:
+                    listeners.remove(listener)
+                    removed = True
+        self._listener_cache = {}
+        return removed
+
+    def _get_listeners(self, packet_type):
+        # Returns a tuple (early, ordinary, early outgoing, outgoing) of
+        # tuples of the callbacks to call with packets of the given type.
+        cache = self._listener_cache
+        callbacks = cache.get(packet_type)
+        if callbacks is None:
+            callbacks = cache[packet_type] = tuple(
+                tuple(listener.callback for listener in listeners
+                      if listener.listens_to(packet_type))
+                for listeners in (self.early_packet_listeners,
+                                  self.packet_listeners,
+                                  self.early_outgoing_packet_listeners,
+                                  self.outgoing_packet_listeners))
+        return callbacks
 
     def _pop_packet(self):
         # Pops the topmost packet off the outgoing queue and writes it out
-        # through the socket
+        # to the frame writer, from which it will be sent by _flush_packets.
         #
         # Mostly an internal convenience function, caller should make sure
         # they have the write lock acquired to avoid issues caused by
@@ -235,22 +327,53 @@ class Connection(object):
             return True
 
     def _write_packet(self, packet):
-        # Immediately writes the given packet to the network. The caller must
+        # Immediately writes the given packet to the frame writer, to be sent
+        # to the network by the next call to _flush_packets. The caller must
         # have the write lock acquired before calling this method.
+        _, _, early_callbacks, callbacks = self._get_listeners(type(packet))
         try:
-            for listener in self.early_outgoing_packet_listeners:
-                listener.call_packet(packet)
+            for callback in early_callbacks:
+                callback(packet)
 
             if self.options.compression_enabled:
-                packet.write(self.socket, self.options.compression_threshold)
+                packet.write(self._frame_writer,
+                             self.options.compression_threshold,
+                             self.options.compression)
             else:
-                packet.write(self.socket)
+                packet.write(self._frame_writer)
+            self.packets_sent += 1
 
-            for listener in self.outgoing_packet_listeners:
-                listener.call_packet(packet)
+            for callback in callbacks:
+                callback(packet)
         except IgnorePacket:
             pass
 
+    def _flush_packets(self, wait=True, partial=None):
+        # Sends all packets written since the last flush to the network at
+        # once. The caller must have the write lock acquired before calling
+        # this method. The packets are always sent through the current socket,
+        # so that they are encrypted if encryption has since been enabled.
+        # If `wait' is False, returns as for `FrameWriter.flush'. The sockets
+        # of connections in a pool are non-blocking, so unless `partial' is
+        # False, only as much data as the socket accepts is sent, and the rest
+        # is sent by the pool later.
+        if self.socket is None:
+            self._frame_writer = self._new_frame_writer()
+        else:
+            if partial is None:
+                partial = isinstance(self.networking_thread,
+                                     PooledNetworkingThread)
+            return self._frame_writer.flush(self.socket, wait, partial)
+
+    def _new_frame_writer(self):
+        # Returns a FrameWriter which offloads the compression of large
+        # frames to the executor of the connection's pool, if it has one.
+        executor = getattr(self.pool, 'executor', None)
+        if executor is None:
+            return FrameWriter()
+        return FrameWriter(executor=executor,
+                           offload_threshold=self.pool.offload_threshold)
+
     def status(self, handle_status=None, handle_ping=False):
         """Issue a status request to the server and then disconnect.
 
@@ -332,10 +455,10 @@ class Connection(object):
     def _connect(self):
         # Connect a socket to the server and create a file object from the
         # socket.
-        # The file object is used to read any and all data from the socket
-        # since it's "guaranteed" to read the number of bytes specified,
-        # the socket itself will mostly be used to write data upstream to
-        # the server.
+        # The file object is used to read any and all data from the socket,
+        # which is received in large chunks and divided into packet frames by
+        # a FrameReader; the socket itself will mostly be used to write data
+        # upstream to the server, in batches collected by a FrameWriter.
         self._outgoing_packet_queue = deque()
 
         info = socket.getaddrinfo(self.options.address, self.options.port,
@@ -352,6 +475,8 @@ class Connection(object):
         self.socket = socket.socket(ai_faml, ai_type, ai_prot)
         self.socket.connect(ai_addr)
         self.file_object = self.socket.makefile("rb", 0)
+        self._frame_reader = FrameReader(self.file_object)
+        self._frame_writer = self._new_frame_writer()
         self.options.compression_enabled = False
         self.options.compression_threshold = -1
         self.connected = True
@@ -364,9 +489,15 @@ class Connection(object):
             self.connected = False
 
             if not immediate and self.socket is not None:
-                # Flush any packets remaining in the queue.
+                # Flush any packets remaining in the queue, waiting until they
+                # are all sent, even if the socket belongs to a pool and is
+                # non-blocking.
                 while self._pop_packet():
                     pass
+                if isinstance(self.networking_thread, PooledNetworkingThread):
+                    getattr(self.socket, 'actual_socket', self.socket) \
+                        .setblocking(True)
+                self._flush_packets(partial=False)
 
             if self.networking_thread is not None:
                 self.networking_thread.interrupt = True
@@ -380,6 +511,36 @@ class Connection(object):
                     self.socket.close()
                     self.socket = None
 
+    def _call_blocking(self, function, callback):
+        # Calls 'function', which may block (as when joining a server's
+        # session), and then 'callback' with its result, from the networking
+        # thread. If the connection belongs to a pool, 'function' is called
+        # by the pool's login executor, so that the pool's thread may handle
+        # other connections in the meantime.
+        networking_thread = self.networking_thread
+        if isinstance(networking_thread, PooledNetworkingThread):
+            future = networking_thread.pool._submit_login(function)
+            if future is not None:
+                networking_thread.call_when_done(future, callback)
+                return
+        callback(function())
+
+    def _enable_encryption(self, secret):
+        # Encrypts all further data sent and received using the given shared
+        # secret, as negotiated by the LoginReactor.
+        cipher = encryption.create_AES_cipher(secret)
+        encryptor = cipher.encryptor()
+        decryptor = cipher.decryptor()
+        self.socket = encryption.EncryptedSocketWrapper(
+            self.socket, encryptor, decryptor)
+        self.file_object = encryption.EncryptedFileObjectWrapper(
+            self.file_object, decryptor)
+
+        # Any data written before now, which a non-blocking socket has not
+        # yet accepted, is still sent unencrypted.
+        self.socket.unsent += self._frame_writer.buffer
+        del self._frame_writer.buffer[:]
+
     def _handshake(self, next_state=STATE_PLAYING):
         handshake = serverbound.handshake.HandShakePacket()
         handshake.protocol_version = self.context.protocol_version
@@ -431,12 +592,13 @@ class Connection(object):
             self.handle_exit()
 
     def _react(self, packet):
+        early_callbacks, callbacks, _, _ = self._get_listeners(type(packet))
         try:
-            for listener in self.early_packet_listeners:
-                listener.call_packet(packet)
+            for callback in early_callbacks:
+                callback(packet)
             self.reactor.react(packet)
-            for listener in self.packet_listeners:
-                listener.call_packet(packet)
+            for callback in callbacks:
+                callback(packet)
         except IgnorePacket:
             pass
 
@@ -478,6 +640,7 @@ class NetworkingThread(threading.Thread):
                         num_packets += 1
                         if num_packets >= 300:
                             break
+                    self.connection._flush_packets()
                     exc_info = None
                 except IOError:
                     exc_info = sys.exc_info()
@@ -519,55 +682,135 @@ class PacketReactor(object):
     # Handshaking is considered the "default" state
     get_clientbound_packets = staticmethod(clientbound.handshake.get_packets)
 
+    # The names of the packets used by `react', or None if it may use any
+    # packet. Packets of other types are only decoded if a packet listener
+    # is registered for them; otherwise, they are skipped, as are packets of
+    # unknown types, and given to `react' and any listeners as instances of
+    # the base `Packet' class. This is ignored (and all packets are decoded)
+    # in a subclass which overrides `react' without also defining it.
+    handled_packet_names = None
+
     def __init__(self, connection):
         self.connection = connection
-        context = self.connection.context
-        self.clientbound_packets = {
-            packet.get_id(context): packet
-            for packet in self.__class__.get_clientbound_packets(context)}
+        # A tuple mapping each packet ID to the corresponding packet class,
+        # which is shared by all reactors of this type and protocol version.
+        self.packet_table = packets.get_packet_table(
+            self.__class__.get_clientbound_packets, connection.context)
+
+        # If the connection's `reuse_packets' option is set, this maps each
+        # packet type to the instance into which packets of that type are
+        # decoded.
+        self.reused_packets = {}
+
+        # The names of the packets used by `react', as used by
+        # `needs_decoding', or None.
+        self._handled_packet_names = _handled_packet_names(type(self))
+
+    @property
+    def clientbound_packets(self):
+        # A dict mapping each packet ID to the corresponding packet class.
+        return {packet_id: packet
+                for packet_id, packet in enumerate(self.packet_table)
+                if packet is not None}
 
     def read_packet(self, stream, timeout=0):
-        # Block for up to `timeout' seconds waiting for `stream' to become
-        # readable, returning `None' if the timeout elapses.
-        ready_to_read = select.select([stream], [], [], timeout)[0]
-
-        if ready_to_read:
-            length = VarInt.read(stream)
-
-            packet_data = packets.PacketBuffer()
-            packet_data.send(stream.read(length))
-            # Ensure we read all the packet
-            while len(packet_data.get_writable()) < length:
-                packet_data.send(
-                    stream.read(length - len(packet_data.get_writable())))
-            packet_data.reset_cursor()
-
-            if self.connection.options.compression_enabled:
-                decompressed_size = VarInt.read(packet_data)
-                if decompressed_size > 0:
-                    decompressor = zlib.decompressobj()
-                    decompressed_packet = decompressor.decompress(
-                                                       packet_data.read())
-                    assert len(decompressed_packet) == decompressed_size, \
-                        'decompressed length %d, but expected %d' % \
-                        (len(decompressed_packet), decompressed_size)
-                    packet_data.reset()
-                    packet_data.send(decompressed_packet)
-                    packet_data.reset_cursor()
-
-            packet_id = VarInt.read(packet_data)
-
-            # If we know the structure of the packet, attempt to parse it
-            # otherwise just skip it
-            if packet_id in self.clientbound_packets:
-                packet = self.clientbound_packets[packet_id]()
-                packet.context = self.connection.context
-                packet.read(packet_data)
-                return packet
-            else:
-                return packets.Packet(context=self.connection.context)
-        else:
+        # Return the next packet from `stream', which is taken from the data
+        # already received, if possible; otherwise, block for up to `timeout'
+        # seconds waiting for the rest of a packet, returning `None' if the
+        # timeout elapses.
+        frame = self._get_frame_reader(stream).read_frame(timeout)
+        return None if frame is None else self.decode_packet(frame)
+
+    def next_packet(self, stream):
+        # Return the next packet from `stream' if it has already been received
+        # in full, or otherwise `None', without receiving any more data.
+        frame = self.next_frame(stream)
+        return None if frame is None else self.decode_packet(frame)
+
+    def next_frame(self, stream):
+        # As `next_packet', but return the packet's frame, to be given to
+        # `decode_packet' or `submit_frame'.
+        return self._get_frame_reader(stream).next_frame()
+
+    def _get_frame_reader(self, stream):
+        # Return the connection's FrameReader, set to read from `stream'.
+        frame_reader = self.connection._frame_reader
+        if frame_reader.stream is not stream:
+            frame_reader.set_stream(stream)
+        return frame_reader
+
+    def decode_packet(self, frame):
+        # Return the packet whose data (after the length prefix) is `frame',
+        # which may have been received in any way.
+        packet_data = packets.PacketReader(frame)
+
+        if self.connection.options.compression_enabled:
+            decompressed_size = VarInt.read(packet_data)
+            if decompressed_size > 0:
+                packet_data = packets.PacketReader(decompress(
+                    packet_data.read_view(), decompressed_size))
+
+        return self.decode_packet_data(packet_data)
+
+    def submit_frame(self, frame, executor, threshold):
+        # If `frame' is compressed, and at least `threshold' bytes long when
+        # decompressed, submit its decompression to `executor', returning a
+        # future whose result may be given to `decode_packet_data' once it is
+        # done; otherwise, return `None'. No other packets must be decoded in
+        # the meantime, as they may change how the packet is decoded.
+        if not self.connection.options.compression_enabled:
+            return None
+        packet_data = packets.PacketReader(frame)
+        decompressed_size = VarInt.read(packet_data)
+        if decompressed_size == 0 or decompressed_size < threshold:
             return None
+        return executor.submit(
+            decompress, packet_data.read_view(), decompressed_size)
+
+    def decode_packet_data(self, packet_data):
+        # Return the packet whose uncompressed data (starting with the packet
+        # ID) is `packet_data', a `PacketReader' or bytes-like object.
+        if not isinstance(packet_data, packets.PacketReader):
+            packet_data = packets.PacketReader(packet_data)
+        packet_id = VarInt.read(packet_data)
+        self.connection.packets_received += 1
+
+        # If we know the structure of the packet and it is needed, attempt to
+        # parse it; otherwise just skip it
+        packet_table = self.packet_table
+        packet_type = packet_table[packet_id] \
+            if 0 <= packet_id < len(packet_table) else None
+        if packet_type is not None and self.needs_decoding(packet_type):
+            packet = self.new_packet(packet_type)
+            packet.read(packet_data)
+            return packet
+        else:
+            return self.new_packet(packets.Packet)
+
+    def new_packet(self, packet_type):
+        # Return a packet of `packet_type' to decode a received packet into:
+        # either a new packet, or the one used for the previous packet of
+        # this type, if the connection's `reuse_packets' option is set.
+        if not self.connection.reuse_packets:
+            return packet_type(context=self.connection.context)
+        packet = self.reused_packets.get(packet_type)
+        if packet is None:
+            packet = self.reused_packets[packet_type] = packet_type()
+        else:
+            # Discard any attributes not held in slots, such as those added
+            # by packet listeners, or by decoding the previous packet.
+            packet.__dict__.clear()
+        packet.context = self.connection.context
+        return packet
+
+    def needs_decoding(self, packet_type):
+        # Return True if received packets of `packet_type' must be decoded,
+        # because they are used by this reactor or by some packet listener.
+        if self._handled_packet_names is None or \
+           packet_type.packet_name in self._handled_packet_names:
+            return True
+        early, ordinary, _, _ = self.connection._get_listeners(packet_type)
+        return bool(early or ordinary)
 
     def react(self, packet):
         """Called with each incoming packet after early packet listeners are
@@ -585,40 +828,30 @@ class PacketReactor(object):
         return False
 
 
+def _handled_packet_names(reactor_class):
+    # Return the `handled_packet_names' of `reactor_class' if it is defined
+    # by the class that defines its `react', or by a subclass of that class;
+    # otherwise, `react' may use packets not named in it, so return None.
+    for cls in reactor_class.__mro__:
+        if 'handled_packet_names' in cls.__dict__:
+            return cls.__dict__['handled_packet_names']
+        if 'react' in cls.__dict__:
+            return None
+    return None
+
+
 class LoginReactor(PacketReactor):
     get_clientbound_packets = staticmethod(clientbound.login.get_packets)
 
     def react(self, packet):
         if packet.packet_name == "encryption request":
-
-            secret = encryption.generate_shared_secret()
-            token, encrypted_secret = encryption.encrypt_token_and_secret(
-                packet.public_key, packet.verify_token, secret)
-
-            # A server id of '-' means the server is in offline mode
-            if packet.server_id != '-':
-                server_id = encryption.generate_verification_hash(
-                    packet.server_id, secret, packet.public_key)
-                if self.connection.auth_token is not None:
-                    self.connection.auth_token.join(server_id)
-
-            encryption_response = serverbound.login.EncryptionResponsePacket()
-            encryption_response.shared_secret = encrypted_secret
-            encryption_response.verify_token = token
-
-            # Forced because we'll have encrypted the connection by the time
-            # it reaches the outgoing queue
-            self.connection.write_packet(encryption_response, force=True)
-
-            # Enable the encryption
-            cipher = encryption.create_AES_cipher(secret)
-            encryptor = cipher.encryptor()
-            decryptor = cipher.decryptor()
-            self.connection.socket = encryption.EncryptedSocketWrapper(
-                self.connection.socket, encryptor, decryptor)
-            self.connection.file_object = \
-                encryption.EncryptedFileObjectWrapper(
-                    self.connection.file_object, decryptor)
+            # Preparing the response may block on the session server, so
+            # the connection may prepare it in another thread (see
+            # 'Connection._call_blocking') before it is sent.
+            args = packet.server_id, packet.public_key, packet.verify_token
+            self.connection._call_blocking(
+                lambda: self._prepare_encryption_response(*args),
+                lambda result: self._send_encryption_response(*result))
 
         elif packet.packet_name == "disconnect":
             # Receiving a disconnect packet in the login state indicates an
@@ -647,9 +880,39 @@ class LoginReactor(PacketReactor):
                 serverbound.login.PluginResponsePacket(
                     message_id=packet.message_id, successful=False))
 
+    def _prepare_encryption_response(self, server_id, public_key,
+                                     verify_token):
+        # Return a new shared secret and the encryption response to send to
+        # the server, having joined its session if it is in online mode. This
+        # may be called from any thread.
+        secret = encryption.generate_shared_secret()
+        token, encrypted_secret = encryption.encrypt_token_and_secret(
+            public_key, verify_token, secret)
+
+        # A server id of '-' means the server is in offline mode
+        if server_id != '-':
+            server_id = encryption.generate_verification_hash(
+                server_id, secret, public_key)
+            if self.connection.auth_token is not None:
+                self.connection.auth_token.join(server_id)
+
+        encryption_response = serverbound.login.EncryptionResponsePacket()
+        encryption_response.shared_secret = encrypted_secret
+        encryption_response.verify_token = token
+        return secret, encryption_response
+
+    def _send_encryption_response(self, secret, encryption_response):
+        # Forced because we'll have encrypted the connection by the time
+        # it reaches the outgoing queue
+        self.connection.write_packet(encryption_response, force=True)
+
+        self.connection._enable_encryption(secret)
+
 
 class PlayingReactor(PacketReactor):
     get_clientbound_packets = staticmethod(clientbound.play.get_packets)
+    handled_packet_names = {"set compression", "keep alive",
+                            "player position and look", "disconnect"}
 
     def react(self, packet):
         if packet.packet_name == "set compression":
@@ -683,6 +946,7 @@ class PlayingReactor(PacketReactor):
 
 class StatusReactor(PacketReactor):
     get_clientbound_packets = staticmethod(clientbound.status.get_packets)
+    handled_packet_names = {"response", "ping"}
 
     def __init__(self, connection, do_ping=False):
         super(StatusReactor, self).__init__(connection)
@@ -0,0 +1,429 @@
+"""
+Contains 'ConnectionPool', which carries out the networking of many
+'Connection' objects from a single thread, in place of a networking thread for
+each connection.
+"""
+from collections import deque
+import threading
+import traceback
+import socket
+import sys
+
+from future.utils import raise_
+
+try:
+    import selectors
+except ImportError:  # Python 2
+    import selectors2 as selectors
+
+
+class ConnectionPool(object):
+    """Carries out the networking of each 'Connection' constructed with this
+       pool as its 'pool' argument, from a single thread belonging to the
+       pool, which is started when the first connection is made.
+
+       The pool waits for data to arrive on any of its connections' sockets
+       using 'selectors.DefaultSelector' (epoll on Linux), and is woken
+       directly when a packet is written or a connection closed, so that,
+       unlike 'NetworkingThread', it does not poll idle connections. The
+       sockets are non-blocking: data that a socket does not accept at once
+       is kept until the selector finds the socket writable. Each
+       connection is otherwise handled as by its own networking thread, with
+       its reactors and packet listeners called from the pool's thread.
+
+       If 'executor' (a 'concurrent.futures.Executor', such as a
+       'ThreadPoolExecutor', which may be shared with other pools) is given,
+       packets that are at least 'offload_threshold' bytes long are
+       compressed and decompressed by the executor, so that the pool's
+       thread may handle other connections in the meantime, and, as zlib
+       releases the GIL, so that several packets may be compressed at once.
+       The packets of each connection are still sent and handled in order.
+
+       The response to each server's encryption request, which involves
+       joining the server's session, is prepared by 'login_executor', so
+       that many connections may log in at once without blocking the pool's
+       thread, and without occupying the threads of 'executor'. If
+       'login_executor' is not given, the pool creates a 'ThreadPoolExecutor'
+       of 'login_threads' threads when it is first needed; under Python 2,
+       this requires the 'futures' package, without which the responses are
+       prepared by the pool's thread.
+    """
+    def __init__(self, name="Connection Pool", executor=None,
+                 offload_threshold=65536, login_executor=None,
+                 login_threads=8):
+        self.name = name
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+        self.login_executor = login_executor
+        self.login_threads = login_threads
+        self.thread = None
+        self.selector = selectors.DefaultSelector()
+
+        # The following are guarded by '_lock', as they may be modified by
+        # other threads: a list of 'PooledNetworkingThread' objects that have
+        # been started; a set of those that need to be woken; whether the
+        # pool's thread has been woken since it last checked; and whether it
+        # should terminate.
+        self._lock = threading.Lock()
+        self._starting = []
+        self._notified = set()
+        self._woken = False
+        self._closing = False
+
+        # Members whose connections have more packets to read or write, as
+        # of the last time that they were handled.
+        self._busy = set()
+
+        # The executor created by '_submit_login', if 'login_executor' is
+        # None, which is shut down when the pool's thread exits.
+        self._own_login_executor = None
+
+        # Writing a byte to '_wakeup_send' causes the pool's thread to wake.
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self.selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+    @property
+    def networking_thread_type(self):
+        """ The type used by 'Connection' in place of 'NetworkingThread'. """
+        return PooledNetworkingThread
+
+    def notify(self, connection):
+        """
+        Wakes the pool's thread, if necessary, to write any packets queued by
+        'connection', which must belong to this pool.
+        """
+        member = connection.networking_thread
+        if not isinstance(member, PooledNetworkingThread):
+            return
+        if threading.current_thread() is self.thread:
+            self._busy.add(member)
+        else:
+            self._notify(member)
+
+    def close(self):
+        """
+        Stops the pool's thread, if it is running, and waits for it to exit.
+        Any connections belonging to the pool should be disconnected first.
+        """
+        with self._lock:
+            self._closing = True
+            thread = self.thread
+        self._wake()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _start(self, member):
+        with self._lock:
+            if self._closing:
+                raise ValueError('The connection pool has been closed.')
+            self._starting.append(member)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run,
+                                               name=self.name)
+                self.thread.daemon = True
+                self.thread.start()
+        self._wake()
+
+    def _notify(self, member):
+        with self._lock:
+            self._notified.add(member)
+        self._wake()
+
+    def _wake(self):
+        with self._lock:
+            if self._woken:
+                return
+            self._woken = True
+        try:
+            self._wakeup_send.send(b'\0')
+        except socket.error:
+            # The socket's buffer is full, so the thread is already woken.
+            pass
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if self._closing:
+                        break
+                    starting, self._starting = self._starting, []
+                    notified, self._notified = self._notified, set()
+                    self._woken = False
+
+                work = notified | self._busy
+                readable = set()
+                timeout = 0 if work or starting else None
+                for key, events in self.selector.select(timeout):
+                    if key.data is None:
+                        self._drain_wakeup()
+                    else:
+                        work.add(key.data)
+                        if events & selectors.EVENT_READ:
+                            readable.add(key.data)
+
+                self._busy = set()
+                for member in work:
+                    # A member notified before it is activated has no socket
+                    # yet; it is handled once activated.
+                    if member.is_alive() and member.socket is not None:
+                        self._handle(member, member in readable)
+
+                for member in starting:
+                    if member.previous_thread is not None and \
+                       member.previous_thread.is_alive():
+                        with self._lock:
+                            self._starting.append(member)
+                    else:
+                        self._activate(member)
+        finally:
+            for key in list(self.selector.get_map().values()):
+                if key.data is not None:
+                    self._finish(key.data, exception=False)
+            self.selector.close()
+            self._wakeup_recv.close()
+            self._wakeup_send.close()
+            if self._own_login_executor is not None:
+                self._own_login_executor.shutdown(wait=False)
+
+    def _submit_login(self, function):
+        # Submit 'function', which prepares the response to an encryption
+        # request, to the login executor, and return its future; or return
+        # None if no executor is available, in which case the caller should
+        # call 'function' itself. This is called from the pool's thread.
+        executor = self.login_executor
+        if executor is None:
+            if self._own_login_executor is None:
+                try:
+                    from concurrent.futures import ThreadPoolExecutor
+                except ImportError:  # Python 2, without 'futures'.
+                    return None
+                self._own_login_executor = ThreadPoolExecutor(
+                    self.login_threads)
+            executor = self._own_login_executor
+        return executor.submit(function)
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def _activate(self, member):
+        # Begin handling the connection of 'member', as when the networking
+        # thread starts running.
+        connection = member.connection
+        with connection._write_lock:
+            if member.previous_thread is not None:
+                connection.networking_thread = member
+                connection.new_networking_thread = None
+            member.previous_thread = None
+            member.socket = connection.socket
+        if member.interrupt or member.socket is None:
+            self._finish(member, exception=False)
+            return
+
+        try:
+            self.selector.register(member.socket, selectors.EVENT_READ,
+                                   member)
+        except KeyError:
+            # The socket's descriptor was reused after a connection was
+            # closed by another thread, before it was removed from the pool.
+            self._finish(self.selector.get_key(member.socket).data,
+                         exception=False)
+            self.selector.register(member.socket, selectors.EVENT_READ,
+                                   member)
+        member.events = selectors.EVENT_READ
+        member.socket.setblocking(False)
+        self._busy.add(member)
+
+    def _handle(self, member, readable):
+        # Write and read the packets of the connection of 'member', as in one
+        # iteration of 'NetworkingThread._run'.
+        try:
+            if not member.interrupt and member.step(readable):
+                self._busy.add(member)
+        except BaseException as e:
+            member.interrupt = True
+            try:
+                member.connection._handle_exception(e, sys.exc_info())
+            except BaseException:
+                traceback.print_exc()
+            self._finish(member, exception=True)
+            return
+        if member.interrupt:
+            self._finish(member, exception=False)
+            return
+
+        # Wait for the socket to become writable while it has data to send.
+        events = selectors.EVENT_READ
+        if member.blocked:
+            events |= selectors.EVENT_WRITE
+        if events != member.events:
+            self.selector.modify(member.socket, events, member)
+            member.events = events
+
+    def _finish(self, member, exception):
+        # Stop handling the connection of 'member', as when the networking
+        # thread exits.
+        connection = member.connection
+        try:
+            self.selector.unregister(member.socket)
+        except (KeyError, ValueError):
+            pass
+        self._busy.discard(member)
+        try:
+            if not exception:
+                try:
+                    connection._handle_exit()
+                except BaseException as e:
+                    member.interrupt = True
+                    connection._handle_exception(e, sys.exc_info())
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            with connection._write_lock:
+                connection.networking_thread = None
+            member._finished.set()
+
+
+class PooledNetworkingThread(object):
+    """Takes the place of a 'NetworkingThread' for a 'Connection' belonging
+       to a 'ConnectionPool', with the same interface, but carries out the
+       networking for that connection in the pool's thread.
+    """
+    def __init__(self, connection, previous=None):
+        self.connection = connection
+        self.pool = connection.pool
+        self.name = "Pooled Networking Thread"
+        self.daemon = True
+        self.previous_thread = previous
+        self.socket = None
+        self.events = None    # The events for which 'socket' is selected.
+        self.blocked = False  # Whether 'socket' has not accepted all data.
+        self._interrupt = False
+        self._started = False
+        self._finished = threading.Event()
+
+        # The future of the data of the next received packet, while it is
+        # being decompressed by the pool's executor.
+        self._pending_data = None
+
+        # Pairs of a future and a function to call with its result, given to
+        # 'call_when_done'.
+        self._pending_calls = deque()
+
+    @property
+    def interrupt(self):
+        return self._interrupt
+
+    @interrupt.setter
+    def interrupt(self, interrupt):
+        # Wake the pool, so that it stops handling the connection promptly.
+        self._interrupt = interrupt
+        if interrupt and self._started and not self._finished.is_set():
+            self.pool._notify(self)
+
+    def start(self):
+        self._started = True
+        self.pool._start(self)
+
+    def is_alive(self):
+        return self._started and not self._finished.is_set()
+
+    def join(self, timeout=None):
+        self._finished.wait(timeout)
+
+    def call_when_done(self, future, callback):
+        """
+        Calls 'callback' with the result of 'future' from the pool's thread,
+        as if by the connection's reactor, once 'future' is done. Callbacks
+        are called in the order in which they are given to this method.
+        """
+        self._pending_calls.append((future, callback))
+        future.add_done_callback(self._notify_pool)
+
+    def step(self, readable):
+        # Write any queued packets, then react to up to 50 received packets,
+        # receiving more data only if 'readable' is true. Return True if the
+        # connection has more packets to read or write. Packets being
+        # compressed or decompressed by the pool's executor, and any packets
+        # after them, are left until the pool is notified that they are done.
+        connection = self.connection
+        executor = self.pool.executor
+        num_packets = 0
+        with connection._write_lock:
+            pending_calls = self._pending_calls
+            while pending_calls and pending_calls[0][0].done():
+                future, callback = pending_calls.popleft()
+                callback(future.result())
+
+            try:
+                # While the socket does not accept all data, leave packets in
+                # the queue rather than buffering them in the frame writer.
+                while not self.interrupt and not self.blocked and \
+                        connection._pop_packet():
+                    num_packets += 1
+                    if num_packets >= 300:
+                        break
+                future = connection._flush_packets(wait=False)
+                if future is not None:
+                    future.add_done_callback(self._notify_pool)
+                exc_info = None
+            except IOError:
+                exc_info = sys.exc_info()
+            self.blocked = connection._frame_writer.blocked
+
+        while num_packets < 50 and not self.interrupt:
+            reactor = connection.reactor
+            if self._pending_data is not None:
+                if not self._pending_data.done():
+                    if not readable:
+                        break
+                    try:
+                        connection._frame_reader.receive()
+                        readable = False
+                        continue
+                    except EOFError:
+                        # Wait for the packet, so that it and any others
+                        # before the end of the stream are handled first.
+                        pass
+                data, self._pending_data = self._pending_data.result(), None
+                packet = reactor.decode_packet_data(data)
+            else:
+                frame = reactor.next_frame(connection.file_object)
+                if frame is None:
+                    if not readable:
+                        break
+                    connection._frame_reader.receive()
+                    readable = False
+                    continue
+                if executor is not None:
+                    self._pending_data = reactor.submit_frame(
+                        frame, executor, self.pool.offload_threshold)
+                    if self._pending_data is not None:
+                        self._pending_data.add_done_callback(
+                            self._notify_pool)
+                        continue
+                packet = reactor.decode_packet(frame)
+            num_packets += 1
+            connection._react(packet)
+
+            # As in 'NetworkingThread', ignore the earlier exception if a
+            # disconnect packet is received.
+            if exc_info is not None and packet.packet_name == "disconnect":
+                exc_info = None
+
+        if exc_info is not None:
+            raise_(*exc_info)
+        return num_packets >= 50 or \
+            bool(connection._outgoing_packet_queue) and not self.blocked
+
+    def _notify_pool(self, _future):
+        # Called, from any thread, when a packet has been compressed or
+        # decompressed by the pool's executor, or when a future given to
+        # 'call_when_done' is done.
+        if self.is_alive():
+            self.pool._notify(self)
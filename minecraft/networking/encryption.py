@@ -1,4 +1,5 @@
 import os
+import errno
 from hashlib import sha1
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric.padding import PKCS1v15
@@ -25,13 +26,32 @@ def encrypt_token_and_secret(pubkey, verification_token, shared_secret):
     :param shared_secret: The generated shared secret
     :return: A tuple containing (encrypted token, encrypted secret)
     """
-    pubkey = load_der_public_key(pubkey, default_backend())
+    pubkey = load_public_key(pubkey)
 
     encrypted_token = pubkey.encrypt(verification_token, PKCS1v15())
     encrypted_secret = pubkey.encrypt(shared_secret, PKCS1v15())
     return encrypted_token, encrypted_secret
 
 
+def load_public_key(pubkey):
+    """Returns the public key object for the given DER-encoded public key, as
+    provided by the server. The keys of the most recently used servers are
+    cached, as every connection to a server is given the same key.
+    """
+    key = _public_keys.get(pubkey)
+    if key is None:
+        key = load_der_public_key(pubkey, default_backend())
+        if len(_public_keys) >= _MAX_PUBLIC_KEYS:
+            _public_keys.clear()
+        _public_keys[pubkey] = key
+    return key
+
+
+# Maps DER-encoded public keys to the objects returned by 'load_public_key'.
+_public_keys = {}
+_MAX_PUBLIC_KEYS = 64
+
+
 def generate_verification_hash(server_id, shared_secret, public_key):
     verification_hash = sha1()
 
@@ -62,14 +82,48 @@ def _number_from_bytes(b, signed=False):
         return num
 
 
+# The space that 'update_into' requires in its output buffer beyond the length
+# of the data, which is one byte less than AES's block size.
+_UPDATE_INTO_SLACK = 15
+
+
 class EncryptedFileObjectWrapper(object):
-    def __init__(self, file_object, decryptor):
+    """Decrypts the data read from 'file_object' using 'decryptor'. When used
+       by a 'FrameReader', ciphertext is received in large chunks into a
+       reusable buffer, each of which is decrypted by a single call directly
+       into the frame reader's buffer. As with the frame reader's buffer, this
+       buffer is released if it grows beyond 4 times 'buffer_size'.
+    """
+    def __init__(self, file_object, decryptor, buffer_size=65536):
         self.actual_file_object = file_object
         self.decryptor = decryptor
+        self.buffer_size = buffer_size
+        self._ciphertext = bytearray()
 
     def read(self, length):
         return self.decryptor.update(self.actual_file_object.read(length))
 
+    def readinto(self, buffer):
+        update_into = getattr(self.decryptor, 'update_into', None)
+        size = len(buffer) - _UPDATE_INTO_SLACK
+        if update_into is None or size <= 0:
+            # 'update_into' requires cryptography 1.8 or later.
+            count = self.actual_file_object.readinto(buffer)
+            if count:
+                buffer[:count] = self.decryptor.update(buffer[:count])
+            return count
+
+        if len(self._ciphertext) < size:
+            self._ciphertext = bytearray(size)
+        ciphertext = memoryview(self._ciphertext)[:size]
+        count = self.actual_file_object.readinto(ciphertext)
+        if count:
+            update_into(ciphertext[:count], buffer)
+        del ciphertext
+        if len(self._ciphertext) > 4 * self.buffer_size:
+            self._ciphertext = bytearray()
+        return count
+
     def fileno(self):
         return self.actual_file_object.fileno()
 
@@ -78,16 +132,68 @@ class EncryptedFileObjectWrapper(object):
 
 
 class EncryptedSocketWrapper(object):
-    def __init__(self, socket, encryptor, decryptor):
+    """Encrypts the data sent to 'socket' using 'encryptor', and decrypts the
+       data received from it using 'decryptor'. Each batch of data given to
+       'sendall' is encrypted by a single call, into a reusable buffer, which
+       is released if it grows beyond 4 times 'buffer_size'.
+
+       'socket' may be non-blocking, if only 'send' is used: the data given
+       to 'send' is always encrypted in full, and any of it that the socket
+       does not accept is kept in 'unsent', to be sent before any other data.
+       'unsent' may also be given data to send without encryption.
+    """
+    def __init__(self, socket, encryptor, decryptor, buffer_size=65536):
         self.actual_socket = socket
         self.encryptor = encryptor
         self.decryptor = decryptor
+        self.buffer_size = buffer_size
+        self.unsent = bytearray()
+        self._ciphertext = bytearray()
 
     def recv(self, length):
         return self.decryptor.update(self.actual_socket.recv(length))
 
     def send(self, data):
-        self.actual_socket.send(self.encryptor.update(data))
+        # Returns the number of bytes of 'data' consumed, which is none of
+        # them if data from earlier calls is still unsent, and otherwise all.
+        if self.unsent:
+            self._send_unsent()
+            if self.unsent:
+                return 0
+        if not data:
+            return 0
+        self.unsent += self.encryptor.update(data)
+        self._send_unsent()
+        return len(data)
+
+    def _send_unsent(self):
+        try:
+            count = self.actual_socket.send(self.unsent)
+        except IOError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+            count = 0
+        del self.unsent[:count]
+
+    def sendall(self, data):
+        if self.unsent:
+            self.actual_socket.sendall(self.unsent)
+            del self.unsent[:]
+
+        update_into = getattr(self.encryptor, 'update_into', None)
+        if update_into is None:
+            self.actual_socket.sendall(self.encryptor.update(data))
+            return
+
+        size = len(data) + _UPDATE_INTO_SLACK
+        if len(self._ciphertext) < size:
+            self._ciphertext = bytearray(size)
+        ciphertext = memoryview(self._ciphertext)
+        count = update_into(data, ciphertext)
+        self.actual_socket.sendall(ciphertext[:count])
+        del ciphertext
+        if len(self._ciphertext) > 4 * self.buffer_size:
+            self._ciphertext = bytearray()
 
     def fileno(self):
         return self.actual_socket.fileno()
@@ -0,0 +1,299 @@
+"""
+Contains the classes used to divide the data received from a connection into
+packet frames, each of which is the data of one packet prefixed by its length.
+"""
+from collections import deque
+import select
+import errno
+
+from .packets.packet_buffer import FrameBuffer
+
+
+class FrameReader(object):
+    """Splits the data received from a stream into frames. Data is received
+       in large chunks into a reusable buffer, from which frames are then
+       returned until the buffer no longer holds a complete frame, so that a
+       burst of small packets costs a single system call rather than several
+       for each packet. The stream is only polled when more data is needed.
+
+       The stream should be unbuffered, so that polling its file descriptor
+       shows whether it has any data, and should support 'readinto' (or, if
+       not, 'read' returning any available data, as for a socket's 'recv').
+       Alternatively, if the stream is None, data received by other means
+       (such as an event loop) may be given to 'feed', and the frames
+       collected with 'next_frame'.
+    """
+    __slots__ = 'stream', 'buffer', 'start', 'end', 'buffer_size'
+
+    # The maximum size of a frame's length prefix, as in the vanilla server,
+    # which limits frames to 2 ** 21 - 1 bytes.
+    MAX_LENGTH_BYTES = 3
+
+    def __init__(self, stream, buffer_size=65536):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = bytearray(buffer_size)
+        self.start = 0  # The index of the first unconsumed byte.
+        self.end = 0    # The index just after the last received byte.
+
+    @property
+    def buffered(self):
+        """ The number of received bytes that have not yet been returned. """
+        return self.end - self.start
+
+    def set_stream(self, stream):
+        """
+        Continues reading from 'stream', which replaces the current stream.
+        If 'stream' decrypts the current stream (as with an
+        'EncryptedFileObjectWrapper'), any data that has already been
+        received but not returned is decrypted accordingly.
+        """
+        decryptor = getattr(stream, 'decryptor', None)
+        if decryptor is not None:
+            self.decrypt(decryptor)
+        self.stream = stream
+
+    def decrypt(self, decryptor):
+        """
+        Decrypts, using 'decryptor', any data that has already been received
+        but not returned, as when encryption is enabled for the stream.
+        """
+        if self.end > self.start:
+            data = bytes(self.buffer[self.start:self.end])
+            self.buffer[self.start:self.end] = decryptor.update(data)
+
+    def feed(self, data):
+        """
+        Adds 'data', which has been received from the stream by the caller,
+        to the data from which frames are returned.
+        """
+        self._reserve(len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def read_frame(self, timeout=0):
+        """
+        Returns the data of the next frame, without its length prefix, as a
+        bytes object; or None if no complete frame is received within
+        'timeout' seconds of waiting for data. If the stream is closed,
+        'EOFError' is raised.
+        """
+        frame = self.next_frame()
+        while frame is None:
+            if not select.select([self.stream], [], [], timeout)[0]:
+                return None
+            self.receive()
+            frame = self.next_frame()
+        return frame
+
+    def next_frame(self):
+        """
+        Returns the data of the next frame that has already been received in
+        full, or None if there is no such frame, without receiving any data.
+        """
+        buffer, pos, end = self.buffer, self.start, self.end
+        length = shift = 0
+        while True:
+            if pos >= end:
+                return None
+            byte = buffer[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+            if shift >= 7 * self.MAX_LENGTH_BYTES:
+                # Reject the frame before any of it is buffered.
+                raise ValueError("Frame length prefix is longer than %d "
+                                 "bytes." % self.MAX_LENGTH_BYTES)
+
+        if end - pos < length:
+            return None
+        self.start = pos + length
+        frame = memoryview(buffer)[pos:self.start].tobytes()
+        if self.start == end:
+            self._reset()
+        return frame
+
+    def _reserve(self, size):
+        # Ensures that there is room for at least 'size' more bytes after the
+        # received data, compacting or enlarging the buffer as necessary.
+        free = len(self.buffer) - self.end
+        if self.start > 0 and free < max(size, len(self.buffer) // 2):
+            pending = self.end - self.start
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.start, self.end = 0, pending
+            free = len(self.buffer) - self.end
+        if free < size:
+            self.buffer.extend(bytearray(max(size - free, len(self.buffer))))
+
+    def receive(self):
+        """
+        Receives as much data from the stream as is available and fits in the
+        buffer, blocking if no data is available. This may be used, instead of
+        'read_frame', when the stream is known to have data, such as when it
+        is polled by the caller; the frames may then be read by 'next_frame'.
+        """
+        self._reserve(1)
+
+        readinto = getattr(self.stream, 'readinto', None)
+        if readinto is not None:
+            view = memoryview(self.buffer)[self.end:]
+            count = readinto(view)
+            del view
+        else:
+            data = self.stream.read(len(self.buffer) - self.end)
+            count = len(data)
+            self.buffer[self.end:self.end + count] = data
+
+        if count == 0:
+            raise EOFError("Unexpected end of message.")
+        elif count is not None:
+            self.end += count
+
+    def _reset(self):
+        # Empties the buffer, releasing memory if it has been enlarged.
+        self.start = self.end = 0
+        if len(self.buffer) > 4 * self.buffer_size:
+            del self.buffer[self.buffer_size:]
+
+
+class FrameWriter(object):
+    """Collects the frames written to a connection, so that they may be sent
+       together with a single 'sendall' when the connection is flushed, rather
+       than with one or more system calls for each packet. An instance of this
+       class may be given to 'Packet.write' in place of a socket.
+
+       If 'executor' (a 'concurrent.futures.Executor') is given, frames whose
+       body is at least 'offload_threshold' bytes long and is to be compressed
+       are compressed by the executor, rather than by the thread writing the
+       packet. The frames are still sent in the order in which they were
+       written, so any frames written after such a frame are held back until
+       it is ready.
+
+       'blocked' is True if, when the writer was last flushed with 'partial'
+       set, the socket did not accept all of the data.
+    """
+    __slots__ = 'buffer', 'buffer_size', 'executor', 'offload_threshold', \
+                'deferred', 'blocked'
+
+    def __init__(self, buffer_size=65536, executor=None,
+                 offload_threshold=65536):
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+
+        # For each frame being compressed by the executor, in order, a list
+        # holding the future of the frame and a bytearray of the data written
+        # after it; 'buffer' holds the data written before the first.
+        self.deferred = deque()
+        self.blocked = False
+
+    @property
+    def pending(self):
+        """ The number of bytes written that have not yet been flushed. """
+        return len(self.buffer) + sum(len(d) for _, d in self.deferred)
+
+    def send(self, data):
+        """
+        Appends the given bytes to the data to be sent, designed to emulate
+        socket.send
+        """
+        if self.deferred:
+            self.deferred[-1][1] += data
+        else:
+            self.buffer += data
+        return len(data)
+
+    def send_frame(self, frame_buffer, compression_threshold=None,
+                   compression=None):
+        """
+        Appends the frame written to the 'FrameBuffer' 'frame_buffer', with
+        the arguments of 'FrameBuffer.get_frame', compressing it with the
+        executor if necessary.
+        """
+        size = frame_buffer.body_size
+        if self.executor is None or compression_threshold is None or \
+           size < self.offload_threshold or \
+           not size > compression_threshold != -1 or \
+           compression is not None and not compression.enabled:
+            self.send(frame_buffer.get_frame(compression_threshold,
+                                             compression))
+            return
+        future = self.executor.submit(
+            _get_frame, frame_buffer.get_writable(), compression_threshold,
+            compression)
+        self.deferred.append([future, bytearray()])
+
+    def flush(self, socket, wait=True, partial=False):
+        """
+        Sends all pending data to 'socket' at once, retrying partial writes
+        until all of the data is sent. If 'wait' is False, and a frame being
+        compressed by the executor is not yet ready, only the data written
+        before that frame is sent, and the frame's future is returned, so
+        that the caller may flush again once it is done; otherwise, None is
+        returned.
+
+        If 'partial' is True, 'socket' may be non-blocking: only as much of
+        the data as it accepts is sent, and the rest remains to be sent by
+        the next flush, with 'blocked' set to True. If 'socket' has an
+        'unsent' attribute, as does 'EncryptedSocketWrapper', it holds data
+        that the socket has accepted but not yet sent, which it sends first
+        on each call to its 'send' method; a flush without 'partial' also
+        sends this data, by calling 'sendall', even if nothing else is
+        pending.
+        """
+        self.blocked = False
+        while True:
+            if partial:
+                if not self.blocked and (
+                   self.buffer or getattr(socket, 'unsent', None)):
+                    self._send_some(socket)
+            elif self.buffer or getattr(socket, 'unsent', None):
+                try:
+                    socket.sendall(self.buffer)
+                finally:
+                    if len(self.buffer) > 4 * self.buffer_size:
+                        self.buffer = bytearray()
+                    else:
+                        del self.buffer[:]
+            if not self.deferred:
+                return None
+            future, following = self.deferred[0]
+            if not wait and not future.done():
+                return future
+            self.buffer += future.result()
+            self.buffer += following
+            self.deferred.popleft()
+
+    def _send_some(self, socket):
+        # Sends as much of the buffer to 'socket' as it accepts without
+        # blocking, setting 'blocked' if any data remains to be sent.
+        view = memoryview(self.buffer)
+        sent = 0
+        try:
+            while True:
+                count = socket.send(view[sent:])
+                sent += count
+                if not count or sent >= len(view):
+                    break
+        except IOError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+        finally:
+            del view
+            if sent >= len(self.buffer) and \
+               len(self.buffer) > 4 * self.buffer_size:
+                self.buffer = bytearray()
+            else:
+                del self.buffer[:sent]
+        self.blocked = bool(self.buffer or getattr(socket, 'unsent', None))
+
+
+def _get_frame(body, compression_threshold, compression):
+    # Returns, as bytes, the frame with the given body, as written by a
+    # 'FrameWriter' to its executor.
+    frame_buffer = FrameBuffer()
+    frame_buffer.send(body)
+    return frame_buffer.get_frame(compression_threshold, compression).tobytes()
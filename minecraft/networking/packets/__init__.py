@@ -9,8 +9,10 @@ packets.serverbound.* instead.
 '''
 
 # Packet-Related Utilities
-from .packet_buffer import PacketBuffer
+from .packet_buffer import PacketBuffer, PacketReader, FrameBuffer
 from .packet_listener import PacketListener
+from .packet_codec import PacketCodec
+from .packet_registry import get_packet_table
 
 # Abstract Packet Classes
 from .packet import Packet
@@ -80,6 +82,7 @@ __all_legacy_packets__ = (
 )
 
 __all_other__ = (
-    Packet, PacketBuffer, PacketListener,
-    AbstractKeepAlivePacket, AbstractPluginMessagePacket,
+    Packet, PacketBuffer, PacketReader, FrameBuffer, PacketListener,
+    PacketCodec, get_packet_table, AbstractKeepAlivePacket,
+    AbstractPluginMessagePacket,
 )
@@ -14,6 +14,7 @@ from .player_position_and_look_packet import PlayerPositionAndLookPacket
 from .spawn_object_packet import SpawnObjectPacket
 from .block_change_packet import BlockChangePacket, MultiBlockChangePacket
 from .explosion_packet import ExplosionPacket
+from .chunk_data_packet import ChunkDataPacket, UnloadChunkPacket
 
 
 # Formerly known as state_playing_clientbound.
@@ -21,6 +22,7 @@ def get_packets(context):
     packets = {
         KeepAlivePacket,
         JoinGamePacket,
+        RespawnPacket,
         ChatMessagePacket,
         PlayerPositionAndLookPacket,
         MapPacket,
@@ -40,6 +42,11 @@ def get_packets(context):
         packets |= {
             SetCompressionPacket,
         }
+    if context.protocol_version >= 107:
+        packets |= {
+            ChunkDataPacket,
+            UnloadChunkPacket,
+        }
     return packets
 
 
@@ -75,6 +82,25 @@ class JoinGamePacket(Packet):
         {'reduced_debug_info': Boolean}])
 
 
+class RespawnPacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x38 if context.protocol_version >= 389 else \
+               0x37 if context.protocol_version >= 352 else \
+               0x36 if context.protocol_version >= 345 else \
+               0x35 if context.protocol_version >= 336 else \
+               0x34 if context.protocol_version >= 318 else \
+               0x33 if context.protocol_version >= 107 else \
+               0x07
+
+    packet_name = "respawn"
+    definition = [
+        {'dimension': Integer},
+        {'difficulty': UnsignedByte},
+        {'game_mode': UnsignedByte},
+        {'level_type': String}]
+
+
 class ChatMessagePacket(Packet):
     @staticmethod
     def get_id(context):
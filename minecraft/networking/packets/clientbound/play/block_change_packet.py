@@ -1,7 +1,13 @@
-from minecraft.networking.packets import Packet
+from array import array
+
+from minecraft.networking.packets import Packet, PacketReader
 from minecraft.networking.types import (
     VarInt, Integer, UnsignedByte, Position, Vector, MutableRecord
 )
+from minecraft.utility import require_numpy
+
+# Indexing a memoryview gives integers in Python 3, but strings in Python 2.
+_VIEW_YIELDS_INTS = isinstance(memoryview(b'\x00')[0], int)
 
 
 class BlockChangePacket(Packet):
@@ -34,6 +40,10 @@ class BlockChangePacket(Packet):
         self.block_state_id = block_state_id
     blockStateId = property(lambda self: self.block_state_id, blockStateId)
 
+    def apply_to_world(self, world):
+        """ Sets the block in the given 'minecraft.world.World'. """
+        world.set_block(self.location, self.block_state_id)
+
 
 class MultiBlockChangePacket(Packet):
     @staticmethod
@@ -84,19 +94,131 @@ class MultiBlockChangePacket(Packet):
             UnsignedByte.send(self.y, packet_buffer)
             VarInt.send(self.block_state_id, packet_buffer)
 
+    # When read, the records are decoded into the columns given by 'columns'
+    # rather than into 'Record' objects, which are created only if 'records'
+    # is accessed. After that, or if 'records' is assigned, the list given
+    # by 'records' is used instead of the columns.
+    _records = None
+    _columns = None
+
+    @property
+    def records(self):
+        """ A list of a 'Record' for each block changed. """
+        if self._records is None:
+            self._records = self._decode_records()
+            self._columns = None
+        return self._records
+
+    @records.setter
+    def records(self, records):
+        self._records = records
+        self._columns = None
+
+    def _decode_records(self):
+        xz, y, block_state_ids = self.columns
+        return [self.Record(x=xz[i] >> 4, y=y[i], z=xz[i] & 0xF,
+                            block_state_id=block_state_ids[i])
+                for i in range(len(block_state_ids))]
+
+    @property
+    def columns(self):
+        """A tuple (xz, y, block_state_ids) of arrays giving the fields of
+           the records: each element of 'xz' is '(x << 4) | z'; those of 'y'
+           are the y-coordinates; and those of 'block_state_ids' are the
+           block state IDs. The arrays should not be modified.
+        """
+        if self._columns is not None:
+            return self._columns
+        records = self._records if self._records is not None else ()
+        return (array('B', (r.x << 4 | r.z & 0xF for r in records)),
+                array('B', (r.y for r in records)),
+                array('i', (r.block_state_id for r in records)))
+
+    def apply_to_world(self, world):
+        """ Sets the blocks in the given 'minecraft.world.World'. """
+        xz, y, block_state_ids = self.columns
+        sections = {}
+        for i in range(len(block_state_ids)):
+            section = sections.get(y[i] >> 4)
+            if section is None:
+                section = sections[y[i] >> 4] = world.get_section(
+                    self.chunk_x, y[i] >> 4, self.chunk_z)
+            section.set((y[i] & 0xF) << 8 | (xz[i] & 0xF) << 4 | xz[i] >> 4,
+                        block_state_ids[i])
+
+    def world_positions(self, use_numpy=False):
+        """Returns a tuple (x, y, z) of arrays giving the absolute coordinates
+           of the block of each record, in the same order as 'records', as
+           'array.array' objects, or as 'numpy.ndarray' objects if 'use_numpy'
+           is True.
+        """
+        xz, y, _block_state_ids = self.columns
+        base_x, base_z = self.chunk_x * 16, self.chunk_z * 16
+        if use_numpy:
+            numpy = require_numpy()
+            xz = numpy.frombuffer(xz, numpy.uint8).astype(numpy.int32)
+            return (base_x + (xz >> 4),
+                    numpy.frombuffer(y, numpy.uint8).astype(numpy.int32),
+                    base_z + (xz & 0xF))
+        return (array('i', (base_x + (h >> 4) for h in xz)),
+                array('i', y),
+                array('i', (base_z + (h & 0xF) for h in xz)))
+
     def read(self, file_object):
         self.chunk_x = Integer.read(file_object)
         self.chunk_z = Integer.read(file_object)
         records_count = VarInt.read(file_object)
-        self.records = []
-        for i in range(records_count):
-            record = self.Record()
-            record.read(file_object)
-            self.records.append(record)
+        xz, y, block_state_ids = array('B'), array('B'), array('i')
+        if isinstance(file_object, PacketReader):
+            # Decode the records directly from the packet's data, so that
+            # nothing is allocated per record.
+            if _VIEW_YIELDS_INTS:
+                data, start = file_object.view, file_object.offset
+            else:
+                data = bytearray(file_object.view[file_object.offset:])
+                start = 0
+            offset = start
+            decode = VarInt.decode
+            try:
+                for i in range(records_count):
+                    xz.append(data[offset])
+                    y.append(data[offset + 1])
+                    block_state_id, offset = decode(data, offset + 2)
+                    block_state_ids.append(block_state_id)
+            except IndexError:
+                raise EOFError("Unexpected end of message.")
+            file_object.offset += offset - start
+        else:
+            for i in range(records_count):
+                xz.append(UnsignedByte.read(file_object))
+                y.append(UnsignedByte.read(file_object))
+                block_state_ids.append(VarInt.read(file_object))
+        self._columns = xz, y, block_state_ids
+        self._records = None
 
     def write_fields(self, packet_buffer):
         Integer.send(self.chunk_x, packet_buffer)
         Integer.send(self.chunk_z, packet_buffer)
-        VarInt.send(len(self.records), packet_buffer)
-        for record in self.records:
-            record.write(packet_buffer)
+        if self._records is not None:
+            VarInt.send(len(self._records), packet_buffer)
+            for record in self._records:
+                record.write(packet_buffer)
+        else:
+            xz, y, block_state_ids = self.columns
+            data = bytearray()
+            VarInt.encode_into(len(block_state_ids), data)
+            for i in range(len(block_state_ids)):
+                data.append(xz[i])
+                data.append(y[i])
+                VarInt.encode_into(block_state_ids[i], data)
+            packet_buffer.send(bytes(data))
+
+    def __getstate__(self):
+        # Give the records in the same form, however they are stored.
+        state = super(MultiBlockChangePacket, self).__getstate__()
+        records = state.pop('_records', None)
+        if state.pop('_columns', None) is not None:
+            records = self._decode_records()
+        if records is not None:
+            state['records'] = records
+        return state
@@ -0,0 +1,240 @@
+import struct
+from array import array
+
+from minecraft.networking.packets import Packet
+from minecraft.networking.types import (
+    VarInt, Integer, Boolean, VarIntPrefixedByteArray, TrailingByteArray,
+    MutableRecord
+)
+from minecraft.utility import require_numpy
+
+
+class ChunkDataPacket(Packet):
+    """The sections of a chunk column, in the format used since protocol 107
+       (Minecraft 1.9).
+
+       When read, only the boundaries of the sections are decoded, so that
+       'sections' holds a 'Section' for each section present, whose fields
+       are slices of the packet's data; their blocks are decoded only when
+       'Section.blocks' is called. 'biomes' (if 'full_chunk' is True) and
+       'block_entities_data' (the NBT data of the chunk's block entities, if
+       'block_entity_count' is not None) are likewise slices of the data.
+    """
+    @staticmethod
+    def get_id(context):
+        return 0x22 if context.protocol_version >= 389 else \
+               0x21 if context.protocol_version >= 345 else \
+               0x20 if context.protocol_version >= 332 else \
+               0x21 if context.protocol_version >= 318 else \
+               0x20
+
+    packet_name = 'chunk data'
+
+    class Section(MutableRecord):
+        """A section of 16x16x16 blocks, whose y-coordinate in the chunk is
+           'y', from 0 to 15. The block state ID of each block is given by
+           'palette', a list of block state IDs, and 'data', the index in
+           'palette' of each block, packed into bytes in 'bits_per_block'
+           bits, as described by 'pack_blocks'; or, if 'palette' is None, the
+           block state IDs themselves are packed into 'data'. 'block_light'
+           and 'sky_light' are the light levels of the blocks, in half-bytes,
+           with the latter being None in dimensions without sky light.
+
+           The blocks are in the order given by 'minecraft.world.ChunkSection'.
+        """
+        __slots__ = ('y', 'bits_per_block', 'palette', 'data', 'block_light',
+                     'sky_light')
+
+        def __init__(self, y, bits_per_block, palette, data,
+                     block_light, sky_light=None):
+            self.y = y
+            self.bits_per_block = bits_per_block
+            self.palette = palette
+            self.data = data
+            self.block_light = block_light
+            self.sky_light = sky_light
+
+        def blocks(self, use_numpy=False):
+            """Decodes and returns the palette indices (or block state IDs,
+               if 'palette' is None) of the section's 4096 blocks, as an
+               'array.array', or as a 'numpy.ndarray' if 'use_numpy' is True.
+            """
+            return ChunkDataPacket.unpack_blocks(
+                self.data, self.bits_per_block, use_numpy=use_numpy)
+
+    @staticmethod
+    def unpack_blocks(data, bits, count=4096, use_numpy=False):
+        """Returns the first 'count' integers of 'bits' bits packed into
+           'data' as by 'pack_blocks', as an 'array.array', or as a
+           'numpy.ndarray' if 'use_numpy' is True.
+        """
+        if len(data) * 8 < count * bits:
+            raise ValueError('Too little data for %d values.' % count)
+        if use_numpy:
+            numpy = require_numpy()
+            longs = numpy.frombuffer(data, '>u8').astype('<u8')
+            stream = numpy.unpackbits(longs.view(numpy.uint8),
+                                      bitorder='little')
+            values = stream[:count * bits].reshape(count, bits)
+            return values.dot(1 << numpy.arange(bits)).astype(numpy.uint32)
+
+        longs = iter(struct.unpack('>%dQ' % (len(data) // 8), data))
+        values = array('H' if bits <= 16 else 'L')
+        mask = (1 << bits) - 1
+        value, value_bits = 0, 0
+        for _ in range(count):
+            if value_bits < bits:
+                value |= next(longs) << value_bits
+                value_bits += 64
+            values.append(value & mask)
+            value >>= bits
+            value_bits -= bits
+        return values
+
+    @staticmethod
+    def pack_blocks(values, bits):
+        """Returns the integers 'values', each of 'bits' bits, packed into a
+           sequence of big-endian 64-bit integers, of which the first holds
+           the least significant bits: the first value is held in the least
+           significant 'bits' bits, the next value in the following bits,
+           and so on, with values spanning from one integer to the next.
+        """
+        number = 0
+        for i, value in enumerate(values):
+            number |= value << (i * bits)
+        num_longs = (len(values) * bits + 63) // 64
+        return struct.pack('>%dQ' % num_longs, *(
+            (number >> (64 * i)) & 0xFFFFFFFFFFFFFFFF
+            for i in range(num_longs)))
+
+    def read(self, file_object):
+        self.chunk_x = Integer.read(file_object)
+        self.chunk_z = Integer.read(file_object)
+        self.full_chunk = Boolean.read(file_object)
+        self.primary_bit_mask = VarInt.read(file_object)
+        data = memoryview(VarIntPrefixedByteArray.read_view(file_object))
+        if self.context.protocol_version >= 110:
+            self.block_entity_count = VarInt.read(file_object)
+            self.block_entities_data = TrailingByteArray.read_view(
+                file_object)
+        else:
+            self.block_entity_count = None
+            self.block_entities_data = None
+
+        # Whether the sections include sky light depends on the dimension,
+        # so try both possibilities, and use the one matching the data size.
+        biomes_size = (1024 if self.context.protocol_version >= 345 else
+                       256) if self.full_chunk else 0
+        for sky_light in True, False:
+            try:
+                sections, end = self._read_sections(data, sky_light)
+            except (ValueError, EOFError, IndexError):
+                continue
+            if end + biomes_size == len(data):
+                break
+        else:
+            raise ValueError('Invalid chunk data.')
+        self.sections = sections
+        self.biomes = data[end:] if self.full_chunk else None
+
+    def _read_sections(self, data, sky_light):
+        # Return a list of the sections in 'data', and the offset after them.
+        sections, offset = [], 0
+        for y in range(16):
+            if not self.primary_bit_mask & (1 << y):
+                continue
+            bits_per_block = bytearray(data[offset:offset + 1])[0]
+            offset += 1
+            if bits_per_block <= 8:
+                palette_length, offset = VarInt.decode(data, offset)
+                palette = []
+                for _ in range(palette_length):
+                    block_state_id, offset = VarInt.decode(data, offset)
+                    palette.append(block_state_id)
+            else:
+                palette = None
+                if self.context.protocol_version < 345:
+                    # A palette length of 0 is given for the global palette.
+                    _, offset = VarInt.decode(data, offset)
+            num_longs, offset = VarInt.decode(data, offset)
+            block_data = data[offset:offset + 8 * num_longs]
+            offset += 8 * num_longs
+            block_light = data[offset:offset + 2048]
+            offset += 2048
+            if sky_light:
+                sky_light_data = data[offset:offset + 2048]
+                offset += 2048
+            else:
+                sky_light_data = None
+            if len(block_data) < 8 * num_longs or offset > len(data):
+                raise EOFError("Unexpected end of message.")
+            sections.append(self.Section(y, bits_per_block, palette,
+                                         block_data, block_light,
+                                         sky_light_data))
+        return sections, offset
+
+    def write_fields(self, packet_buffer):
+        Integer.send(self.chunk_x, packet_buffer)
+        Integer.send(self.chunk_z, packet_buffer)
+        Boolean.send(self.full_chunk, packet_buffer)
+        primary_bit_mask = 0
+        data = bytearray()
+        for section in self.sections:
+            primary_bit_mask |= 1 << section.y
+            data.append(section.bits_per_block)
+            if section.palette is not None:
+                VarInt.encode_into(len(section.palette), data)
+                for block_state_id in section.palette:
+                    VarInt.encode_into(block_state_id, data)
+            elif self.context.protocol_version < 345:
+                VarInt.encode_into(0, data)
+            VarInt.encode_into(len(section.data) // 8, data)
+            data += section.data
+            data += section.block_light
+            if section.sky_light is not None:
+                data += section.sky_light
+        if self.full_chunk:
+            data += self.biomes
+        VarInt.send(primary_bit_mask, packet_buffer)
+        VarIntPrefixedByteArray.send(bytes(data), packet_buffer)
+        if self.context.protocol_version >= 110:
+            VarInt.send(self.block_entity_count, packet_buffer)
+            TrailingByteArray.send(bytes(self.block_entities_data),
+                                   packet_buffer)
+
+    def apply_to_world(self, world):
+        """Sets the sections of the chunk in the given 'minecraft.world.World',
+           replacing the whole chunk if 'full_chunk' is True. The blocks are
+           decoded with NumPy if the world's 'use_numpy' is True.
+        """
+        if self.full_chunk:
+            world.unload_chunk(self.chunk_x, self.chunk_z)
+        present = set()
+        for section in self.sections:
+            present.add(section.y)
+            world.set_section(self.chunk_x, section.y, self.chunk_z,
+                              section.palette,
+                              section.blocks(use_numpy=world.use_numpy))
+        if self.full_chunk:
+            for y in range(16):
+                if y not in present:
+                    world.set_section(self.chunk_x, y, self.chunk_z, [0])
+
+
+class UnloadChunkPacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x1F if context.protocol_version >= 389 else \
+               0x1E if context.protocol_version >= 345 else \
+               0x1D if context.protocol_version >= 332 else \
+               0x1E if context.protocol_version >= 318 else \
+               0x1D
+
+    packet_name = 'unload chunk'
+    definition = [
+        {'chunk_x': Integer},
+        {'chunk_z': Integer}]
+
+    def apply_to_world(self, world):
+        """ Discards the chunk in the given 'minecraft.world.World'. """
+        world.unload_chunk(self.chunk_x, self.chunk_z)
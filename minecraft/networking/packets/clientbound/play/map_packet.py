@@ -3,6 +3,7 @@ from minecraft.networking.types import (
     VarInt, Byte, Boolean, UnsignedByte, VarIntPrefixedByteArray, String,
     MutableRecord
 )
+from minecraft.utility import numpy, require_numpy
 
 
 class MapPacket(Packet):
@@ -27,23 +28,49 @@ class MapPacket(Packet):
             self.display_name = display_name
 
     class Map(MutableRecord):
+        """A map, whose 'pixels' are the colour indices of its pixels in rows
+           from north to south, each of which is 'width' pixels from west to
+           east. These are in a 'bytearray', or, if 'use_numpy' is True, in
+           a 'numpy.ndarray' of shape (height, width) and type 'uint8'.
+        """
         __slots__ = ('id', 'scale', 'icons', 'pixels', 'width', 'height',
                      'is_tracking_position')
 
-        def __init__(self, id=None, scale=None, width=128, height=128):
+        def __init__(self, id=None, scale=None, width=128, height=128,
+                     use_numpy=False):
             self.id = id
             self.scale = scale
             self.icons = []
             self.width = width
             self.height = height
-            self.pixels = bytearray(0 for i in range(width*height))
+            if use_numpy:
+                self.pixels = require_numpy().zeros((height, width),
+                                                    numpy.uint8)
+            else:
+                self.pixels = bytearray(width * height)
             self.is_tracking_position = True
 
+        def to_rgb(self):
+            """Returns the colours of the map's pixels, in the same order as
+               'pixels', as the values of the red, green and blue components
+               of each pixel: either in a bytes object, or, if 'pixels' is a
+               'numpy.ndarray', in a 'numpy.ndarray' of shape (height, width,
+               3). Transparent pixels are black.
+            """
+            if numpy is not None and isinstance(self.pixels, numpy.ndarray):
+                return _MAP_PALETTE_ARRAY[self.pixels]
+            pixels = bytes(self.pixels)
+            rgb = bytearray(3 * len(pixels))
+            for component, table in enumerate(_MAP_PALETTE_TABLES):
+                rgb[component::3] = pixels.translate(table)
+            return bytes(rgb)
+
     class MapSet(object):
-        __slots__ = 'maps_by_id'
+        __slots__ = 'maps_by_id', 'use_numpy'
 
-        def __init__(self):
+        def __init__(self, use_numpy=False):
             self.maps_by_id = dict()
+            self.use_numpy = use_numpy  # For the maps created in this set.
 
         def __repr__(self):
             maps = (str(map) for map in self.maps_by_id.values())
@@ -83,7 +110,7 @@ class MapPacket(Packet):
             x = Byte.read(file_object)
             z = Byte.read(file_object)
             self.offset = (x, z)
-            self.pixels = VarIntPrefixedByteArray.read(file_object)
+            self.pixels = VarIntPrefixedByteArray.read_view(file_object)
         else:
             self.height = 0
             self.offset = None
@@ -94,16 +121,33 @@ class MapPacket(Packet):
         map.scale = self.scale
         map.icons[:] = self.icons
         if self.pixels is not None:
-            for i in range(len(self.pixels)):
-                x = self.offset[0] + i % self.width
-                z = self.offset[1] + i // self.width
-                map.pixels[x + map.width * z] = self.pixels[i]
+            self._apply_pixels(map)
         map.is_tracking_position = self.is_tracking_position
 
+    def _apply_pixels(self, map):
+        # Copy the pixels of this packet into the given map, one row at a
+        # time, or all at once if the map's pixels are a 2D numpy array.
+        (x, z), width, pixels = self.offset, self.width, self.pixels
+        height = len(pixels) // width
+        if numpy is not None and isinstance(map.pixels, numpy.ndarray):
+            if len(pixels) == width * height:
+                map.pixels[z:z + height, x:x + width] = numpy.frombuffer(
+                    pixels, numpy.uint8).reshape(height, width)
+                return
+            map_pixels = map.pixels.reshape(-1)
+        else:
+            map_pixels = map.pixels
+        for start in range(0, len(pixels), width):
+            row = pixels[start:start + width]
+            map_start = x + map.width * (z + start // width)
+            if map_start + len(row) > len(map_pixels):
+                raise IndexError('Map pixels out of range.')
+            map_pixels[map_start:map_start + len(row)] = row
+
     def apply_to_map_set(self, map_set):
         map = map_set.maps_by_id.get(self.map_id)
         if map is None:
-            map = MapPacket.Map(self.map_id)
+            map = MapPacket.Map(self.map_id, use_numpy=map_set.use_numpy)
             map_set.maps_by_id[self.map_id] = map
         self.apply_to_map(map)
 
@@ -141,4 +185,45 @@ class MapPacket(Packet):
         return '%sMapPacket(%s)' % (
             ('0x%02X ' % self.id) if self.id is not None else '',
             ', '.join('%s=%r' % (k, v) for (k, v) in self.__dict__.items()
-                      if k not in ('pixels', '_context', 'id', 'definition')))
+                      if k not in ('pixels', '_context', '_variant', 'id',
+                                   'definition')))
+
+
+# The colours of the base colour indices of map pixels, as (red, green, blue)
+# tuples, of which the first represents transparency. A colour index 'i'
+# denotes a shade of the base colour 'i // 4', given by 'MAP_SHADES'.
+MAP_BASE_COLORS = (
+    (0, 0, 0), (127, 178, 56), (247, 233, 163), (199, 199, 199),
+    (255, 0, 0), (160, 160, 255), (167, 167, 167), (0, 124, 0),
+    (255, 255, 255), (164, 168, 184), (151, 109, 77), (112, 112, 112),
+    (64, 64, 255), (143, 119, 72), (255, 252, 245), (216, 127, 51),
+    (178, 76, 216), (102, 153, 216), (229, 229, 51), (127, 204, 25),
+    (242, 127, 165), (76, 76, 76), (153, 153, 153), (76, 127, 153),
+    (127, 63, 178), (51, 76, 178), (102, 76, 51), (102, 127, 51),
+    (153, 51, 51), (25, 25, 25), (250, 238, 77), (92, 219, 213),
+    (74, 128, 255), (0, 217, 58), (129, 86, 49), (112, 2, 0),
+    (209, 177, 161), (159, 82, 36), (149, 87, 108), (112, 108, 138),
+    (186, 133, 36), (103, 117, 53), (160, 77, 78), (57, 41, 35),
+    (135, 107, 98), (87, 92, 92), (122, 73, 88), (76, 62, 92),
+    (76, 50, 35), (76, 82, 42), (142, 60, 46), (37, 22, 16),
+)
+
+# The brightness of each shade of a base colour, out of 255.
+MAP_SHADES = (180, 220, 255, 135)
+
+# The colour of each colour index, with unknown colours shown as black.
+MAP_PALETTE = tuple(
+    tuple(c * MAP_SHADES[i % 4] // 255 for c in MAP_BASE_COLORS[i // 4])
+    if 4 <= i < 4 * len(MAP_BASE_COLORS) else (0, 0, 0)
+    for i in range(256))
+
+# For each colour component, a table for 'bytes.translate' mapping each
+# colour index to the value of that component.
+_MAP_PALETTE_TABLES = tuple(
+    bytes(bytearray(color[component] for color in MAP_PALETTE))
+    for component in range(3))
+
+
+# 'MAP_PALETTE' as a 'numpy.ndarray' of shape (256, 3), if NumPy is available.
+_MAP_PALETTE_ARRAY = None if numpy is None else \
+    numpy.array(MAP_PALETTE, numpy.uint8)
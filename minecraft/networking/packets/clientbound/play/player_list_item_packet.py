@@ -1,3 +1,8 @@
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
 from minecraft.networking.packets import Packet
 
 from minecraft.networking.types import (
@@ -19,14 +24,117 @@ class PlayerListItemPacket(Packet):
     packet_name = "player list item"
 
     class PlayerList(object):
-        __slots__ = 'players_by_uuid'
+        """The players in a server's player list, which may be kept up to
+           date by passing each 'PlayerListItemPacket' received to 'apply'.
+
+           'players' maps the 16-byte form of each player's UUID (as given by
+           'minecraft.networking.types.UUID.to_bytes') to a 'PlayerListItem',
+           and 'players_by_name' maps the name of each player, in lower case,
+           to the same. 'players_by_uuid' is a mapping of the same players,
+           keyed by UUIDs in string form, as in earlier versions; players
+           added to or removed from it are also added to or removed from
+           'players' and 'players_by_name'.
+        """
+        __slots__ = 'players', 'players_by_name', 'listeners'
 
         def __init__(self):
-            self.players_by_uuid = dict()
+            self.players = {}
+            self.players_by_name = {}
+            self.listeners = []
+
+        @property
+        def players_by_uuid(self):
+            return PlayerListItemPacket.PlayersByUUID(self)
+
+        @players_by_uuid.setter
+        def players_by_uuid(self, players):
+            players = dict(players)
+            self.players.clear()
+            self.players_by_name.clear()
+            self.players_by_uuid.update(players)
+
+        def get_player(self, uuid):
+            """Returns the 'PlayerListItem' with the given UUID, in string
+               form, or None if there is no such player (or if 'uuid' is not
+               a valid UUID).
+            """
+            try:
+                return self.players.get(UUID.to_bytes(uuid))
+            except (ValueError, TypeError, AttributeError):
+                return None
+
+        def get_player_by_name(self, name):
+            """Returns the 'PlayerListItem' with the given name, compared
+               case-insensitively, or None if there is no such player.
+            """
+            return self.players_by_name.get(name.lower())
+
+        def register_listener(self, method, *action_types):
+            """Registers 'method' to be called whenever players are changed
+               by actions of one of the given subclasses of 'Action' (or of
+               any action, if none are given). It is called once for each
+               packet applied, with the action type and a list of the
+               'PlayerListItem's that were added, changed or removed.
+            """
+            self.listeners.append((method, action_types))
+
+        def unregister_listener(self, method):
+            """ Removes every listener registered with the given method. """
+            self.listeners = [(m, a) for (m, a) in self.listeners
+                              if m != method]
+
+        def apply_actions(self, action_type, actions):
+            """Applies a sequence of actions, all of the given subclass of
+               'Action', and then notifies any listeners.
+            """
+            players = action_type.apply_all(actions, self)
+            if players:
+                for method, action_types in self.listeners:
+                    if not action_types or action_type in action_types:
+                        method(action_type, players)
+
+    class PlayersByUUID(MutableMapping):
+        # A view of the players of a 'PlayerList', keyed by UUIDs in string
+        # form rather than by their 16-byte form.
+        __slots__ = '_player_list'
+
+        def __init__(self, player_list):
+            self._player_list = player_list
+
+        def __getitem__(self, uuid):
+            try:
+                return self._player_list.players[UUID.to_bytes(uuid)]
+            except (ValueError, TypeError, AttributeError):
+                raise KeyError(uuid)
+
+        def __setitem__(self, uuid, player):
+            uuid_bytes = UUID.to_bytes(uuid)
+            if uuid_bytes in self._player_list.players:
+                del self[uuid]
+            self._player_list.players[uuid_bytes] = player
+            name = getattr(player, 'name', None)
+            if name is not None:
+                self._player_list.players_by_name[name.lower()] = player
+
+        def __delitem__(self, uuid):
+            player = self[uuid]
+            del self._player_list.players[UUID.to_bytes(uuid)]
+            players_by_name = self._player_list.players_by_name
+            name = getattr(player, 'name', None)
+            if name is not None and \
+               players_by_name.get(name.lower()) is player:
+                del players_by_name[name.lower()]
+
+        def __iter__(self):
+            return (UUID.to_string(uuid) for uuid in self._player_list.players)
+
+        def __len__(self):
+            return len(self._player_list.players)
 
     class PlayerListItem(object):
         __slots__ = (
-            'uuid', 'name', 'properties', 'gamemode', 'ping', 'display_name')
+            'uuid', 'uuid_bytes', 'name', 'properties', 'gamemode', 'ping',
+            'display_name')
 
         def __init__(self, **kwds):
             for key, val in kwds.items():
@@ -45,16 +153,37 @@ class PlayerListItemPacket(Packet):
                 self.signature = None
 
     class Action(object):
-        __slots__ = 'uuid'
+        # The UUID of the player is kept in its 16-byte form, and converted to
+        # a string only if 'uuid' is accessed.
+        __slots__ = 'uuid_bytes'
 
         def read(self, file_object):
-            self.uuid = UUID.read(file_object)
+            self.uuid_bytes = UUID.read_bytes(file_object)
             self._read(file_object)
 
         def _read(self, file_object):
             raise NotImplementedError(
                 'This abstract method must be overridden in a subclass.')
 
+        @property
+        def uuid(self):
+            return UUID.to_string(self.uuid_bytes)
+
+        @uuid.setter
+        def uuid(self, uuid):
+            self.uuid_bytes = UUID.to_bytes(uuid)
+
+        def apply(self, player_list):
+            player_list.apply_actions(type(self), (self,))
+
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            """Applies the given actions of this type to the 'PlayerList',
+               returning a list of the players that were changed.
+            """
+            raise NotImplementedError(
+                'This abstract method must be overridden in a subclass.')
+
         @classmethod
         def type_from_id(cls, action_id):
             subcls = {
@@ -88,15 +217,30 @@ class PlayerListItemPacket(Packet):
             else:
                 self.display_name = None
 
-        def apply(self, player_list):
-            player = PlayerListItemPacket.PlayerListItem(
-                uuid=self.uuid,
-                name=self.name,
-                properties=self.properties,
-                gamemode=self.gamemode,
-                ping=self.ping,
-                display_name=self.display_name)
-            player_list.players_by_uuid[self.uuid] = player
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            players = player_list.players
+            players_by_name = player_list.players_by_name
+            added = []
+            for action in actions:
+                old_player = players.get(action.uuid_bytes)
+                if old_player is not None:
+                    name = getattr(old_player, 'name', None)
+                    if name is not None and \
+                       players_by_name.get(name.lower()) is old_player:
+                        del players_by_name[name.lower()]
+                player = PlayerListItemPacket.PlayerListItem(
+                    uuid=action.uuid,
+                    uuid_bytes=action.uuid_bytes,
+                    name=action.name,
+                    properties=action.properties,
+                    gamemode=action.gamemode,
+                    ping=action.ping,
+                    display_name=action.display_name)
+                players[action.uuid_bytes] = player
+                players_by_name[action.name.lower()] = player
+                added.append(player)
+            return added
 
     class UpdateGameModeAction(Action):
         __slots__ = 'gamemode'
@@ -104,10 +248,16 @@ class PlayerListItemPacket(Packet):
         def _read(self, file_object):
             self.gamemode = VarInt.read(file_object)
 
-        def apply(self, player_list):
-            player = player_list.players_by_uuid.get(self.uuid)
-            if player:
-                player.gamemode = self.gamemode
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            players = player_list.players
+            changed = []
+            for action in actions:
+                player = players.get(action.uuid_bytes)
+                if player is not None and player.gamemode != action.gamemode:
+                    player.gamemode = action.gamemode
+                    changed.append(player)
+            return changed
 
     class UpdateLatencyAction(Action):
         __slots__ = 'ping'
@@ -115,10 +265,16 @@ class PlayerListItemPacket(Packet):
         def _read(self, file_object):
             self.ping = VarInt.read(file_object)
 
-        def apply(self, player_list):
-            player = player_list.players_by_uuid.get(self.uuid)
-            if player:
-                player.ping = self.ping
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            players = player_list.players
+            changed = []
+            for action in actions:
+                player = players.get(action.uuid_bytes)
+                if player is not None and player.ping != action.ping:
+                    player.ping = action.ping
+                    changed.append(player)
+            return changed
 
     class UpdateDisplayNameAction(Action):
         __slots__ = 'display_name'
@@ -130,32 +286,53 @@ class PlayerListItemPacket(Packet):
             else:
                 self.display_name = None
 
-        def apply(self, player_list):
-            player = player_list.players_by_uuid.get(self.uuid)
-            if player:
-                player.display_name = self.display_name
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            players = player_list.players
+            changed = []
+            for action in actions:
+                player = players.get(action.uuid_bytes)
+                if player is not None and \
+                   player.display_name != action.display_name:
+                    player.display_name = action.display_name
+                    changed.append(player)
+            return changed
 
     class RemovePlayerAction(Action):
         def _read(self, file_object):
             pass
 
-        def apply(self, player_list):
-            if self.uuid in player_list.players_by_uuid:
-                del player_list.players_by_uuid[self.uuid]
+        @classmethod
+        def apply_all(cls, actions, player_list):
+            players = player_list.players
+            players_by_name = player_list.players_by_name
+            removed = []
+            for action in actions:
+                player = players.pop(action.uuid_bytes, None)
+                if player is not None:
+                    name = getattr(player, 'name', None)
+                    if name is not None and \
+                       players_by_name.get(name.lower()) is player:
+                        del players_by_name[name.lower()]
+                    removed.append(player)
+            return removed
 
     def read(self, file_object):
         action_id = VarInt.read(file_object)
         self.action_type = PlayerListItemPacket.Action.type_from_id(action_id)
         action_count = VarInt.read(file_object)
-        self.actions = []
+        action_type = self.action_type
+        self.actions = actions = []
         for i in range(action_count):
-            action = self.action_type()
+            action = action_type()
             action.read(file_object)
-            self.actions.append(action)
+            actions.append(action)
 
     def apply(self, player_list):
-        for action in self.actions:
-            action.apply(player_list)
+        """Applies this packet's actions to the given 'PlayerList', in a
+           single pass.
+        """
+        player_list.apply_actions(self.action_type, self.actions)
 
     def write_fields(self, packet_buffer):
         raise NotImplementedError
@@ -1,14 +1,109 @@
-from .packet_buffer import PacketBuffer
-from zlib import compress
+from .packet_buffer import FrameBuffer
+from .packet_codec import PacketCodec
+import threading
+from future.utils import with_metaclass
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
 from minecraft.networking.types import (
     VarInt, Enum
 )
 
 
-class Packet(object):
+class PacketVariant(object):
+    """The ID, definition and codec of a packet class in one protocol version,
+       as returned by 'Packet.get_variant', which are shared by all packets
+       of that class and version.
+    """
+    __slots__ = 'id', 'definition', 'codec'
+
+    def __init__(self, id=None, definition=None, codec=None):
+        self.id = id
+        self.definition = definition
+        self.codec = codec
+
+
+class _VariantAttribute(object):
+    # The value of the attribute `name' of a packet's PacketVariant, unless
+    # the attribute has been assigned on the packet itself. Packet classes may
+    # replace this with a class attribute of their own, as when they define a
+    # fixed `id' or `definition'.
+    __slots__ = 'name',
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, packet, packet_class):
+        if packet is None:
+            return None
+        value = packet.__dict__.get(self.name, _MISSING)
+        if value is _MISSING:
+            return getattr(packet._variant, self.name)
+        return value
+
+    def __set__(self, packet, value):
+        packet.__dict__[self.name] = value
+
+    def __delete__(self, packet):
+        del packet.__dict__[self.name]
+
+
+class _PacketType(type):
+    # The metaclass of 'Packet', which gives each packet class that does not
+    # define `__slots' a slot for each field of its definitions (as far as
+    # they can be determined when the class is created), so that the values
+    # of these fields are not kept in the `__dict__' of each packet. Fields
+    # which have the same name as a class attribute, such as a default value
+    # or a property, are excluded.
+    def __new__(mcs, name, bases, namespace):
+        if '__slots__' not in namespace:
+            namespace['__slots__'] = tuple(
+                field for field in _definition_fields(namespace)
+                if field not in namespace and
+                not any(hasattr(base, field) for base in bases))
+        return super(_PacketType, mcs).__new__(mcs, name, bases, namespace)
+
+
+def _definition_fields(namespace):
+    # Return the names of the fields of the definitions given by the class
+    # attribute `definition' or the static method `get_definition' in the
+    # namespace of a packet class, in each supported protocol version.
+    definitions = []
+    if isinstance(namespace.get('definition'), list):
+        definitions.append(namespace['definition'])
+    get_definition = namespace.get('get_definition')
+    if isinstance(get_definition, staticmethod):
+        for protocol_version in SUPPORTED_PROTOCOL_VERSIONS:
+            try:
+                definitions.append(get_definition.__func__(
+                    _VersionContext(protocol_version)))
+            except Exception:
+                # The definition may depend on something not yet defined.
+                break
+    fields = []
+    for definition in definitions:
+        for field in definition or ():
+            for name in field:
+                if name not in fields:
+                    fields.append(name)
+    return fields
+
+
+class _VersionContext(object):
+    # Takes the place of a 'ConnectionContext' (which cannot be imported
+    # here) when calling `get_definition' from '_definition_fields'.
+    __slots__ = 'protocol_version',
+
+    def __init__(self, protocol_version):
+        self.protocol_version = protocol_version
+
+
+class Packet(with_metaclass(_PacketType, object)):
+    # The fields of packets are kept in slots generated by '_PacketType',
+    # with any other attributes in `__dict__'.
+    __slots__ = '_context', '_variant', '__dict__', '__weakref__'
+
     packet_name = "base"
-    id = None
-    definition = None
+    id = _VariantAttribute('id')
+    definition = _VariantAttribute('definition')
 
     # To define the packet ID, either:
     #  1. Define the attribute `id', of type int, in a subclass; or
@@ -32,9 +127,34 @@ class Packet(object):
     def get_definition(cls, context):
         return cls.definition
 
+    # The 'PacketVariant' of this packet class in the protocol version of the
+    # given context, holding the results of `get_id' and `get_definition',
+    # and the 'PacketCodec' compiled from the definition, which is used by
+    # the default implementations of `read' and `write_fields'. It is created
+    # once for each packet class and protocol version, and shared by all
+    # instances, so `get_id' and `get_definition' should depend only on the
+    # protocol version of the given context.
+    @classmethod
+    def get_variant(cls, context):
+        key = (cls, context.protocol_version)
+        variant = _variants.get(key)
+        if variant is None:
+            definition = cls.get_definition(context)
+            variant = _variants.setdefault(key, PacketVariant(
+                id=cls.get_id(context), definition=definition,
+                codec=None if definition is None
+                else PacketCodec(definition)))
+        return variant
+
+    @classmethod
+    def get_codec(cls, context):
+        return cls.get_variant(context).codec
+
     def __init__(self, context=None, **kwargs):
-        self.context = context
-        self.set_values(**kwargs)
+        self._context = context
+        self._context_changed()
+        if kwargs:
+            self.set_values(**kwargs)
 
     @property
     def context(self):
@@ -46,12 +166,31 @@ class Packet(object):
         self._context_changed()
 
     def _context_changed(self):
-        if self._context is not None:
-            self.id = self.get_id(self._context)
-            self.definition = self.get_definition(self._context)
-        else:
-            self.id = None
-            self.definition = None
+        self._variant = _no_variant if self._context is None \
+            else self.get_variant(self._context)
+
+    def _get_codec(self):
+        # Returns the codec for this packet's definition, which is the shared
+        # codec, unless the definition has been assigned on this packet.
+        codec = self._variant.codec
+        if codec is None or 'definition' in self.__dict__:
+            codec = PacketCodec(self.definition)
+        return codec
+
+    def __getstate__(self):
+        # Return a dict of the packet's context, fields and other attributes,
+        # for use by 'pickle' and 'copy'.
+        state = dict(self.__dict__)
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self.context = state.pop('_context', None)
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def set_values(self, **kwargs):
         for key, value in kwargs.items():
@@ -59,52 +198,37 @@ class Packet(object):
         return self
 
     def read(self, file_object):
-        for field in self.definition:
-            for var_name, data_type in field.items():
-                value = data_type.read(file_object)
-                setattr(self, var_name, value)
-
-    # Writes a packet buffer to the socket with the appropriate headers
-    # and compressing the data if necessary
-    def _write_buffer(self, socket, packet_buffer, compression_threshold):
-        # compression_threshold of None means compression is disabled
-        if compression_threshold is not None:
-            if len(packet_buffer.get_writable()) > compression_threshold != -1:
-                # compress the current payload
-                packet_data = packet_buffer.get_writable()
-                compressed_data = compress(packet_data)
-                packet_buffer.reset()
-                # write out the length of the uncompressed payload
-                VarInt.send(len(packet_data), packet_buffer)
-                # write the compressed payload itself
-                packet_buffer.send(compressed_data)
-            else:
-                # write out a 0 to indicate uncompressed data
-                packet_data = packet_buffer.get_writable()
-                packet_buffer.reset()
-                VarInt.send(0, packet_buffer)
-                packet_buffer.send(packet_data)
-
-        VarInt.send(len(packet_buffer.get_writable()), socket)  # Packet Size
-        socket.send(packet_buffer.get_writable())  # Packet Payload
+        self._get_codec().read(self, file_object)
 
-    def write(self, socket, compression_threshold=None):
+    def write(self, socket, compression_threshold=None, compression=None):
         # buffer the data since we need to know the length of each packet's
-        # payload
-        packet_buffer = PacketBuffer()
-        # write packet's id right off the bat in the header
-        VarInt.send(self.id, packet_buffer)
-        # write every individual field
-        self.write_fields(packet_buffer)
-        self._write_buffer(socket, packet_buffer, compression_threshold)
+        # payload, reusing one of this thread's frame buffers if possible
+        frame_buffers = getattr(_frame_buffers, 'free', None)
+        if frame_buffers is None:
+            frame_buffers = _frame_buffers.free = []
+        frame_buffer = frame_buffers.pop() if frame_buffers else FrameBuffer()
+        try:
+            # write packet's id right off the bat in the header
+            VarInt.send(self.id, frame_buffer)
+            # write every individual field
+            self.write_fields(frame_buffer)
+            # write the whole frame, with the appropriate headers and
+            # compressing the data if necessary, leaving this to the socket
+            # if it is a FrameWriter
+            send_frame = getattr(socket, 'send_frame', None)
+            if send_frame is not None:
+                send_frame(frame_buffer, compression_threshold, compression)
+            else:
+                socket.send(frame_buffer.get_frame(compression_threshold,
+                                                   compression))
+        finally:
+            frame_buffer.reset()
+            frame_buffers.append(frame_buffer)
 
     def write_fields(self, packet_buffer):
         # Write the fields comprising the body of the packet (excluding the
         # length, packet ID, compression and encryption) into a PacketBuffer.
-        for field in self.definition:
-            for var_name, data_type in field.items():
-                data = getattr(self, var_name)
-                data_type.send(data, packet_buffer)
+        self._get_codec().write(self, packet_buffer)
 
     def __repr__(self):
         str = type(self).__name__
@@ -128,6 +252,8 @@ class Packet(object):
             of this packet. Override to customise field value representation.
         """
         value = getattr(self, field, None)
+        if isinstance(value, memoryview):
+            value = value.tobytes()
 
         enum_class = self.field_enum(field)
         if enum_class is not None:
@@ -147,3 +273,33 @@ class Packet(object):
             enum_class = getattr(cls, enum_name)
             if isinstance(enum_class, type) and issubclass(enum_class, Enum):
                 return enum_class
+
+
+def _slot_names(cls):
+    # Return the names of the slots of the packet class `cls' that hold its
+    # state, as given by 'Packet.__getstate__'.
+    names = _slot_names_by_class.get(cls)
+    if names is None:
+        names = tuple(name for c in reversed(cls.__mro__)
+                      for name in c.__dict__.get('__slots__', ())
+                      if name not in ('__dict__', '__weakref__', '_variant'))
+        _slot_names_by_class[cls] = names
+    return names
+
+
+# Maps each packet class to the result of '_slot_names'.
+_slot_names_by_class = {}
+
+# Maps (packet class, protocol version) to the PacketVariant returned by
+# 'get_variant'.
+_variants = {}
+
+# The default value of '_VariantAttribute.__get__', meaning that a packet
+# has no value of its own for an attribute.
+_MISSING = object()
+
+# The PacketVariant of packets with no context.
+_no_variant = PacketVariant()
+
+# Holds, for each thread, a list of the unused FrameBuffers used by 'write'.
+_frame_buffers = threading.local()
@@ -1,4 +1,7 @@
 from io import BytesIO
+from zlib import compress
+
+from minecraft.networking.types import VarInt
 
 
 class PacketBuffer(object):
@@ -26,3 +29,129 @@ class PacketBuffer(object):
 
     def get_writable(self):
         return self.bytes.getvalue()
+
+
+class PacketReader(object):
+    """A read-only cursor over the data of a single packet, which may be used
+       in place of a 'PacketBuffer' when reading packets. The data is not
+       copied into the reader; fixed-width values may be decoded in place with
+       'unpack', and 'read_view' returns slices of the data without copying.
+    """
+    __slots__ = 'view', 'offset'
+
+    def __init__(self, data, offset=0):
+        self.view = memoryview(data)
+        self.offset = offset
+
+    def read(self, length=None):
+        """
+        Reads up to 'length' bytes (or all remaining bytes, if 'length' is
+        None) as a new bytes object, designed to emulate file.read.
+        """
+        return self.read_view(length).tobytes()
+
+    def recv(self, length=None):
+        return self.read(length)
+
+    def read_view(self, length=None):
+        """
+        As 'read', but returns a memoryview of the underlying data rather than
+        a copy. The view remains valid after the reader is discarded.
+        """
+        start = self.offset
+        if length is None:
+            self.offset = len(self.view)
+        else:
+            self.offset = min(start + length, len(self.view))
+        return self.view[start:self.offset]
+
+    def unpack(self, struct):
+        """
+        Decodes and consumes the values of the given 'struct.Struct' at the
+        current position, returning them as a tuple.
+        """
+        values = struct.unpack_from(self.view, self.offset)
+        self.offset += struct.size
+        return values
+
+    @property
+    def remaining(self):
+        """ The number of bytes that have not yet been read. """
+        return len(self.view) - self.offset
+
+
+class FrameBuffer(object):
+    """A reusable, growable buffer into which a packet is written as a complete
+       frame, ready to be sent as a single contiguous block. Space is reserved
+       at the start of the buffer for the frame's headers (the packet length
+       and, if compression is enabled, the uncompressed data length), which
+       are filled in after the body has been written, so that the body never
+       needs to be copied to prepend them.
+    """
+    __slots__ = 'data'
+
+    # The space reserved for the headers, which are two VarInts of at most 5
+    # bytes each.
+    HEADER_SPACE = 10
+
+    def __init__(self):
+        self.data = bytearray(self.HEADER_SPACE)
+
+    def send(self, value):
+        """
+        Appends the given bytes to the body of the frame, designed to emulate
+        socket.send
+        :param value: The bytes to write
+        """
+        self.data += value
+
+    def get_writable(self):
+        """ Returns a copy of the body of the frame written so far. """
+        return bytes(self.data[self.HEADER_SPACE:])
+
+    @property
+    def body_size(self):
+        """ The length of the body of the frame written so far. """
+        return len(self.data) - self.HEADER_SPACE
+
+    def reset(self):
+        """ Discards the frame, so that the buffer may be reused. """
+        try:
+            del self.data[self.HEADER_SPACE:]
+        except BufferError:
+            # A view of the previous frame is still in use.
+            self.data = bytearray(self.HEADER_SPACE)
+
+    def get_frame(self, compression_threshold=None, compression=None):
+        """
+        Completes the frame, compressing its body if necessary, and returns a
+        memoryview of it, which is valid until the buffer is reset.
+        :param compression_threshold: As for 'Packet.write'.
+        :param compression: The 'minecraft.networking.compression.Compression'
+                            settings to compress with, or None for the
+                            defaults.
+        """
+        data, start = self.data, self.HEADER_SPACE
+
+        # compression_threshold of None means compression is disabled
+        if compression_threshold is not None:
+            data_length = len(data) - start
+            if data_length > compression_threshold != -1 and \
+               (compression is None or compression.enabled):
+                body = memoryview(data)[start:]
+                compressed_data = compress(body) if compression is None \
+                    else compression.compress(body)
+                del body
+                del data[start:]
+                data += compressed_data
+            else:
+                # a data length of 0 indicates uncompressed data
+                data_length = 0
+            header = VarInt.encode(data_length)
+            start -= len(header)
+            data[start:start + len(header)] = header
+
+        header = VarInt.encode(len(data) - start)
+        start -= len(header)
+        data[start:start + len(header)] = header
+        return memoryview(data)[start:]
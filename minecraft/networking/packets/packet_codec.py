@@ -0,0 +1,125 @@
+import struct
+from operator import attrgetter
+
+from .packet_buffer import PacketReader
+
+
+class PacketCodec(object):
+    """A reader and writer for the fields of a packet, compiled once from a
+       packet definition (see 'Packet.get_definition'), so that reading and
+       writing a packet does not require the definition to be interpreted
+       field by field.
+
+       Each run of consecutive fields whose types have a 'struct_format' is
+       merged into a single precompiled 'struct.Struct', which is read or
+       written with one call; every other field is read or written by its
+       type, as usual. When reading from a 'PacketReader', the merged runs
+       are decoded in place, without reading them into intermediate bytes.
+    """
+    __slots__ = 'definition', 'steps', 'read', 'write'
+
+    def __init__(self, definition):
+        self.definition = definition
+
+        # A list of tuples (names, data_type), where 'names' is a tuple of
+        # field names and 'data_type' is either a 'struct.Struct' (if there
+        # are any number of fixed-width fields) or a 'Type' (if there is
+        # exactly one field of some other type).
+        self.steps = []
+        run_names, run_format = [], ''
+        for field in definition:
+            for name, data_type in field.items():
+                if data_type.struct_format is not None:
+                    run_names.append(name)
+                    run_format += data_type.struct_format
+                    continue
+                if run_names:
+                    self.steps.append((tuple(run_names),
+                                       struct.Struct('>' + run_format)))
+                    run_names, run_format = [], ''
+                self.steps.append(((name,), data_type))
+        if run_names:
+            self.steps.append((tuple(run_names),
+                               struct.Struct('>' + run_format)))
+
+        # read(packet, file_object) reads the fields of 'packet' from
+        # 'file_object', as in 'Packet.read'; and write(packet, packet_buffer)
+        # writes them to 'packet_buffer', as in 'Packet.write_fields'.
+        read_file = self._sequence(
+            [self._step_reader(*step) for step in self.steps])
+        read_reader = self._sequence(
+            [self._step_reader(*step, in_place=True) for step in self.steps])
+
+        def read(packet, file_object):
+            if isinstance(file_object, PacketReader):
+                read_reader(packet, file_object)
+            else:
+                read_file(packet, file_object)
+        self.read = read
+        self.write = self._sequence(
+            [self._step_writer(*step) for step in self.steps])
+
+    @property
+    def struct_formats(self):
+        """ The format strings of the merged 'struct.Struct' runs, in order.
+        """
+        return [data_type.format for (_names, data_type) in self.steps
+                if isinstance(data_type, struct.Struct)]
+
+    @staticmethod
+    def _step_reader(names, data_type, in_place=False):
+        if isinstance(data_type, struct.Struct) and in_place:
+            if len(names) == 1:
+                name = names[0]
+
+                def read_step(packet, reader):
+                    setattr(packet, name, reader.unpack(data_type)[0])
+            else:
+                def read_step(packet, reader):
+                    for name, value in zip(names, reader.unpack(data_type)):
+                        setattr(packet, name, value)
+        elif isinstance(data_type, struct.Struct):
+            unpack, size = data_type.unpack, data_type.size
+            if len(names) == 1:
+                name = names[0]
+
+                def read_step(packet, file_object):
+                    setattr(packet, name, unpack(file_object.read(size))[0])
+            else:
+                def read_step(packet, file_object):
+                    values = unpack(file_object.read(size))
+                    for name, value in zip(names, values):
+                        setattr(packet, name, value)
+        else:
+            name, read = names[0], data_type.read
+
+            def read_step(packet, file_object):
+                setattr(packet, name, read(file_object))
+        return read_step
+
+    @staticmethod
+    def _step_writer(names, data_type):
+        if isinstance(data_type, struct.Struct):
+            pack, get_values = data_type.pack, attrgetter(*names)
+            if len(names) == 1:
+                def write_step(packet, packet_buffer):
+                    packet_buffer.send(pack(get_values(packet)))
+            else:
+                def write_step(packet, packet_buffer):
+                    packet_buffer.send(pack(*get_values(packet)))
+        else:
+            name, send = names[0], data_type.send
+
+            def write_step(packet, packet_buffer):
+                send(getattr(packet, name), packet_buffer)
+        return write_step
+
+    @staticmethod
+    def _sequence(steps):
+        if len(steps) == 1:
+            return steps[0]
+
+        def run_steps(packet, stream):
+            for step in steps:
+                step(packet, stream)
+        return run_steps
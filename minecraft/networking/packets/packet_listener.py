@@ -9,6 +9,13 @@ class PacketListener(object):
             if issubclass(arg, Packet):
                 self.packets_to_listen.append(arg)
 
+    def listens_to(self, packet_type):
+        """ Returns True if this listener applies to packets of the given type,
+            i.e. if 'call_packet' would call it with instances of that type.
+        """
+        return any(issubclass(packet_type, listened_type)
+                   for listened_type in self.packets_to_listen)
+
     def call_packet(self, packet):
         for packet_type in self.packets_to_listen:
             if isinstance(packet, packet_type):
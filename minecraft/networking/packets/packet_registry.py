@@ -0,0 +1,36 @@
+"""
+Contains 'get_packet_table', which maps the packet IDs of a protocol state,
+direction and version to the packet classes, computing the IDs of the packet
+classes only once for each protocol version.
+"""
+
+
+def get_packet_table(get_packets, context):
+    """Returns a tuple whose element at each packet ID is the class of that
+       packet in the protocol state and direction given by 'get_packets' (for
+       example, 'clientbound.play.get_packets'), in the protocol version of
+       the 'ConnectionContext' 'context'. Elements at unused IDs are None.
+
+       The table is computed when it is first requested, and is afterwards
+       shared by all callers requesting the same 'get_packets' and protocol
+       version, so 'get_packets' and the 'get_id' methods of the packet
+       classes should depend only on the protocol version of the context.
+    """
+    key = (get_packets, context.protocol_version)
+    table = _packet_tables.get(key)
+    if table is None:
+        packets_by_id = {}
+        for packet in get_packets(context):
+            packet_id = packet.get_id(context)
+            if packet_id is not None:
+                packets_by_id[packet_id] = packet
+        table = [None] * (max(packets_by_id) + 1 if packets_by_id else 0)
+        for packet_id, packet in packets_by_id.items():
+            table[packet_id] = packet
+        table = _packet_tables.setdefault(key, tuple(table))
+    return table
+
+
+# Maps (get_packets, protocol version) to the table returned by
+# 'get_packet_table'.
+_packet_tables = {}
@@ -3,16 +3,22 @@ Each type has a method which is used to read and write it.
 These definitions and methods are used by the packet definitions
 """
 from __future__ import division
+import binascii
 import struct
 import uuid
 
 from .utility import Vector
 
 
+# Indexing a memoryview gives integers in Python 3, but strings in Python 2.
+_VIEW_YIELDS_INTS = isinstance(memoryview(b'\x00')[0], int)
+
+
 __all__ = (
     'Type', 'Boolean', 'UnsignedByte', 'Byte', 'Short', 'UnsignedShort',
-    'Integer', 'FixedPointInteger', 'VarInt', 'Long', 'UnsignedLong', 'Float',
-    'Double', 'ShortPrefixedByteArray', 'VarIntPrefixedByteArray',
+    'Integer', 'FixedPointInteger', 'VarInt', 'VarLong', 'Long',
+    'UnsignedLong', 'Float', 'Double', 'ShortPrefixedByteArray',
+    'VarIntPrefixedByteArray',
     'TrailingByteArray', 'String', 'UUID', 'Position',
 )
 
@@ -20,6 +26,13 @@ __all__ = (
 class Type(object):
     __slots__ = ()
 
+    # For types whose network representation is a single fixed-width value
+    # decoded directly by the 'struct' module, this is the format character
+    # of that value (without a byte order prefix); otherwise, it is None.
+    # Runs of such fields in a packet definition are merged into a single
+    # 'struct.Struct' by 'minecraft.networking.packets.PacketCodec'.
+    struct_format = None
+
     @staticmethod
     def read(file_object):
         raise NotImplementedError("Base data type not serializable")
@@ -30,6 +43,8 @@ class Type(object):
 
 
 class Boolean(Type):
+    struct_format = '?'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('?', file_object.read(1))[0]
@@ -40,6 +55,8 @@ class Boolean(Type):
 
 
 class UnsignedByte(Type):
+    struct_format = 'B'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>B', file_object.read(1))[0]
@@ -50,6 +67,8 @@ class UnsignedByte(Type):
 
 
 class Byte(Type):
+    struct_format = 'b'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>b', file_object.read(1))[0]
@@ -60,6 +79,8 @@ class Byte(Type):
 
 
 class Short(Type):
+    struct_format = 'h'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>h', file_object.read(2))[0]
@@ -70,6 +91,8 @@ class Short(Type):
 
 
 class UnsignedShort(Type):
+    struct_format = 'H'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>H', file_object.read(2))[0]
@@ -80,6 +103,8 @@ class UnsignedShort(Type):
 
 
 class Integer(Type):
+    struct_format = 'i'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>i', file_object.read(4))[0]
@@ -100,48 +125,168 @@ class FixedPointInteger(Type):
 
 
 class VarInt(Type):
-    @staticmethod
-    def read(file_object):
-        number = 0
-        # Limit of 5 bytes, otherwise its possible to cause
-        # a DOS attack by sending VarInts that just keep
-        # going
-        bytes_encountered = 0
-        while True:
+    """A signed integer of the given number of bits, in the variable-length
+       format used by Minecraft, in which each byte holds 7 bits of the
+       integer's two's complement representation, from least to most
+       significant, and the high bit of every byte but the last is set.
+
+       Besides 'read' and 'send', this class provides 'decode', which reads
+       a value directly from a bytes-like object at a given offset, and
+       'encode_into', which appends a value to a 'bytearray'.
+    """
+    bits = 32
+    max_bytes = 5
+
+    @classmethod
+    def read(cls, file_object):
+        view = getattr(file_object, 'view', None)
+        if view is not None and _VIEW_YIELDS_INTS:
+            # 'file_object' is a 'PacketReader': decode the value in place.
+            offset = file_object.offset
+            try:
+                byte = view[offset]
+            except IndexError:
+                raise EOFError("Unexpected end of message.")
+            if byte < 0x80:
+                file_object.offset = offset + 1
+                return byte
+            value, file_object.offset = cls.decode(view, offset)
+            return value
+
+        byte = file_object.read(1)
+        if len(byte) < 1:
+            raise EOFError("Unexpected end of message.")
+        byte = ord(byte)
+        if byte < 0x80:
+            return byte
+        number = byte & 0x7F
+        for shift in range(7, 7 * cls.max_bytes, 7):
             byte = file_object.read(1)
             if len(byte) < 1:
                 raise EOFError("Unexpected end of message.")
-
             byte = ord(byte)
-            number |= (byte & 0x7F) << 7 * bytes_encountered
-            if not byte & 0x80:
-                break
-
-            bytes_encountered += 1
-            if bytes_encountered > 5:
-                raise ValueError("Tried to read too long of a VarInt")
+            number |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return cls._signed(number) if number >> (cls.bits - 1) \
+                    else number
+        # Limit the number of bytes, as otherwise it would be possible
+        # to cause a DOS attack by sending VarInts that just keep going.
+        raise ValueError("Tried to read too long of a %s" % cls.__name__)
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        """Reads a value from the bytes-like object 'data' at 'offset',
+           returning a tuple (value, offset), where the latter is the offset
+           of the first byte after the value.
+        """
+        if not _VIEW_YIELDS_INTS:
+            # Copying the bytes into a bytearray yields integers when indexed.
+            value, size = cls.decode(
+                bytearray(data[offset:offset + cls.max_bytes]))
+            return value, offset + size
+        try:
+            byte = data[offset]
+            if byte < 0x80:
+                return byte, offset + 1
+            number = byte & 0x7F
+            shift = 7
+            for offset in range(offset + 1, offset + cls.max_bytes):
+                byte = data[offset]
+                number |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    if number >> (cls.bits - 1):
+                        number = cls._signed(number)
+                    return number, offset + 1
+                shift += 7
+        except IndexError:
+            raise EOFError("Unexpected end of message.")
+        raise ValueError("Tried to read too long of a %s" % cls.__name__)
+
+    @classmethod
+    def _signed(cls, number):
+        # Returns the value of the two's complement representation 'number',
+        # discarding any excess bits, as the official server does.
+        number &= (1 << cls.bits) - 1
+        if number >> (cls.bits - 1):
+            number -= 1 << cls.bits
         return number
 
-    @staticmethod
-    def send(value, socket):
-        out = bytes()
-        while True:
-            byte = value & 0x7F
+    @classmethod
+    def send(cls, value, socket):
+        socket.send(cls.encode(value))
+
+    @classmethod
+    def encode(cls, value):
+        """ Returns the network representation of 'value' as a bytes object.
+        """
+        if 0 <= value < 0x4000:
+            return _VARINT_ENCODINGS[value]
+        if value < 0 or value >> cls.bits:
+            value = cls._unsigned(value)
+        data = bytearray()
+        while value >> 7:
+            data.append(value & 0x7F | 0x80)
             value >>= 7
-            out += struct.pack("B", byte | (0x80 if value > 0 else 0))
-            if value == 0:
-                break
-        socket.send(out)
-
-    @staticmethod
-    def size(value):
-        for max_value, size in VARINT_SIZE_TABLE.items():
-            if value < max_value:
-                return size
-        raise ValueError("Integer too large")
-
-
-# Maps (maximum integer value -> size of VarInt in bytes)
+        data.append(value)
+        return bytes(data)
+
+    @classmethod
+    def encode_into(cls, value, buffer):
+        """Appends the network representation of 'value' to the 'bytearray'
+           'buffer', returning the number of bytes appended.
+        """
+        if 0 <= value < 0x4000:
+            data = _VARINT_ENCODINGS[value]
+            buffer += data
+            return len(data)
+        if value < 0 or value >> cls.bits:
+            value = cls._unsigned(value)
+        start = len(buffer)
+        while value >> 7:
+            buffer.append(value & 0x7F | 0x80)
+            value >>= 7
+        buffer.append(value)
+        return len(buffer) - start
+
+    @classmethod
+    def size(cls, value):
+        """ The number of bytes in the network representation of 'value'. """
+        if value < 0x80:
+            if value >= 0:
+                return 1
+            value = cls._unsigned(value)
+        elif value >> cls.bits:
+            raise ValueError("Integer too large")
+        return (value.bit_length() + 6) // 7
+
+    @classmethod
+    def _unsigned(cls, value):
+        # Returns the two's complement representation of 'value', which may be
+        # any signed or unsigned integer of the given number of bits.
+        if value < 0:
+            if value < -(1 << (cls.bits - 1)):
+                raise ValueError("Integer too small")
+            return value + (1 << cls.bits)
+        if value >> cls.bits:
+            raise ValueError("Integer too large")
+        return value
+
+
+class VarLong(VarInt):
+    """ A 64-bit signed integer, in the same format as 'VarInt'. """
+    bits = 64
+    max_bytes = 10
+
+
+# The network representations of the integers which take at most two bytes,
+# those below 0x4000.
+_VARINT_ENCODINGS = tuple(
+    bytes(bytearray([i])) if i < 0x80 else bytes(bytearray([i & 0x7F | 0x80,
+                                                            i >> 7]))
+    for i in range(1 << 14))
+
+# Maps (maximum integer value -> size of VarInt in bytes). This is no longer
+# used by 'VarInt.size', and is retained for backward compatibility.
 VARINT_SIZE_TABLE = {
     2 ** 7: 1,
     2 ** 14: 2,
@@ -159,6 +304,8 @@ VARINT_SIZE_TABLE = {
 
 
 class Long(Type):
+    struct_format = 'q'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>q', file_object.read(8))[0]
@@ -169,6 +316,8 @@ class Long(Type):
 
 
 class UnsignedLong(Type):
+    struct_format = 'Q'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>Q', file_object.read(8))[0]
@@ -179,6 +328,8 @@ class UnsignedLong(Type):
 
 
 class Float(Type):
+    struct_format = 'f'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>f', file_object.read(4))[0]
@@ -189,6 +340,8 @@ class Float(Type):
 
 
 class Double(Type):
+    struct_format = 'd'
+
     @staticmethod
     def read(file_object):
         return struct.unpack('>d', file_object.read(8))[0]
@@ -198,12 +351,29 @@ class Double(Type):
         socket.send(struct.pack('>d', value))
 
 
+# For the byte array types, 'read_view' is as 'read', except that if the data
+# is read from a 'PacketReader', the result is a memoryview of the packet's
+# data rather than a copy.
+def _read_view(file_object, length):
+    read_view = getattr(file_object, 'read_view', None)
+    if read_view is not None:
+        return read_view(length)
+    elif length is None:
+        return file_object.read()
+    else:
+        return file_object.read(length)
+
+
 class ShortPrefixedByteArray(Type):
     @staticmethod
     def read(file_object):
         length = Short.read(file_object)
         return struct.unpack(str(length) + "s", file_object.read(length))[0]
 
+    @staticmethod
+    def read_view(file_object):
+        return _read_view(file_object, Short.read(file_object))
+
     @staticmethod
     def send(value, socket):
         Short.send(len(value), socket)
@@ -216,6 +386,10 @@ class VarIntPrefixedByteArray(Type):
         length = VarInt.read(file_object)
         return struct.unpack(str(length) + "s", file_object.read(length))[0]
 
+    @staticmethod
+    def read_view(file_object):
+        return _read_view(file_object, VarInt.read(file_object))
+
     @staticmethod
     def send(value, socket):
         VarInt.send(len(value), socket)
@@ -230,6 +404,10 @@ class TrailingByteArray(Type):
     def read(file_object):
         return file_object.read()
 
+    @staticmethod
+    def read_view(file_object):
+        return _read_view(file_object, None)
+
     @staticmethod
     def send(value, socket):
         socket.send(value)
@@ -249,9 +427,31 @@ class String(Type):
 
 
 class UUID(Type):
+    """UUIDs, which are represented in Python as strings in the standard
+       hyphenated hexadecimal form, or, by 'read_bytes' and 'to_string', as
+       their 16-byte big-endian network representation.
+    """
     @staticmethod
     def read(file_object):
-        return str(uuid.UUID(bytes=file_object.read(16)))
+        return UUID.to_string(UUID.read_bytes(file_object))
+
+    @staticmethod
+    def read_bytes(file_object):
+        data = file_object.read(16)
+        if len(data) != 16:
+            raise EOFError("Unexpected end of message.")
+        return bytes(data)
+
+    @staticmethod
+    def to_string(data):
+        """ Converts the 16 bytes 'data' to the string form of a UUID. """
+        h = binascii.hexlify(data).decode('ascii')
+        return '%s-%s-%s-%s-%s' % (h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+
+    @staticmethod
+    def to_bytes(value):
+        """ Converts a UUID in string form to its 16-byte representation. """
+        return uuid.UUID(value).bytes
 
     @staticmethod
     def send(value, socket):
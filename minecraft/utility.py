@@ -0,0 +1,21 @@
+"""
+Contains helpers shared by several of pyCraft's modules, such as the optional
+use of NumPy.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = 'numpy', 'require_numpy'
+
+
+def require_numpy():
+    """Returns the 'numpy' module, for use when 'use_numpy=True' is given,
+       raising 'ImportError' if NumPy is not installed.
+    """
+    if numpy is None:
+        raise ImportError('use_numpy=True requires NumPy.')
+    return numpy
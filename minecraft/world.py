@@ -0,0 +1,252 @@
+"""
+Contains 'World', a store of the blocks of the chunks known to a client, which
+may be kept up to date with the packets received by a 'Connection'.
+"""
+from array import array
+import heapq
+import math
+
+from .networking.packets import clientbound
+from .utility import numpy, require_numpy
+
+
+__all__ = 'World', 'Chunk', 'ChunkSection'
+
+
+class ChunkSection(object):
+    """The blocks of a 16x16x16 section of a chunk, as block state IDs, of
+       which 'palette' is a list of those occurring in the section.
+
+       If the section holds a single block state, 'blocks' is None and the
+       state is the first element of 'palette'. Otherwise, 'blocks' is an
+       array of the index in 'palette' of each block, in the order given by
+       'index'; its elements are bytes while 'palette' has at most 256
+       elements, and otherwise 16-bit integers.
+
+       Block state IDs may be None, meaning that a block is unknown.
+    """
+    __slots__ = 'palette', 'palette_indices', 'blocks'
+
+    def __init__(self, block_state_id=0):
+        self.palette = [block_state_id]
+        self.palette_indices = {block_state_id: 0}
+        self.blocks = None
+
+    @classmethod
+    def from_blocks(cls, palette, blocks=None):
+        """Returns a section with the given 'palette', a list of block state
+           IDs, and 'blocks', an iterable of the index in 'palette' of each
+           block, in the order given by 'index', which may be None if the
+           palette has one element. If 'palette' is None, 'blocks' instead
+           gives the block state ID of each block. 'blocks' may also be a
+           'numpy.ndarray', which is converted without iterating over it.
+        """
+        if numpy is not None and isinstance(blocks, numpy.ndarray):
+            if palette is None:
+                palette, blocks = numpy.unique(blocks, return_inverse=True)
+                palette = palette.tolist()
+            # The array is given as bytes of the type of 'blocks' below.
+            blocks = blocks.astype(numpy.uint8 if len(palette) <= 256
+                                   else numpy.uint16).tobytes()
+        elif palette is None:
+            blocks = list(blocks)
+            palette = sorted(set(blocks))
+            indices = {block_state_id: i
+                       for i, block_state_id in enumerate(palette)}
+            blocks = [indices[block_state_id] for block_state_id in blocks]
+        section = cls(palette[0])
+        section.palette = list(palette)
+        section.palette_indices = {
+            block_state_id: i for i, block_state_id
+            in reversed(list(enumerate(palette)))}
+        if len(palette) > 1:
+            section.blocks = array('B' if len(palette) <= 256 else 'H',
+                                   blocks)
+            if len(section.blocks) != 4096:
+                raise ValueError('A section must have 4096 blocks.')
+        return section
+
+    @staticmethod
+    def index(x, y, z):
+        """The index of the block at the given coordinates, relative to the
+           section, each of which is from 0 to 15.
+        """
+        return (y << 8) | (z << 4) | x
+
+    def get(self, index):
+        """ The block state ID of the block with the given index. """
+        blocks = self.blocks
+        return self.palette[0 if blocks is None else blocks[index]]
+
+    def set(self, index, block_state_id):
+        """ Sets the block state ID of the block with the given index. """
+        palette_index = self.palette_indices.get(block_state_id)
+        if palette_index is None:
+            palette_index = len(self.palette)
+            self.palette.append(block_state_id)
+            self.palette_indices[block_state_id] = palette_index
+            if palette_index == 256:
+                self.blocks = array('H', self.blocks)
+        if self.blocks is None:
+            if palette_index == 0:
+                return
+            self.blocks = array('B', bytes(bytearray(4096)))
+        self.blocks[index] = palette_index
+
+
+class Chunk(object):
+    """The sections of the chunk column at the given chunk coordinates, from
+       bottom to top, each of which is a 'ChunkSection', or None if the
+       section's blocks are unknown.
+    """
+    __slots__ = 'x', 'z', 'sections'
+
+    # The number of sections in each chunk.
+    height = 16
+
+    def __init__(self, x, z):
+        self.x = x
+        self.z = z
+        self.sections = [None] * self.height
+
+
+class World(object):
+    """The blocks of the chunks known to a client, kept in 'chunks', a dict
+       mapping chunk coordinates (x, z) to a 'Chunk'.
+
+       The blocks may be updated with the packets received by a 'Connection'
+       by calling 'register'. If 'max_chunks' is not None, whenever there are
+       more than 'max_chunks' chunks, those furthest from the chunk given by
+       'center', a pair of chunk coordinates, are discarded, along with enough
+       others that this happens at most once for every 'max_chunks // 8'
+       chunks added. While registered, 'center' follows the player's position.
+
+       If 'use_numpy' is True, the blocks of the chunks received are decoded
+       with NumPy; by default, this is done if NumPy is installed.
+    """
+    def __init__(self, max_chunks=None, use_numpy=None):
+        self.chunks = {}
+        self.max_chunks = max_chunks
+        if use_numpy:
+            require_numpy()
+        self.use_numpy = numpy is not None if use_numpy is None \
+            else use_numpy
+        self.center = (0, 0)
+        # The player's absolute (x, z) position, to which relative positions
+        # received from the server are added.
+        self._position = (0.0, 0.0)
+
+    def register(self, connection):
+        """Registers packet listeners with the given 'Connection' to update
+           this world with the chunks and block changes that it receives, to
+           move 'center' with the player, and to clear the world when a new
+           game is joined or the player respawns. They may be removed by
+           calling 'unregister'.
+        """
+        connection.register_packet_listener(
+            self._apply_packet,
+            clientbound.play.BlockChangePacket,
+            clientbound.play.MultiBlockChangePacket,
+            clientbound.play.ChunkDataPacket,
+            clientbound.play.UnloadChunkPacket)
+        connection.register_packet_listener(
+            self._move_center, clientbound.play.PlayerPositionAndLookPacket)
+        connection.register_packet_listener(
+            self._clear_on_packet,
+            clientbound.play.JoinGamePacket,
+            clientbound.play.RespawnPacket)
+
+    def unregister(self, connection):
+        """ Removes the packet listeners added by 'register(connection)'. """
+        connection.unregister_packet_listener(self._apply_packet)
+        connection.unregister_packet_listener(self._move_center)
+        connection.unregister_packet_listener(self._clear_on_packet)
+
+    def _apply_packet(self, packet):
+        packet.apply_to_world(self)
+
+    def _move_center(self, packet):
+        x, z = self._position
+        x = x + packet.x if packet.flags & packet.FLAG_REL_X else packet.x
+        z = z + packet.z if packet.flags & packet.FLAG_REL_Z else packet.z
+        self._position = (x, z)
+        self.center = (int(math.floor(x)) >> 4, int(math.floor(z)) >> 4)
+
+    def _clear_on_packet(self, packet):
+        self.clear()
+
+    def clear(self):
+        """ Discards all chunks. """
+        self.chunks = {}
+
+    def get_block(self, position):
+        """Returns the block state ID of the block at the given position, a
+           'Vector' or tuple of absolute coordinates, or None if the block is
+           unknown.
+        """
+        x, y, z = position
+        chunk = self.chunks.get((x >> 4, z >> 4))
+        if chunk is None or not 0 <= y >> 4 < chunk.height:
+            return None
+        section = chunk.sections[y >> 4]
+        if section is None:
+            return None
+        return section.get((y & 0xF) << 8 | (z & 0xF) << 4 | x & 0xF)
+
+    def set_block(self, position, block_state_id):
+        """Sets the block state ID of the block at the given position, a
+           'Vector' or tuple of absolute coordinates, adding its chunk and
+           section if necessary (with the other blocks being unknown).
+        """
+        x, y, z = position
+        self.get_section(x >> 4, y >> 4, z >> 4).set(
+            (y & 0xF) << 8 | (z & 0xF) << 4 | x & 0xF, block_state_id)
+
+    def get_chunk(self, chunk_x, chunk_z):
+        """Returns the 'Chunk' at the given chunk coordinates, adding it if
+           necessary (with all of its blocks being unknown).
+        """
+        chunk = self.chunks.get((chunk_x, chunk_z))
+        if chunk is None:
+            chunk = self.chunks[chunk_x, chunk_z] = Chunk(chunk_x, chunk_z)
+            if self.max_chunks is not None and \
+               len(self.chunks) > self.max_chunks:
+                self._evict(chunk)
+        return chunk
+
+    def get_section(self, chunk_x, section_y, chunk_z):
+        """Returns the 'ChunkSection' at the given section coordinates,
+           adding it and its chunk if necessary (with all of its blocks being
+           unknown).
+        """
+        chunk = self.get_chunk(chunk_x, chunk_z)
+        if not 0 <= section_y < chunk.height:
+            raise IndexError('Section %d is out of range.' % section_y)
+        section = chunk.sections[section_y]
+        if section is None:
+            section = chunk.sections[section_y] = ChunkSection(None)
+        return section
+
+    def set_section(self, chunk_x, section_y, chunk_z, palette, blocks=None):
+        """Replaces the section at the given section coordinates, adding its
+           chunk if necessary, with one given by 'palette' and 'blocks' as in
+           'ChunkSection.from_blocks'.
+        """
+        chunk = self.get_chunk(chunk_x, chunk_z)
+        if not 0 <= section_y < chunk.height:
+            raise IndexError('Section %d is out of range.' % section_y)
+        chunk.sections[section_y] = ChunkSection.from_blocks(palette, blocks)
+
+    def unload_chunk(self, chunk_x, chunk_z):
+        """ Discards the chunk at the given chunk coordinates, if known. """
+        self.chunks.pop((chunk_x, chunk_z), None)
+
+    def _evict(self, keep):
+        # Discard the chunks furthest from 'center', other than 'keep', so
+        # that 'max_chunks // 8' more may be added before evicting again.
+        center_x, center_z = self.center
+        count = len(self.chunks) - self.max_chunks + self.max_chunks // 8
+        for chunk in heapq.nlargest(
+                count, (c for c in self.chunks.values() if c is not keep),
+                key=lambda c: (c.x - center_x) ** 2 + (c.z - center_z) ** 2):
+            del self.chunks[chunk.x, chunk.z]
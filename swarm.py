@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import multiprocessing
+import traceback
+import time
+import sys
+import re
+from optparse import OptionParser
+
+from minecraft import authentication
+from minecraft.networking.connection import Connection
+from minecraft.networking.compression import Compression
+from minecraft.networking.connection_pool import ConnectionPool
+from minecraft.networking.packets import clientbound
+
+
+def get_options():
+    parser = OptionParser(usage="%prog [options] -s SERVER")
+
+    parser.add_option("-s", "--server", dest="server", default=None,
+                      help="server host or host:port "
+                           "(enclose IPv6 addresses in square brackets)")
+
+    parser.add_option("-n", "--bots", dest="bots", type="int", default=10,
+                      help="number of bots, named by --prefix, to connect "
+                           "in offline mode, if --accounts is not given")
+
+    parser.add_option("-x", "--prefix", dest="prefix", default="Bot",
+                      help="prefix of the generated bot usernames")
+
+    parser.add_option("-a", "--accounts", dest="accounts", default=None,
+                      help="file listing one account per line, either as "
+                           "'username' (offline mode) or 'username:password'")
+
+    parser.add_option("-w", "--workers", dest="workers", type="int",
+                      default=multiprocessing.cpu_count(),
+                      help="number of worker processes")
+
+    parser.add_option("-i", "--interval", dest="interval", type="float",
+                      default=5.0,
+                      help="seconds between status reports")
+
+    parser.add_option("-t", "--time", dest="time", type="float", default=None,
+                      help="seconds to run for (by default, until "
+                           "interrupted)")
+
+    parser.add_option("-c", "--connect-delay", dest="connect_delay",
+                      type="float", default=0.05,
+                      help="seconds between each worker's connection attempts")
+
+    parser.add_option("-z", "--compression-level", dest="compression_level",
+                      type="int", default=None,
+                      help="zlib level (0-9) with which to compress packets, "
+                           "if the server enables compression; 0 or 1 is "
+                           "fastest on a local network")
+
+    parser.add_option("-o", "--offload-threads", dest="offload_threads",
+                      type="int", default=0,
+                      help="number of threads in each worker to which the "
+                           "compression and decompression of large packets "
+                           "is offloaded (by default, none)")
+
+    parser.add_option("-l", "--login-threads", dest="login_threads",
+                      type="int", default=8,
+                      help="number of threads in each worker that join the "
+                           "sessions of bots logging in with --accounts, "
+                           "separate from those of --offload-threads")
+
+    parser.add_option("-k", "--token-cache", dest="token_cache",
+                      default=None,
+                      help="file in which to cache the authentication "
+                           "tokens of the accounts given by --accounts, "
+                           "which are then authenticated together before "
+                           "the bots connect")
+
+    (options, args) = parser.parse_args()
+
+    if not options.server:
+        parser.error("no server given.")
+    match = re.match(r"((?P<host>[^\[\]:]+)|\[(?P<addr>[^\[\]]+)\])"
+                     r"(:(?P<port>\d+))?$", options.server)
+    if match is None:
+        raise ValueError("Invalid server address: '%s'." % options.server)
+    options.address = match.group("host") or match.group("addr")
+    options.port = int(match.group("port") or 25565)
+
+    if options.accounts is not None:
+        with open(options.accounts) as file:
+            lines = [line.strip() for line in file]
+        options.accounts = [tuple(line.split(':', 1)) if ':' in line
+                            else (line, None) for line in lines if line]
+    else:
+        options.accounts = [('%s%d' % (options.prefix, i), None)
+                            for i in range(options.bots)]
+
+    return options
+
+
+class BotStatus(object):
+    """ The status and metrics of one bot, as reported to the runner. """
+    __slots__ = 'username', 'state', 'packets_in', 'packets_out', \
+                'joined_at', 'exception'
+
+    def __init__(self, username):
+        self.username = username
+        self.state = 'connecting'
+        self.packets_in = 0
+        self.packets_out = 0
+        self.joined_at = None   # The time taken to join the game, in seconds.
+        self.exception = None   # The formatted exception, if any.
+
+    def __getstate__(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+def run_worker(options, accounts, pipe):
+    # Connect the given bots, sending their statuses to the runner through
+    # 'pipe' until told to stop.
+    executor = None
+    if options.offload_threads > 0:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(options.offload_threads)
+    pool = ConnectionPool(executor=executor,
+                          login_threads=options.login_threads)
+    compression = None if options.compression_level is None \
+        else Compression(level=options.compression_level)
+    statuses = {}
+    connections = []
+
+    def add_bot(username, password):
+        status = statuses[username] = BotStatus(username)
+        start = time.time()
+
+        def handle_exception(exc, exc_info):
+            status.state = 'failed'
+            status.exception = ''.join(traceback.format_exception(*exc_info))
+
+        def handle_exit():
+            if status.state != 'failed':
+                status.state = 'disconnected'
+
+        def handle_join_game(_packet):
+            status.state = 'joined'
+            status.joined_at = time.time() - start
+
+        try:
+            auth_token = None
+            if isinstance(password, Exception):
+                raise password
+            elif isinstance(password, authentication.AuthenticationToken):
+                auth_token = password
+            elif password is not None:
+                auth_token = authentication.AuthenticationToken()
+                auth_token.authenticate(username, password)
+            connection = Connection(
+                options.address, options.port, username=username,
+                auth_token=auth_token, pool=pool, reuse_packets=True,
+                compression=compression,
+                handle_exception=handle_exception, handle_exit=handle_exit)
+            connection.register_packet_listener(
+                handle_join_game, clientbound.play.JoinGamePacket)
+            connection.connect()
+            connections.append((status, connection))
+        except Exception:
+            handle_exception(None, sys.exc_info())
+
+    def send_statuses():
+        # The packets are counted by the connections, so that the packets
+        # that the bots do not handle need not be decoded.
+        for status, connection in connections:
+            status.packets_in = connection.packets_received
+            status.packets_out = connection.packets_sent
+        pipe.send(('status', list(statuses.values())))
+
+    try:
+        for username, password in accounts:
+            add_bot(username, password)
+            if pipe.poll(options.connect_delay):
+                break
+        while not pipe.poll(options.interval):
+            send_statuses()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for _status, connection in connections:
+            connection.disconnect()
+        pool.close()
+        if executor is not None:
+            executor.shutdown()
+        send_statuses()
+        pipe.send(('exit', None))
+
+
+def main():
+    options = get_options()
+    accounts = options.accounts
+
+    if options.token_cache is not None:
+        # Replace each password with the account's token, or the exception
+        # raised in obtaining it, which is reported by the worker.
+        tokens = authentication.TokenCache(options.token_cache).get_tokens(
+            [a for a in accounts if a[1] is not None])
+        accounts = [(username, tokens.get(username, password))
+                    for username, password in accounts]
+    num_workers = max(1, min(options.workers, len(accounts)))
+
+    workers = []
+    for i in range(num_workers):
+        pipe, worker_pipe = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=run_worker, name='Swarm Worker %d' % i,
+            args=(options, accounts[i::num_workers], worker_pipe))
+        process.daemon = True
+        process.start()
+        # Only the worker's end of the pipe must remain open, so that the
+        # pipe reports EOF if the worker exits without sending 'exit'.
+        worker_pipe.close()
+        workers.append((process, pipe))
+
+    statuses = {}
+    reported_exceptions = set()
+    running = list(workers)
+    start = time.time()
+    stopping = False
+
+    def report():
+        states = {}
+        for status in statuses.values():
+            states[status.state] = states.get(status.state, 0) + 1
+        joins = [s.joined_at for s in statuses.values()
+                 if s.joined_at is not None]
+        print('[%7.1fs] %s; packets in: %d, out: %d; mean join time: %s' % (
+            time.time() - start,
+            ', '.join('%s: %d' % i for i in sorted(states.items())),
+            sum(s.packets_in for s in statuses.values()),
+            sum(s.packets_out for s in statuses.values()),
+            '%.2fs' % (sum(joins) / len(joins)) if joins else 'n/a'))
+
+    try:
+        next_report = start + options.interval
+        while running:
+            for process, pipe in list(running):
+                try:
+                    while pipe.poll():
+                        kind, data = pipe.recv()
+                        if kind == 'exit':
+                            running.remove((process, pipe))
+                            break
+                        for status in data:
+                            statuses[status.username] = status
+                            if status.exception is not None and \
+                               status.username not in reported_exceptions:
+                                reported_exceptions.add(status.username)
+                                print('Exception in %s:\n%s' % (
+                                    status.username, status.exception),
+                                    file=sys.stderr)
+                except EOFError:
+                    # The worker exited without sending 'exit', as when it
+                    # is killed.
+                    running.remove((process, pipe))
+                    process.join(1)
+                    print('%s exited unexpectedly (exit code %s).' % (
+                        process.name, process.exitcode), file=sys.stderr)
+            if time.time() >= next_report:
+                report()
+                next_report += options.interval
+            if not stopping and options.time is not None and \
+               time.time() - start >= options.time:
+                stopping = True
+                for process, pipe in running:
+                    try:
+                        pipe.send('stop')
+                    except (IOError, OSError):
+                        pass
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        for process, pipe in running:
+            try:
+                pipe.send('stop')
+            except (IOError, OSError):
+                pass
+    finally:
+        for process, _pipe in workers:
+            process.join(5)
+        report()
+
+
+if __name__ == "__main__":
+    main()
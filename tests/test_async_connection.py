@@ -0,0 +1,162 @@
+from minecraft.networking.packets import clientbound, serverbound
+
+from . import fake_server, test_encryption
+from .test_encryption import setUpModule, tearDownModule  # noqa
+
+import unittest
+import threading
+import sys
+
+from .compat import mock
+
+try:
+    import asyncio
+    from minecraft.networking.async_connection import AsyncConnection
+except (ImportError, SyntaxError):
+    asyncio = None
+
+
+class Awaitable(object):
+    # An awaitable object that records whether it has been awaited.
+    def __init__(self):
+        self.awaited = False
+
+    def __await__(self):
+        self.awaited = True
+        return iter(())
+
+
+class ClientHandler(fake_server.FakeClientHandler):
+    def handle_play_start(self):
+        super(ClientHandler, self).handle_play_start()
+        self.write_packet(clientbound.play.KeepAlivePacket(
+            keep_alive_id=1223334444))
+
+    def handle_play_packet(self, packet):
+        super(ClientHandler, self).handle_play_packet(packet)
+        if isinstance(packet, serverbound.play.KeepAlivePacket):
+            assert packet.keep_alive_id == 1223334444
+            raise fake_server.FakeServerDisconnect
+
+
+@unittest.skipIf(asyncio is None, 'Requires Python 3.5 or later.')
+class AsyncConnectTest(unittest.TestCase):
+    compression_threshold = None
+    encrypted = False
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _run_server(self):
+        keys = {}
+        if self.encrypted:
+            keys = {'private_key': test_encryption.private_key,
+                    'public_key_bytes': test_encryption.public_key}
+        server = fake_server.FakeServer(
+            minecraft_version=fake_server.VERSIONS[-1],
+            compression_threshold=self.compression_threshold,
+            client_handler_type=ClientHandler, test_case=self, **keys)
+        exc_info = []
+
+        def run():
+            try:
+                server.run()
+            except Exception:
+                exc_info.append(sys.exc_info())
+        thread = threading.Thread(target=run, name='FakeServer')
+        thread.daemon = True
+        thread.start()
+        return server, thread, exc_info
+
+    def _connect(self, **kwds):
+        server, thread, server_exc_info = self._run_server()
+        port = server.listen_socket.getsockname()[1]
+        received, awaitable = [], Awaitable()
+        try:
+            client = AsyncConnection(
+                'localhost', port, username='TestUser', loop=self.loop,
+                **kwds)
+
+            def handle_join_game(packet):
+                received.append(packet)
+                return awaitable
+            client.register_packet_listener(
+                handle_join_game, clientbound.play.JoinGamePacket)
+            client.register_packet_listener(
+                received.append, clientbound.play.KeepAlivePacket,
+                clientbound.play.DisconnectPacket)
+
+            self.loop.run_until_complete(client.connect())
+            self.loop.run_until_complete(asyncio.wait_for(
+                client.wait_closed(), fake_server.THREAD_TIMEOUT_S))
+        finally:
+            server.stop()
+            thread.join(fake_server.THREAD_TIMEOUT_S)
+        if server_exc_info:
+            raise server_exc_info[0][1]
+        self.assertTrue(awaitable.awaited)
+        return client, received
+
+    def test_connect(self):
+        client, received = self._connect()
+        self.assertIsNone(client.exception)
+        self.assertFalse(client.connected)
+        self.assertEqual(
+            [type(p) for p in received],
+            [clientbound.play.JoinGamePacket,
+             clientbound.play.KeepAlivePacket,
+             clientbound.play.DisconnectPacket])
+
+    def test_connect_with_version(self):
+        version = fake_server.VERSIONS[-1]
+        client, received = self._connect(allowed_versions=[version])
+        self.assertIsNone(client.exception)
+        self.assertEqual(len(received), 3)
+
+    def test_connect_refused(self):
+        server, thread, _exc_info = self._run_server()
+        port = server.listen_socket.getsockname()[1]
+        server.stop()
+        thread.join(fake_server.THREAD_TIMEOUT_S)
+
+        client = AsyncConnection('localhost', port, loop=self.loop)
+        with self.assertRaises(OSError):
+            self.loop.run_until_complete(client.connect())
+        self.assertFalse(client.connected)
+        self.loop.run_until_complete(client.wait_closed())
+
+
+class AsyncConnectCompressionTest(AsyncConnectTest):
+    compression_threshold = 0
+
+
+class AsyncConnectEncryptionTest(AsyncConnectTest):
+    compression_threshold = 0
+    encrypted = True
+
+    def test_blocking_join(self):
+        # The event loop keeps running while the session server is joined.
+        joining, ticked = threading.Event(), threading.Event()
+
+        def join(server_id):
+            joining.set()
+            assert ticked.wait(fake_server.THREAD_TIMEOUT_S)
+
+        def tick():
+            if joining.is_set():
+                ticked.set()
+            else:
+                self.loop.call_later(0.01, tick)
+
+        auth_token = mock.MagicMock()
+        auth_token.profile.name = 'TestUser'
+        auth_token.join.side_effect = join
+        self.loop.call_soon(tick)
+        client, received = self._connect(auth_token=auth_token)
+        self.assertIsNone(client.exception)
+        self.assertTrue(ticked.is_set())
+        self.assertEqual(auth_token.join.call_count, 1)
+        self.assertEqual(len(received), 3)
@@ -1,5 +1,7 @@
 from minecraft.authentication import Profile
 from minecraft.authentication import AuthenticationToken
+from minecraft.authentication import TokenCache
+from minecraft.authentication import get_session, configure_session
 from minecraft.authentication import _make_request
 from minecraft.authentication import _raise_from_response
 from minecraft.exceptions import YggdrasilError
@@ -8,6 +10,8 @@ import requests
 import json
 import unittest
 import os
+import shutil
+import tempfile
 from .compat import mock
 
 FAKE_DATA = {
@@ -359,3 +363,138 @@ class NormalConnectionProcedure(unittest.TestCase):
 
             self.assertRaises(YggdrasilError, a.join, 123)
             self.assertRaises(YggdrasilError, a.invalidate)
+
+
+class TokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "tokens.json")
+        self.requests = []
+        self.valid_tokens = set()
+        self.refreshable = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_request(self, server, endpoint, data):
+        self.requests.append(endpoint)
+        res = mock.NonCallableMock(requests.Response)
+        res.status_code = 200
+        if endpoint == "validate":
+            self.assertEqual(data["clientToken"], "client")
+            res.status_code = 204 \
+                if data["accessToken"] in self.valid_tokens else 403
+        elif endpoint == "refresh" and not self.refreshable or \
+                endpoint == "authenticate" and data["password"] != "pass":
+            res.status_code = 403
+        access_token = "token%d" % len(self.requests)
+        self.valid_tokens.add(access_token)
+        res.json = mock.MagicMock(return_value={
+            "error": "ForbiddenOperationException",
+            "errorMessage": "Invalid token.",
+            "accessToken": access_token,
+            "clientToken": data.get("clientToken", "client"),
+            "selectedProfile": {"id": "1", "name": "name"}})
+        res.text = json.dumps(res.json())
+        return res
+
+    def get_token(self, username="user", password="pass", validate_after=0):
+        with mock.patch("minecraft.authentication._make_request",
+                        side_effect=self.make_request):
+            return TokenCache(self.path, validate_after).get_token(
+                username, password)
+
+    def test_get_token(self):
+        token = self.get_token()
+        self.assertTrue(token.authenticated)
+        self.assertEqual(self.requests, ["authenticate"])
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["user"]["accessToken"],
+                             token.access_token)
+
+        # The cached token is valid.
+        self.assertEqual(self.get_token().access_token, token.access_token)
+        self.assertEqual(self.requests, ["authenticate", "validate"])
+
+        # The cached token is invalid, but may be refreshed.
+        self.valid_tokens.clear()
+        token = self.get_token()
+        self.assertEqual(self.requests[2:], ["validate", "refresh"])
+        self.assertEqual(token.access_token, "token4")
+
+        # The cached token may not be refreshed, so the account is
+        # authenticated again, with the same client token.
+        self.valid_tokens.clear()
+        self.refreshable = False
+        token = self.get_token()
+        self.assertEqual(self.requests[4:],
+                         ["validate", "refresh", "authenticate"])
+        self.assertEqual(token.client_token, "client")
+
+        with self.assertRaises(YggdrasilError):
+            self.get_token(username="other", password="wrong")
+
+    def test_recent_token(self):
+        token = self.get_token()
+        with open(self.path) as f:
+            checked_at = json.load(f)["user"]["checkedAt"]
+
+        # A recently obtained token is not validated again.
+        self.valid_tokens.clear()
+        self.assertEqual(self.get_token(validate_after=60).access_token,
+                         token.access_token)
+        self.assertEqual(self.requests, ["authenticate"])
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["user"]["checkedAt"], checked_at)
+
+        with mock.patch("time.time", return_value=checked_at + 61):
+            self.get_token(validate_after=60)
+        self.assertEqual(self.requests[1:], ["validate", "refresh"])
+
+    def test_corrupt_cache(self):
+        with open(self.path, "w") as f:
+            f.write('{"user": ')
+        with mock.patch("warnings.warn") as warn:
+            self.get_token()
+        self.assertEqual(warn.call_count, 1)
+        self.assertEqual(self.requests, ["authenticate"])
+        with open(self.path) as f:
+            self.assertEqual(list(json.load(f)), ["user"])
+
+    @unittest.skipIf(os.name != "posix", "POSIX file permissions only.")
+    def test_permissions(self):
+        umask = os.umask(0o022)
+        try:
+            self.get_token()
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_get_tokens(self):
+        accounts = [("user%d" % i, "pass") for i in range(20)]
+        accounts.append(("other", "wrong"))
+        with mock.patch("minecraft.authentication._make_request",
+                        side_effect=self.make_request):
+            tokens = TokenCache(self.path).get_tokens(accounts, threads=4)
+        self.assertEqual(len(tokens), 21)
+        self.assertIsInstance(tokens.pop("other"), YggdrasilError)
+        for username, token in tokens.items():
+            self.assertEqual(token.username, username)
+        with open(self.path) as f:
+            self.assertEqual(sorted(json.load(f)), sorted(tokens))
+
+
+class SessionTest(unittest.TestCase):
+    def test_session(self):
+        session = get_session()
+        self.assertIs(get_session(), session)
+        configure_session(pool_size=50)
+        self.assertIsNot(get_session(), session)
+        adapter = get_session().get_adapter(AUTHSERVER)
+        self.assertEqual(adapter._pool_maxsize, 50)
+
+        # A forked process creates its own session.
+        session = get_session()
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(get_session(), session)
+        self.assertIsNot(get_session(), session)
@@ -1,5 +1,6 @@
 from minecraft import SUPPORTED_MINECRAFT_VERSIONS
 from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking import packets
 from minecraft.networking.packets import clientbound, serverbound
 from minecraft.networking.connection import Connection
 from minecraft.exceptions import (
@@ -8,7 +9,9 @@ from minecraft.exceptions import (
 from minecraft.compat import unicode
 
 from . import fake_server
+from .compat import mock
 
+import unittest
 import sys
 import re
 import io
@@ -32,6 +35,25 @@ class ConnectTest(fake_server._FakeServerTest):
                 raise fake_server.FakeServerDisconnect
 
 
+class PacketCountTest(ConnectTest):
+    def _start_client(self, client):
+        # Each packet received or written is counted by the connection,
+        # including those made in determining the server's version.
+        counts = [0, 0]
+
+        def count_in(_packet):
+            counts[0] += 1
+            assert client.packets_received == counts[0]
+
+        def count_out(_packet):
+            counts[1] += 1
+            assert client.packets_sent == counts[1]
+        client.register_packet_listener(count_in, packets.Packet, early=True)
+        client.register_packet_listener(count_out, packets.Packet,
+                                        outgoing=True)
+        super(PacketCountTest, self)._start_client(client)
+
+
 class ReconnectTest(ConnectTest):
     phase = 0
 
@@ -447,3 +469,59 @@ class VersionNegotiationEdgeCases(fake_server._FakeServerTest):
         self._test_connect(server_version=self.lowest_version,
                            client_handler_type=ClientHandler,
                            connection_type=make_connection)
+
+
+class ListenerDispatchTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = Connection('localhost')
+        self.connection.reactor = mock.Mock()
+        self.calls = []
+
+    def listener(self, name):
+        return lambda packet: self.calls.append((name, type(packet)))
+
+    def test_dispatch(self):
+        connection = self.connection
+        any_packet, chat = self.listener('any'), self.listener('chat')
+        connection.register_packet_listener(any_packet, packets.Packet)
+        connection.register_packet_listener(
+            chat, clientbound.play.ChatMessagePacket,
+            clientbound.play.KeepAlivePacket)
+
+        connection._react(clientbound.play.ChatMessagePacket())
+        connection._react(clientbound.play.JoinGamePacket())
+        connection._react(clientbound.play.ChatMessagePacket())
+        ChatMessagePacket = clientbound.play.ChatMessagePacket
+        self.assertEqual(self.calls, [
+            ('any', ChatMessagePacket), ('chat', ChatMessagePacket),
+            ('any', clientbound.play.JoinGamePacket),
+            ('any', ChatMessagePacket), ('chat', ChatMessagePacket)])
+        self.assertEqual(
+            connection._get_listeners(ChatMessagePacket),
+            ((), (any_packet, chat), (), ()))
+
+        # Registering or removing a listener invalidates the cache.
+        del self.calls[:]
+        early = self.listener('early')
+        connection.register_packet_listener(
+            early, ChatMessagePacket, early=True)
+        self.assertTrue(connection.unregister_packet_listener(any_packet))
+        self.assertFalse(connection.unregister_packet_listener(any_packet))
+        connection._react(ChatMessagePacket())
+        self.assertEqual(self.calls, [
+            ('early', ChatMessagePacket), ('chat', ChatMessagePacket)])
+
+    def test_ignore_packet(self):
+        connection = self.connection
+
+        def ignore(packet):
+            raise IgnorePacket
+        connection.register_packet_listener(
+            ignore, clientbound.play.ChatMessagePacket, early=True)
+        connection.register_packet_listener(
+            self.listener('late'), packets.Packet)
+        connection._react(clientbound.play.ChatMessagePacket())
+        connection._react(clientbound.play.JoinGamePacket())
+        self.assertEqual(self.calls, [
+            ('late', clientbound.play.JoinGamePacket)])
+        self.assertEqual(connection.reactor.react.call_count, 1)
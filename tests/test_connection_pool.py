@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import time
+
+from minecraft.networking.connection import Connection
+from minecraft.networking.connection_pool import (
+    ConnectionPool, PooledNetworkingThread, selectors
+)
+from minecraft.networking.packets import clientbound, serverbound
+
+from . import fake_server, test_connection, test_encryption
+from .compat import mock
+from .test_encryption import setUpModule, tearDownModule  # noqa
+
+
+class PooledTest(object):
+    # A mixin for '_FakeServerTest' cases, making the client's connection
+    # belong to a 'ConnectionPool', created with the keyword arguments in
+    # 'pool_options', which subclasses may assign before calling 'setUp'.
+    pool_options = {}
+
+    def setUp(self):
+        super(PooledTest, self).setUp()
+        self.pool = ConnectionPool(**self.pool_options)
+
+    def tearDown(self):
+        self.pool.close()
+        super(PooledTest, self).tearDown()
+
+    def connection_type(self, *args, **kwds):
+        return Connection(*args, pool=self.pool, **kwds)
+
+    def _start_client(self, client):
+        super(PooledTest, self)._start_client(client)
+        assert isinstance(client.networking_thread, PooledNetworkingThread)
+        assert self.pool.thread.is_alive()
+
+
+class PooledConnectTest(PooledTest, test_connection.ConnectTest):
+    pass
+
+
+class PooledCompressionTest(PooledTest,
+                            test_connection.ConnectCompressionLowTest):
+    pass
+
+
+class PooledReconnectTest(PooledTest, test_connection.ReconnectTest):
+    pass
+
+
+class PooledStatusTest(PooledTest, test_connection.PingTest):
+    pass
+
+
+class PooledLoginDisconnectTest(PooledTest,
+                                test_connection.LoginDisconnectTest):
+    pass
+
+
+class PooledEncryptedReconnectTest(
+        PooledTest, test_encryption.EncryptedCompressedReconnect):
+    pass
+
+
+class PooledLargeWriteTest(PooledTest, test_encryption.EncryptedConnection):
+    # The client writes more than its socket, with a small send buffer,
+    # accepts at once, while the server is slow to read it, so the pool
+    # waits for the socket to become writable, rather than blocking.
+    num_messages = 8
+
+    def setUp(self):
+        super(PooledLargeWriteTest, self).setUp()
+        self.modify = mock.Mock(wraps=self.pool.selector.modify)
+        self.pool.selector.modify = self.modify
+
+    def tearDown(self):
+        super(PooledLargeWriteTest, self).tearDown()
+        if not self.disconnect:
+            events = [c[0][1] for c in self.modify.call_args_list]
+            assert selectors.EVENT_READ | selectors.EVENT_WRITE in events
+            assert events[-1] == selectors.EVENT_READ
+
+    force = False       # Whether the messages are written with 'force'.
+    disconnect = False  # Whether the client disconnects after writing them.
+
+    def _start_client(self, client):
+        def handle_join_game(_packet):
+            client.socket.actual_socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+            for i in range(self.num_messages):
+                client.write_packet(serverbound.play.PluginMessagePacket(
+                    channel='pyCraft:tests',
+                    data=bytes(bytearray([i]) * (1 << 18))), force=self.force)
+            if self.disconnect:
+                client.disconnect()
+        client.register_packet_listener(
+            handle_join_game, clientbound.play.JoinGamePacket)
+        super(PooledLargeWriteTest, self)._start_client(client)
+
+    class client_handler_type(test_encryption.EncryptedConnection
+                              .client_handler_type):
+        def handle_play_start(self):
+            self.messages = 0
+            super(PooledLargeWriteTest.client_handler_type, self) \
+                .handle_play_start()
+
+        def handle_play_packet(self, packet):
+            if isinstance(packet, serverbound.play.PluginMessagePacket):
+                if not self.messages:
+                    time.sleep(0.2)
+                assert packet.data == \
+                    bytes(bytearray([self.messages]) * (1 << 18))
+                self.messages += 1
+            elif isinstance(packet, serverbound.play.KeepAlivePacket):
+                assert self.messages == PooledLargeWriteTest.num_messages
+            super(PooledLargeWriteTest.client_handler_type, self) \
+                .handle_play_packet(packet)
+
+
+class PooledForcedWriteTest(PooledLargeWriteTest):
+    # As 'PooledLargeWriteTest', but with the messages written with 'force',
+    # and the server sending nothing else until it has received them all, so
+    # that the pool must send the rest of them without further prompting.
+    force = True
+
+    class client_handler_type(PooledLargeWriteTest.client_handler_type):
+        def handle_play_start(self):
+            self.messages = 0
+            fake_server.FakeClientHandler.handle_play_start(self)
+
+        def handle_play_packet(self, packet):
+            super(PooledForcedWriteTest.client_handler_type, self) \
+                .handle_play_packet(packet)
+            if self.messages == PooledLargeWriteTest.num_messages and \
+               isinstance(packet, serverbound.play.PluginMessagePacket):
+                self.write_packet(clientbound.play.KeepAlivePacket(
+                    keep_alive_id=1223334444))
+
+
+class PooledDisconnectTest(PooledLargeWriteTest):
+    # The client writes more than its socket accepts at once, and then
+    # disconnects, which sends all of it before closing the socket, without
+    # waiting for the pool.
+    disconnect = True
+
+    class client_handler_type(PooledLargeWriteTest.client_handler_type):
+        def handle_play_start(self):
+            self.messages = 0
+            fake_server.FakeClientHandler.handle_play_start(self)
+
+        def handle_play_client_disconnect(self):
+            assert self.messages == PooledLargeWriteTest.num_messages
+            raise fake_server.FakeServerTestSuccess
+
+
+class LoginExecutorPooledTest(
+        PooledTest, test_encryption.EncryptedCompressedReconnect):
+    # Encryption responses are prepared by the pool's login executor, even
+    # if the pool has no executor.
+    def setUp(self):
+        self.login_executor = ThreadPoolExecutor(1)
+        self.login_executor.submit = mock.Mock(
+            wraps=self.login_executor.submit)
+        self.pool_options = {'login_executor': self.login_executor}
+        super(LoginExecutorPooledTest, self).setUp()
+
+    def tearDown(self):
+        super(LoginExecutorPooledTest, self).tearDown()
+        self.login_executor.shutdown()
+        assert self.login_executor.submit.call_count > 0
+
+
+class OffloadingPooledTest(PooledTest):
+    # As 'PooledTest', but with every compressed packet being compressed or
+    # decompressed by the pool's executor.
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.pool_options = {'executor': self.executor,
+                             'offload_threshold': 0}
+        super(OffloadingPooledTest, self).setUp()
+
+    def tearDown(self):
+        super(OffloadingPooledTest, self).tearDown()
+        self.executor.shutdown()
+
+
+class OffloadingPooledCompressionTest(
+        OffloadingPooledTest, test_connection.ConnectCompressionLowTest):
+    pass
+
+
+class OffloadingPooledEncryptedReconnectTest(
+        OffloadingPooledTest, test_encryption.EncryptedCompressedReconnect):
+    pass
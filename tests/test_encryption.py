@@ -8,6 +8,7 @@ from minecraft.networking.encryption import (
     generate_shared_secret,
     generate_verification_hash,
     create_AES_cipher,
+    load_public_key,
     EncryptedFileObjectWrapper,
     EncryptedSocketWrapper
 )
@@ -70,6 +71,11 @@ class Encryption(unittest.TestCase):
         self.assertEquals("1f142e737a84a974a5f2a22f6174a78d80fd97f5",
                           verification_hash)
 
+    def test_load_public_key(self):
+        key = load_public_key(public_key)
+        self.assertIs(load_public_key(bytes(bytearray(public_key))), key)
+        self.assertEqual(key.key_size, 1024)
+
     def test_file_object_wrapper(self):
         cipher = create_AES_cipher(generate_shared_secret())
         encryptor = cipher.encryptor()
@@ -85,6 +91,36 @@ class Encryption(unittest.TestCase):
 
         self.assertEqual(test_data, decrypted_data)
 
+    def test_file_object_wrapper_readinto(self):
+        cipher = create_AES_cipher(generate_shared_secret())
+        encryptor = cipher.encryptor()
+        decryptor = cipher.decryptor()
+
+        test_data = os.urandom(1000)
+        io = BytesIO(encryptor.update(test_data))
+        wrapper = EncryptedFileObjectWrapper(io, decryptor)
+
+        # The data is read in chunks, each leaving the space required by
+        # 'update_into' free at the end of the buffer.
+        received = bytearray()
+        buffer = bytearray(400)
+        while True:
+            count = wrapper.readinto(memoryview(buffer)[10:])
+            if not count:
+                break
+            self.assertLessEqual(count, 375)
+            received += buffer[10:10 + count]
+        self.assertEqual(bytes(received), test_data)
+
+        # The ciphertext buffer is released once it exceeds 4 times
+        # 'buffer_size', but kept otherwise.
+        io = BytesIO(encryptor.update(test_data))
+        wrapper = EncryptedFileObjectWrapper(io, decryptor, buffer_size=100)
+        wrapper.readinto(bytearray(300))
+        self.assertEqual(len(wrapper._ciphertext), 285)
+        wrapper.readinto(bytearray(500))
+        self.assertEqual(len(wrapper._ciphertext), 0)
+
     def test_socket_wrapper(self):
         secret = generate_shared_secret()
 
@@ -111,6 +147,20 @@ class Encryption(unittest.TestCase):
         wrapper.send(test_data)
         self.assertEqual(test_data, mock_socket.received)
 
+        test_data = os.urandom(1000)
+        wrapper.sendall(test_data)
+        self.assertEqual(test_data, mock_socket.received)
+        wrapper.sendall(test_data[:10])
+        self.assertEqual(test_data[:10], mock_socket.received)
+
+        wrapper.buffer_size = 300
+        wrapper.sendall(test_data[:300])
+        self.assertEqual(len(wrapper._ciphertext), 1015)
+        wrapper.buffer_size = 200
+        wrapper.sendall(test_data[:10])
+        self.assertEqual(len(wrapper._ciphertext), 0)
+        self.assertEqual(test_data[:10], mock_socket.received)
+
 
 class EncryptedConnection(test_connection.ConnectTest):
     def test_connect(self):
@@ -154,6 +204,10 @@ class MockSocket(object):
     # the server side
     def send(self, data):
         self.received = self.decryptor.update(data)
+        return len(data)
+
+    def sendall(self, data):
+        self.received = self.decryptor.update(data)
 
     def fileno(self):
         return 0
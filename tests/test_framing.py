@@ -0,0 +1,214 @@
+import unittest
+import socket
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from minecraft.networking.framing import FrameReader, FrameWriter
+from minecraft.networking.encryption import (
+    create_AES_cipher, generate_shared_secret, EncryptedFileObjectWrapper,
+    EncryptedSocketWrapper
+)
+from minecraft.networking.packets import PacketBuffer, FrameBuffer
+from minecraft.networking.types import VarInt
+
+
+def make_frame(data):
+    packet_buffer = PacketBuffer()
+    VarInt.send(len(data), packet_buffer)
+    packet_buffer.send(data)
+    return packet_buffer.get_writable()
+
+
+class FrameReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+        self.stream = self.client.makefile('rb', 0)
+
+    def tearDown(self):
+        self.stream.close()
+        self.server.close()
+        self.client.close()
+
+    def test_read_frames(self):
+        reader = FrameReader(self.stream)
+        self.assertIsNone(reader.read_frame(timeout=0))
+
+        frames = [b'', b'a', b'hello world', bytes(bytearray(range(200)))]
+        self.server.sendall(b''.join(make_frame(f) for f in frames))
+        for frame in frames:
+            self.assertEqual(reader.read_frame(timeout=1), frame)
+        self.assertIsNone(reader.read_frame(timeout=0))
+        self.assertEqual(reader.buffered, 0)
+
+    def test_partial_frame(self):
+        reader = FrameReader(self.stream)
+        frame = make_frame(b'hello world')
+
+        self.server.sendall(frame[:1])
+        self.assertIsNone(reader.read_frame(timeout=0.1))
+        self.server.sendall(frame[1:5])
+        self.assertIsNone(reader.read_frame(timeout=0.1))
+        self.assertEqual(reader.buffered, 5)
+        self.server.sendall(frame[5:] + frame)
+        self.assertEqual(reader.read_frame(timeout=1), b'hello world')
+        self.assertEqual(reader.read_frame(timeout=1), b'hello world')
+
+    def test_large_frame(self):
+        reader = FrameReader(self.stream, buffer_size=16)
+        data = bytes(bytearray(i % 251 for i in range(5000)))
+        frames = [b'small', data, b'small']
+        self.server.sendall(b''.join(make_frame(f) for f in frames))
+        for frame in frames:
+            self.assertEqual(reader.read_frame(timeout=1), frame)
+        self.assertEqual(len(reader.buffer), 16)
+
+    def test_length_limit(self):
+        reader = FrameReader(None)
+        reader.feed(b'\xff\xff\x7f')
+        self.assertIsNone(reader.next_frame())
+        self.assertEqual(len(reader.buffer), reader.buffer_size)
+
+        reader = FrameReader(None)
+        reader.feed(b'\xff\xff\xff\x01')
+        with self.assertRaises(ValueError):
+            reader.next_frame()
+
+    def test_end_of_stream(self):
+        reader = FrameReader(self.stream)
+        self.server.sendall(make_frame(b'hello')[:3])
+        self.server.close()
+        with self.assertRaises(EOFError):
+            while True:
+                reader.read_frame(timeout=1)
+
+    def test_encryption(self):
+        secret = generate_shared_secret()
+        encryptor = create_AES_cipher(secret).encryptor()
+        decryptor = create_AES_cipher(secret).decryptor()
+
+        reader = FrameReader(self.stream)
+        first, second = make_frame(b'plain'), make_frame(b'encrypted')
+        self.server.sendall(first + encryptor.update(second + second))
+        self.assertEqual(reader.read_frame(timeout=1), b'plain')
+
+        # Data received before encryption is enabled must also be decrypted.
+        self.assertEqual(reader.buffered, 2 * len(second))
+        reader.set_stream(EncryptedFileObjectWrapper(self.stream, decryptor))
+        self.assertEqual(reader.read_frame(timeout=1), b'encrypted')
+        self.assertEqual(reader.read_frame(timeout=1), b'encrypted')
+
+        self.server.sendall(encryptor.update(second))
+        self.assertEqual(reader.read_frame(timeout=1), b'encrypted')
+
+
+class FrameWriterTest(unittest.TestCase):
+    def test_flush(self):
+        sent = []
+
+        class Socket(object):
+            def sendall(self, data):
+                sent.append(bytes(data))
+
+        writer = FrameWriter()
+        writer.flush(Socket())
+        self.assertEqual(sent, [])
+
+        frames = [make_frame(b'hello'), make_frame(b''), make_frame(b'world')]
+        for frame in frames:
+            self.assertEqual(writer.send(frame), len(frame))
+        self.assertEqual(writer.pending, sum(map(len, frames)))
+        writer.flush(Socket())
+        self.assertEqual(sent, [b''.join(frames)])
+        self.assertEqual(writer.pending, 0)
+
+    def test_offload(self):
+        sent = []
+
+        class Socket(object):
+            def sendall(self, data):
+                sent.append(bytes(data))
+
+        executor = ThreadPoolExecutor(1)
+        try:
+            writer = FrameWriter(executor=executor, offload_threshold=100)
+            small, large = b'a' * 99, b'b' * 1000
+            for body in small, large, small:
+                frame_buffer = FrameBuffer()
+                frame_buffer.send(body)
+                writer.send_frame(frame_buffer, 200)
+            self.assertEqual(len(writer.deferred), 1)
+            future = writer.flush(Socket(), wait=False)
+            if future is not None:
+                self.assertEqual(len(sent), 1)
+                future.result()
+            writer.flush(Socket(), wait=False)
+
+            reader = FrameReader(None)
+            reader.feed(b''.join(sent))
+            frames = [reader.next_frame() for _ in range(3)]
+            self.assertEqual(frames[0], b'\x00' + small)
+            self.assertEqual(zlib.decompress(frames[1][2:]), large)
+            self.assertEqual(frames[2], frames[0])
+            self.assertEqual(writer.pending, 0)
+        finally:
+            executor.shutdown()
+
+    def test_encryption(self):
+        secret = generate_shared_secret()
+        encryptor = create_AES_cipher(secret).encryptor()
+        decryptor = create_AES_cipher(secret).decryptor()
+        server, client = socket.socketpair()
+        try:
+            writer = FrameWriter()
+            writer.send(make_frame(b'encrypted'))
+            writer.send(make_frame(b'data'))
+            writer.flush(EncryptedSocketWrapper(client, encryptor, decryptor))
+            stream = EncryptedFileObjectWrapper(
+                server.makefile('rb', 0),
+                create_AES_cipher(secret).decryptor())
+            reader = FrameReader(stream)
+            self.assertEqual(reader.read_frame(timeout=1), b'encrypted')
+            self.assertEqual(reader.read_frame(timeout=1), b'data')
+        finally:
+            server.close()
+            client.close()
+
+    def test_partial(self):
+        for encrypted in False, True:
+            self._test_partial(encrypted)
+
+    def _test_partial(self, encrypted):
+        # A non-blocking socket accepts only some of the data, and the rest
+        # is sent by later flushes, once the other end has read some.
+        data = bytes(bytearray(i % 251 for i in range(1 << 20)))
+        server, client = socket.socketpair()
+        try:
+            client.setblocking(False)
+            stream = server.makefile('rb', 0)
+            if encrypted:
+                secret = generate_shared_secret()
+                client = EncryptedSocketWrapper(
+                    client, create_AES_cipher(secret).encryptor(), None)
+                stream = EncryptedFileObjectWrapper(
+                    stream, create_AES_cipher(secret).decryptor())
+            writer = FrameWriter()
+            writer.send(make_frame(data))
+            writer.send(make_frame(b'end'))
+            writer.flush(client, partial=True)
+            self.assertTrue(writer.blocked)
+
+            reader = FrameReader(stream)
+            frames = []
+            while len(frames) < 2:
+                reader.receive()
+                frame = reader.next_frame()
+                while frame is not None:
+                    frames.append(frame)
+                    frame = reader.next_frame()
+                writer.flush(client, partial=True)
+            self.assertFalse(writer.blocked)
+            self.assertEqual(writer.pending, 0)
+            self.assertEqual(frames, [data, b'end'])
+        finally:
+            server.close()
+            client.close()
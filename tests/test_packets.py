@@ -1,17 +1,23 @@
 # -*- coding: utf-8 -*-
 import unittest
 import string
+import pickle
+from array import array
+import zlib
 from zlib import decompress
 from random import choice
 
 from minecraft import SUPPORTED_PROTOCOL_VERSIONS
 from minecraft.networking.connection import ConnectionContext
+from minecraft.networking.compression import (
+    Compression, decompress as compression_decompress
+)
 from minecraft.networking.types import (
-    VarInt, Enum, Vector, PositionAndLook
+    VarInt, Enum, Vector, Position, PositionAndLook, TrailingByteArray
 )
 from minecraft.networking.packets import (
-    Packet, PacketBuffer, PacketListener, KeepAlivePacket, serverbound,
-    clientbound
+    Packet, PacketBuffer, PacketReader, FrameBuffer, PacketListener,
+    PacketCodec, KeepAlivePacket, serverbound, clientbound, get_packet_table
 )
 
 
@@ -39,6 +45,97 @@ class PacketBufferTest(unittest.TestCase):
         self.assertEqual(packet_buffer.get_writable(), message)
 
 
+class PacketReaderTest(unittest.TestCase):
+    def test_read(self):
+        data = b"hello world"
+        reader = PacketReader(data)
+        self.assertEqual(reader.read(5), b"hello")
+        self.assertEqual(reader.remaining, 6)
+
+        view = reader.read_view(3)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view, b" wo")
+        self.assertEqual(reader.recv(), b"rld")
+        self.assertEqual(reader.read(), b"")
+        self.assertEqual(reader.remaining, 0)
+
+    def test_packet_read(self):
+        context = ConnectionContext(protocol_version=max(
+            SUPPORTED_PROTOCOL_VERSIONS))
+        packet = clientbound.play.PluginMessagePacket(
+            context, channel='pyCraft:tests', data=b'\x00\x01\x02')
+        packet_buffer = PacketBuffer()
+        packet.write_fields(packet_buffer)
+
+        reader = PacketReader(packet_buffer.get_writable())
+        deserialized = clientbound.play.PluginMessagePacket(context)
+        deserialized.read(reader)
+        self.assertEqual(deserialized.channel, packet.channel)
+        self.assertIsInstance(deserialized.data, bytes)
+        self.assertEqual(deserialized.data, packet.data)
+        self.assertEqual(str(deserialized), str(packet))
+
+        reader = PacketReader(b'\x00\x01\x02')
+        view = TrailingByteArray.read_view(reader)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view, b'\x00\x01\x02')
+
+
+class FrameBufferTest(unittest.TestCase):
+    def test_frame(self):
+        frame_buffer = FrameBuffer()
+        frame_buffer.send(b"hello")
+        self.assertEqual(frame_buffer.get_writable(), b"hello")
+        self.assertEqual(frame_buffer.get_frame(), b"\x05hello")
+        frame_buffer.reset()
+
+        body = bytes(bytearray(i % 256 for i in range(300)))
+        frame_buffer.send(body)
+        self.assertEqual(frame_buffer.get_frame(), b"\xac\x02" + body)
+        frame_buffer.reset()
+
+        frame_buffer.send(b"hello")
+        self.assertEqual(frame_buffer.get_frame(-1), b"\x06\x00hello")
+        frame_buffer.reset()
+
+        frame_buffer.send(body)
+        frame = frame_buffer.get_frame(256)
+        reader = PacketReader(frame)
+        self.assertEqual(VarInt.read(reader), len(frame) - 2)
+        self.assertEqual(VarInt.read(reader), len(body))
+        self.assertEqual(decompress(reader.read()), body)
+
+    def test_compression_settings(self):
+        frame_buffer = FrameBuffer()
+        body = bytes(bytearray(i % 256 for i in range(300)))
+        for compression in (Compression(level=0), Compression(level=1),
+                            Compression(strategy=zlib.Z_HUFFMAN_ONLY)):
+            frame_buffer.send(body)
+            reader = PacketReader(frame_buffer.get_frame(256, compression))
+            VarInt.read(reader)
+            self.assertEqual(VarInt.read(reader), len(body))
+            self.assertEqual(compression_decompress(reader.read(), 300),
+                             body)
+            frame_buffer.reset()
+
+        frame_buffer.send(body)
+        frame = frame_buffer.get_frame(256, Compression(enabled=False))
+        self.assertEqual(frame, b"\xad\x02\x00" + body)
+        frame_buffer.reset()
+
+        with self.assertRaises(ValueError):
+            compression_decompress(zlib.compress(body), 299)
+
+    def test_reset_while_in_use(self):
+        frame_buffer = FrameBuffer()
+        frame_buffer.send(b"hello")
+        frame = frame_buffer.get_frame()
+        frame_buffer.reset()
+        frame_buffer.send(b"world")
+        self.assertEqual(frame, b"\x05hello")
+        self.assertEqual(frame_buffer.get_frame(), b"\x05world")
+
+
 class PacketSerializationTest(unittest.TestCase):
 
     def test_packet(self):
@@ -100,6 +197,145 @@ class PacketSerializationTest(unittest.TestCase):
             self.assertEqual(packet.message, deserialized.message)
 
 
+class PacketCodecTest(unittest.TestCase):
+    def test_struct_runs(self):
+        context = ConnectionContext(protocol_version=max(
+            SUPPORTED_PROTOCOL_VERSIONS))
+        codec = clientbound.play.JoinGamePacket.get_codec(context)
+        self.assertEqual(codec.struct_formats, ['>iBiBB', '>?'])
+        self.assertIs(codec, clientbound.play.JoinGamePacket.get_codec(
+            ConnectionContext(protocol_version=context.protocol_version)))
+
+        context = ConnectionContext(protocol_version=47)
+        codec = clientbound.play.JoinGamePacket.get_codec(context)
+        self.assertEqual(codec.struct_formats, ['>iBbBB', '>?'])
+
+    def test_read_write(self):
+        for protocol_version in SUPPORTED_PROTOCOL_VERSIONS:
+            context = ConnectionContext(protocol_version=protocol_version)
+            packet = clientbound.play.JoinGamePacket(
+                context, entity_id=-87, game_mode=3, dimension=-1,
+                difficulty=2, max_players=20, level_type='flat',
+                reduced_debug_info=True)
+            packet_buffer = PacketBuffer()
+            packet.write_fields(packet_buffer)
+            packet_buffer.reset_cursor()
+
+            expected = PacketBuffer()
+            for field in packet.definition:
+                for name, data_type in field.items():
+                    data_type.send(getattr(packet, name), expected)
+            self.assertEqual(packet_buffer.get_writable(),
+                             expected.get_writable())
+
+            deserialized = clientbound.play.JoinGamePacket(context)
+            deserialized.read(packet_buffer)
+            self.assertEqual(packet.__getstate__(),
+                             deserialized.__getstate__())
+
+    def test_replaced_definition(self):
+        context = ConnectionContext(protocol_version=max(
+            SUPPORTED_PROTOCOL_VERSIONS))
+        packet = serverbound.play.ChatPacket(context, message='hello')
+        packet.definition = [{'message': VarInt}]
+        packet.message = 300
+
+        packet_buffer = PacketBuffer()
+        packet.write_fields(packet_buffer)
+        self.assertEqual(packet_buffer.get_writable(), b'\xac\x02')
+
+        del packet.definition
+        packet.message = 'hi'
+        self.assertIs(packet._get_codec(), packet.get_codec(context))
+        shared_buffer = PacketBuffer()
+        packet.write_fields(shared_buffer)
+        self.assertEqual(shared_buffer.get_writable(), b'\x02hi')
+
+        codec = PacketCodec([{'x': VarInt}, {}])
+        self.assertEqual(codec.struct_formats, [])
+        packet_buffer.reset_cursor()
+        codec.read(packet, packet_buffer)
+        self.assertEqual(packet.x, 300)
+
+
+class PacketVariantTest(unittest.TestCase):
+    def test_variant(self):
+        calls = []
+
+        class TestPacket(Packet):
+            @classmethod
+            def get_id(cls, context):
+                calls.append('get_id')
+                return 0x10 if context.protocol_version >= 100 else 0x20
+
+            @classmethod
+            def get_definition(cls, context):
+                calls.append('get_definition')
+                return [{'x': VarInt}]
+
+        context = ConnectionContext(protocol_version=200)
+        packets = [TestPacket(context, x=i) for i in range(3)]
+        packets.append(TestPacket(context=ConnectionContext(
+            protocol_version=200)))
+        self.assertEqual(calls, ['get_definition', 'get_id'])
+        for packet in packets:
+            self.assertEqual(packet.id, 0x10)
+            self.assertIs(packet.definition, packets[0].definition)
+
+        packet = packets[0]
+        packet.context = ConnectionContext(protocol_version=47)
+        self.assertEqual(packet.id, 0x20)
+        self.assertEqual(len(calls), 4)
+        packet.id = 0x30
+        self.assertEqual((packet.id, packets[1].id), (0x30, 0x10))
+        packet.context = None
+        self.assertIsNone(packet.definition)
+        self.assertEqual(packet.id, 0x30)
+
+
+class PacketSlotsTest(unittest.TestCase):
+    def test_slots(self):
+        context = ConnectionContext(protocol_version=max(
+            SUPPORTED_PROTOCOL_VERSIONS))
+        packet = clientbound.play.BlockChangePacket(
+            context, location=Position(1, 2, 3), blockId=5, blockMeta=1)
+        self.assertEqual(clientbound.play.BlockChangePacket.__slots__,
+                         ('location',))
+        self.assertEqual(packet.block_state_id, 0x51)
+        self.assertEqual(packet.__dict__, {'block_state_id': 0x51})
+
+        packet = clientbound.play.PlayerPositionAndLookPacket(
+            context, x=1.0, teleport_id=7, extra=True)
+        self.assertIn('teleport_id', type(packet).__slots__)
+        self.assertEqual(packet.__dict__, {'extra': True})
+        self.assertEqual(packet.__getstate__(), {
+            '_context': context, 'x': 1.0, 'teleport_id': 7, 'extra': True})
+
+        packet_copy = pickle.loads(pickle.dumps(packet))
+        self.assertIs(type(packet_copy), type(packet))
+        self.assertEqual(packet_copy.__getstate__()['teleport_id'], 7)
+        self.assertEqual(packet_copy.id, packet.id)
+
+
+class PacketTableTest(unittest.TestCase):
+    def test_packet_table(self):
+        for protocol_version in SUPPORTED_PROTOCOL_VERSIONS:
+            context = ConnectionContext(protocol_version=protocol_version)
+            for get_packets in (clientbound.login.get_packets,
+                                clientbound.play.get_packets,
+                                serverbound.play.get_packets):
+                table = get_packet_table(get_packets, context)
+                self.assertIs(table, get_packet_table(
+                    get_packets, ConnectionContext(
+                        protocol_version=protocol_version)))
+                packets = get_packets(context)
+                for packet in packets:
+                    self.assertIn(table[packet.get_id(context)], packets)
+                for packet_id, packet in enumerate(table):
+                    if packet is not None:
+                        self.assertEqual(packet.get_id(context), packet_id)
+
+
 class PacketListenerTest(unittest.TestCase):
 
     def test_listener(self):
@@ -186,6 +422,41 @@ class TestReadWritePackets(unittest.TestCase):
         self.assertEqual(packet.records[1], packet.records[2])
         self._test_read_write_packet(packet)
 
+        packet.context = self.context
+        packet_buffer = PacketBuffer()
+        packet.write_fields(packet_buffer)
+        data = packet_buffer.get_writable()
+        packet_out = clientbound.play.MultiBlockChangePacket(self.context)
+        packet_out.read(PacketReader(data))
+        self.assertEqual(packet_out.columns, (
+            array('B', [0x13] * 3), array('B', [2] * 3),
+            array('i', [909] * 3)))
+        self.assertEqual(packet_out.world_positions(), (
+            array('i', [2673] * 3), array('i', [2] * 3),
+            array('i', [243] * 3)))
+        self.assertEqual(packet_out.__getstate__(), packet.__getstate__())
+
+        packet_buffer = PacketBuffer()
+        packet_out.write_fields(packet_buffer)
+        self.assertEqual(packet_buffer.get_writable(), data)
+        self.assertEqual(packet_out.records, packet.records)
+        packet_out.records[0].y = 7
+        self.assertEqual(packet_out.columns[1], array('B', [7, 2, 2]))
+
+        # Records decoded from the middle of a reader's data, including
+        # negative and truncated VarInts.
+        packet.records = [Record(x=1, y=2, z=3, block_state_id=-1),
+                          Record(x=4, y=5, z=6, block_state_id=300)]
+        packet_buffer = PacketBuffer()
+        packet.write_fields(packet_buffer)
+        data = b'\xff' + packet_buffer.get_writable() + b'\xff'
+        reader = PacketReader(data, 1)
+        packet_out.read(reader)
+        self.assertEqual(packet_out.columns[2], array('i', [-1, 300]))
+        self.assertEqual(reader.remaining, 1)
+        with self.assertRaises(EOFError):
+            packet_out.read(PacketReader(data[1:-2]))
+
     def test_spawn_object_packet(self):
         EntityType = clientbound.play.SpawnObjectPacket.EntityType
 
@@ -210,7 +481,7 @@ class TestReadWritePackets(unittest.TestCase):
                      position_and_look=pos_look, velocity=velocity,
                      type=type_name, object_uuid=object_uuid,
                      entity_id=entity_id, data=1)
-        self.assertEqual(packet.__dict__, packet2.__dict__)
+        self.assertEqual(packet.__getstate__(), packet2.__getstate__())
 
         packet2.position = pos_look.position
         self.assertEqual(packet.position, packet2.position)
@@ -231,4 +502,4 @@ class TestReadWritePackets(unittest.TestCase):
         packet_out = type(packet_in)(context=self.context)
         packet_out.read(packet_buffer)
         self.assertIs(type(packet_in), type(packet_out))
-        self.assertEqual(packet_in.__dict__, packet_out.__dict__)
+        self.assertEqual(packet_in.__getstate__(), packet_out.__getstate__())
@@ -1,10 +1,18 @@
 import unittest
 from minecraft.networking.types import (UUID, VarInt, String, Boolean)
-from minecraft.networking.packets import PacketBuffer
+from minecraft.networking.packets import PacketBuffer, PacketReader
 from minecraft.networking.packets.clientbound.play import (
-    PlayerPositionAndLookPacket, PlayerListItemPacket, MapPacket
+    PlayerPositionAndLookPacket, PlayerListItemPacket, MapPacket,
+    ChunkDataPacket, UnloadChunkPacket
+)
+from minecraft.networking.packets.clientbound.play.map_packet import (
+    MAP_PALETTE
 )
 from minecraft.networking.connection import ConnectionContext
+from minecraft.utility import numpy
+from minecraft.world import World
+
+from .compat import mock
 
 
 class PlayerPositionAndLookTest(unittest.TestCase):
@@ -117,6 +125,41 @@ class MapPacketTest(unittest.TestCase):
         self.assertIn(b"is", map.pixels)
         self.assertIsNotNone(str(map_set))
 
+        self.assertEqual(map.pixels[2 + 128 * 2:4 + 128 * 2], b"xh")
+        self.assertEqual(map.pixels[2 + 128 * 3:4 + 128 * 3], b"is")
+        rgb = map.to_rgb()
+        self.assertEqual(len(rgb), 3 * 128 * 128)
+        self.assertEqual(rgb[:3], b"\0\0\0")
+        start = 3 * (2 + 128 * 2)
+        self.assertEqual(
+            rgb[start:start + 6],
+            bytes(bytearray(MAP_PALETTE[ord("x")] +
+                            MAP_PALETTE[ord("h")])))
+
+    def test_numpy_required(self):
+        with mock.patch('minecraft.utility.numpy', None):
+            with self.assertRaisesRegexp(ImportError, 'requires NumPy'):
+                MapPacket.Map(use_numpy=True)
+            with self.assertRaisesRegexp(ImportError, 'requires NumPy'):
+                ChunkDataPacket.unpack_blocks(b'\0' * 8, 4, 16,
+                                              use_numpy=True)
+
+    @unittest.skipIf(numpy is None, 'Requires NumPy.')
+    def test_numpy_map_set(self):
+        map_set = MapPacket.MapSet(use_numpy=True)
+        context = ConnectionContext(protocol_version=107)
+        self.make_map_packet(context).apply_to_map_set(map_set)
+        self.make_map_packet(
+            context, width=1, height=0, offset=(2, 2), pixels=b"x"
+        ).apply_to_map_set(map_set)
+
+        map = map_set.maps_by_id[1]
+        self.assertEqual(map.pixels.shape, (128, 128))
+        self.assertEqual(map.pixels[2:4, 2:4].tobytes(), b"xhis")
+        rgb = map.to_rgb()
+        self.assertEqual(rgb.shape, (128, 128, 3))
+        self.assertEqual(tuple(rgb[3, 2]), MAP_PALETTE[ord("i")])
+
 
 fake_uuid = "12345678-1234-5678-1234-567812345678"
 
@@ -241,3 +284,145 @@ class PlayerListItemTest(unittest.TestCase):
         packet_buffer = self.make_action_base(4)
         self.read_and_apply(packet_buffer, player_list)
         self.assertNotIn(fake_uuid, player_list.players_by_uuid)
+
+    def test_indices_and_listeners(self):
+        player_list = PlayerListItemPacket.PlayerList()
+        events = []
+        player_list.register_listener(
+            lambda action_type, players: events.append(
+                (action_type, [p.name for p in players])),
+            PlayerListItemPacket.AddPlayerAction,
+            PlayerListItemPacket.UpdateLatencyAction,
+            PlayerListItemPacket.RemovePlayerAction)
+
+        self.read_and_apply(self.make_add_player_packet(), player_list)
+        player = player_list.get_player_by_name("PLAYER")
+        self.assertIs(player, player_list.get_player(fake_uuid))
+        self.assertIs(player, player_list.players[UUID.to_bytes(fake_uuid)])
+        self.assertEqual(player.uuid, fake_uuid)
+        self.assertEqual(list(player_list.players_by_uuid), [fake_uuid])
+        self.assertEqual(len(player_list.players_by_uuid), 1)
+        self.assertNotIn("not-a-uuid", player_list.players_by_uuid)
+        self.assertIsNone(player_list.get_player("not-a-uuid"))
+        self.assertIsNone(player_list.get_player(None))
+
+        # Unchanged values and other action types are not reported.
+        for action_id, value in (2, 69), (2, 70), (1, 43):
+            packet_buffer = self.make_action_base(action_id)
+            VarInt.send(value, packet_buffer)
+            self.read_and_apply(packet_buffer, player_list)
+        self.read_and_apply(self.make_action_base(4), player_list)
+        self.read_and_apply(self.make_action_base(4), player_list)
+
+        self.assertEqual(events, [
+            (PlayerListItemPacket.AddPlayerAction, ["player"]),
+            (PlayerListItemPacket.UpdateLatencyAction, ["player"]),
+            (PlayerListItemPacket.RemovePlayerAction, ["player"])])
+        self.assertIsNone(player_list.get_player_by_name("player"))
+        self.assertEqual(player_list.players, {})
+
+    def test_players_by_uuid_assignment(self):
+        player_list = PlayerListItemPacket.PlayerList()
+        player = PlayerListItemPacket.PlayerListItem(
+            uuid=fake_uuid, name="Player")
+
+        player_list.players_by_uuid[fake_uuid] = player
+        self.assertIs(player_list.get_player(fake_uuid), player)
+        self.assertIs(player_list.get_player_by_name("player"), player)
+
+        del player_list.players_by_uuid[fake_uuid]
+        self.assertIsNone(player_list.get_player(fake_uuid))
+        self.assertIsNone(player_list.get_player_by_name("player"))
+        with self.assertRaises(KeyError):
+            del player_list.players_by_uuid[fake_uuid]
+
+        player_list.players_by_uuid = {fake_uuid: player}
+        self.assertEqual(list(player_list.players_by_uuid), [fake_uuid])
+        self.assertIs(player_list.get_player_by_name("player"), player)
+        player_list.players_by_uuid = {}
+        self.assertEqual(player_list.players, {})
+        self.assertEqual(player_list.players_by_name, {})
+
+    def test_unnamed_player(self):
+        # Players added through 'players_by_uuid' need not have a name, and
+        # may still be replaced or removed by packets.
+        for action_id in 0, 4:
+            player_list = PlayerListItemPacket.PlayerList()
+            player_list.players_by_uuid[fake_uuid] = \
+                PlayerListItemPacket.PlayerListItem(uuid=fake_uuid)
+            if action_id == 0:
+                packet_buffer = self.make_add_player_packet()
+            else:
+                packet_buffer = self.make_action_base(action_id)
+            self.read_and_apply(packet_buffer, player_list)
+            self.assertEqual(fake_uuid in player_list.players_by_uuid,
+                             action_id == 0)
+            self.assertEqual(list(player_list.players_by_name),
+                             ["player"] if action_id == 0 else [])
+
+
+class ChunkDataPacketTest(unittest.TestCase):
+    @staticmethod
+    def make_packet(context, sky_light=True):
+        Section = ChunkDataPacket.Section
+        indices = [i % 3 for i in range(4096)]
+        block_state_ids = [(i * 7) % 5000 for i in range(4096)]
+        sections = [
+            Section(0, 4, [0, 1, 9], ChunkDataPacket.pack_blocks(indices, 4),
+                    b'\x01' * 2048, b'\x02' * 2048 if sky_light else None),
+            Section(5, 14, None,
+                    ChunkDataPacket.pack_blocks(block_state_ids, 14),
+                    b'\x03' * 2048, b'\x04' * 2048 if sky_light else None)]
+        biomes_size = 1024 if context.protocol_version >= 345 else 256
+        return ChunkDataPacket(
+            context, chunk_x=-3, chunk_z=4, full_chunk=True,
+            sections=sections, biomes=b'\x05' * biomes_size,
+            block_entity_count=0, block_entities_data=b'')
+
+    def test_read_write(self):
+        for protocol_version in (107, 110, 340, 404):
+            context = ConnectionContext(protocol_version=protocol_version)
+            for sky_light in True, False:
+                packet = self.make_packet(context, sky_light)
+                packet_buffer = PacketBuffer()
+                packet.write_fields(packet_buffer)
+                data = packet_buffer.get_writable()
+
+                p = ChunkDataPacket(context)
+                p.read(PacketReader(data))
+                self.assertEqual((p.chunk_x, p.chunk_z), (-3, 4))
+                self.assertEqual(p.primary_bit_mask, 0b100001)
+                self.assertEqual(p.sections, packet.sections)
+                self.assertIsInstance(p.sections[0].data, memoryview)
+                self.assertEqual(bytes(p.biomes), packet.biomes)
+
+                self.assertEqual(list(p.sections[0].blocks()),
+                                 [i % 3 for i in range(4096)])
+                self.assertEqual(list(p.sections[1].blocks())[:4],
+                                 [0, 7, 14, 21])
+                if numpy is not None:
+                    self.assertEqual(
+                        list(p.sections[1].blocks(use_numpy=True)),
+                        list(p.sections[1].blocks()))
+
+                packet_buffer = PacketBuffer()
+                p.write_fields(packet_buffer)
+                self.assertEqual(packet_buffer.get_writable(), data)
+
+    def test_apply_to_world(self):
+        context = ConnectionContext(protocol_version=404)
+        for use_numpy in (False, True) if numpy is not None else (False,):
+            world = World(use_numpy=use_numpy)
+            world.set_block((-48, 200, 64), 1)
+            self.make_packet(context).apply_to_world(world)
+            self.assertEqual(world.get_block((-48, 200, 64)), 0)
+            self.assertEqual(world.get_block((-47, 0, 64)), 1)
+            self.assertEqual(world.get_block((-46, 0, 64)), 9)
+            self.assertEqual(world.get_block((-47, 80, 64)), 7)
+            self.assertEqual(world.get_block((-33, 95, 79)), 4095 * 7 % 5000)
+            self.assertEqual(world.chunks[-3, 4].sections[5].blocks.typecode,
+                             'H')
+
+            UnloadChunkPacket(context, chunk_x=-3, chunk_z=4).apply_to_world(
+                world)
+            self.assertEqual(world.chunks, {})
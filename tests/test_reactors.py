@@ -6,9 +6,10 @@ except ImportError:
 
 from minecraft import SUPPORTED_PROTOCOL_VERSIONS
 from minecraft.networking.connection import (
-    LoginReactor, PlayingReactor, ConnectionContext
+    LoginReactor, PlayingReactor, ConnectionContext, Connection
 )
-from minecraft.networking.packets import clientbound
+from minecraft.networking.packets import clientbound, Packet, PacketBuffer
+from minecraft.networking.types import VarInt
 
 
 max_proto_ver = max(SUPPORTED_PROTOCOL_VERSIONS)
@@ -20,6 +21,8 @@ class LoginReactorTest(unittest.TestCase):
     def test_encryption_online_server(self, encrypt):
         connection = mock.MagicMock()
         connection.context = ConnectionContext(protocol_version=max_proto_ver)
+        connection._call_blocking.side_effect = \
+            lambda function, callback: callback(function())
         reactor = LoginReactor(connection)
 
         packet = clientbound.login.EncryptionRequestPacket()
@@ -44,6 +47,8 @@ class LoginReactorTest(unittest.TestCase):
     def test_encryption_offline_server(self, encrypt):
         connection = mock.MagicMock()
         connection.context = ConnectionContext(protocol_version=max_proto_ver)
+        connection._call_blocking.side_effect = \
+            lambda function, callback: callback(function())
         reactor = LoginReactor(connection)
 
         packet = clientbound.login.EncryptionRequestPacket()
@@ -108,3 +113,85 @@ class PlayingReactorTest(unittest.TestCase):
 
         response_packet = connection.write_packet.call_args[0][0]
         self.assertEqual(response_packet.teleport_id, 42)
+
+    def test_skip_decoding(self):
+        connection = Connection('localhost')
+        connection.context = ConnectionContext(protocol_version=max_proto_ver)
+        reactor = PlayingReactor(connection)
+
+        def frame(packet):
+            packet.context = connection.context
+            packet_buffer = PacketBuffer()
+            VarInt.send(packet.id, packet_buffer)
+            packet.write_fields(packet_buffer)
+            return packet_buffer.get_writable()
+
+        chat = frame(clientbound.play.ChatMessagePacket(
+            json_data='{"text": "hello"}', position=0))
+        keep_alive = frame(clientbound.play.KeepAlivePacket(keep_alive_id=3))
+
+        # Packets used by the reactor are always decoded; others only if a
+        # listener is registered for them.
+        packet = reactor.decode_packet(keep_alive)
+        self.assertIsInstance(packet, clientbound.play.KeepAlivePacket)
+        self.assertEqual(packet.keep_alive_id, 3)
+        self.assertIs(type(reactor.decode_packet(chat)), Packet)
+
+        connection.register_packet_listener(
+            lambda packet: None, clientbound.play.ChatMessagePacket)
+        packet = reactor.decode_packet(chat)
+        self.assertIsInstance(packet, clientbound.play.ChatMessagePacket)
+        self.assertEqual(packet.json_data, '{"text": "hello"}')
+
+    def test_subclass_decoding(self):
+        connection = Connection('localhost')
+        connection.context = ConnectionContext(protocol_version=max_proto_ver)
+        chat = clientbound.play.ChatMessagePacket(
+            connection.context, json_data='{"text": "hello"}', position=0)
+        packet_buffer = PacketBuffer()
+        VarInt.send(chat.id, packet_buffer)
+        chat.write_fields(packet_buffer)
+        chat = packet_buffer.get_writable()
+
+        # A reactor overriding `react' may use any packet, unless it also
+        # gives the names of those that it uses.
+        class ChatReactor(PlayingReactor):
+            def react(self, packet):
+                pass
+
+        class NamedChatReactor(ChatReactor):
+            handled_packet_names = {'keep alive'}
+
+        class NamesReactor(PlayingReactor):
+            handled_packet_names = {'chat message'}
+
+        for reactor_class, decoded in ((ChatReactor, True),
+                                       (NamedChatReactor, False),
+                                       (NamesReactor, True)):
+            packet = reactor_class(connection).decode_packet(chat)
+            self.assertEqual(
+                isinstance(packet, clientbound.play.ChatMessagePacket),
+                decoded, reactor_class.__name__)
+
+    def test_reuse_packets(self):
+        connection = Connection('localhost', reuse_packets=True)
+        connection.context = ConnectionContext(protocol_version=max_proto_ver)
+        reactor = PlayingReactor(connection)
+
+        def frame(keep_alive_id):
+            packet = clientbound.play.KeepAlivePacket(
+                connection.context, keep_alive_id=keep_alive_id)
+            packet_buffer = PacketBuffer()
+            VarInt.send(packet.id, packet_buffer)
+            packet.write_fields(packet_buffer)
+            return packet_buffer.get_writable()
+
+        packet = reactor.decode_packet(frame(1))
+        self.assertEqual(packet.keep_alive_id, 1)
+        packet.note = 'retained'
+        self.assertIs(reactor.decode_packet(frame(2)), packet)
+        self.assertEqual(packet.keep_alive_id, 2)
+        self.assertFalse(hasattr(packet, 'note'))
+
+        connection.reuse_packets = False
+        self.assertIsNot(reactor.decode_packet(frame(3)), packet)
@@ -3,11 +3,11 @@
 import unittest
 from minecraft.networking.types import (
     Type, Boolean, UnsignedByte, Byte, Short, UnsignedShort,
-    Integer, FixedPointInteger, VarInt, Long, Float, Double,
+    Integer, FixedPointInteger, VarInt, VarLong, Long, Float, Double,
     ShortPrefixedByteArray, VarIntPrefixedByteArray, UUID,
     String as StringType, Position, TrailingByteArray, UnsignedLong,
 )
-from minecraft.networking.packets import PacketBuffer
+from minecraft.networking.packets import PacketBuffer, PacketReader
 
 
 TEST_DATA = {
@@ -19,7 +19,8 @@ TEST_DATA = {
     UnsignedLong: [0, 400],
     Integer: [-1000, 1000],
     FixedPointInteger: [float(-13098.3435), float(-0.83), float(1000)],
-    VarInt: [1, 250, 50000, 10000000],
+    VarInt: [1, 250, 50000, 10000000, -1, -2 ** 31, 2 ** 31 - 1],
+    VarLong: [0, 2 ** 40, -2 ** 63, 2 ** 63 - 1],
     Long: [50000000],
     Float: [21.000301],
     Double: [36.004002],
@@ -35,7 +36,7 @@ TEST_DATA = {
 class SerializationTest(unittest.TestCase):
 
     def test_serialization(self):
-        for data_type in Type.__subclasses__():
+        for data_type in Type.__subclasses__() + [VarLong]:
             if data_type in TEST_DATA:
                 test_cases = TEST_DATA[data_type]
 
@@ -44,14 +45,17 @@ class SerializationTest(unittest.TestCase):
                     data_type.send(test_data, packet_buffer)
                     packet_buffer.reset_cursor()
 
-                    deserialized = data_type.read(packet_buffer)
-                    if data_type is FixedPointInteger:
-                        self.assertAlmostEqual(
-                            test_data, deserialized, delta=1.0/32.0)
-                    elif data_type is Float or data_type is Double:
-                        self.assertAlmostEquals(test_data, deserialized, 3)
-                    else:
-                        self.assertEqual(test_data, deserialized)
+                    packet_reader = PacketReader(packet_buffer.get_writable())
+
+                    for file_object in packet_buffer, packet_reader:
+                        deserialized = data_type.read(file_object)
+                        if data_type is FixedPointInteger:
+                            self.assertAlmostEqual(
+                                test_data, deserialized, delta=1.0/32.0)
+                        elif data_type is Float or data_type is Double:
+                            self.assertAlmostEquals(test_data, deserialized, 3)
+                        else:
+                            self.assertEqual(test_data, deserialized)
 
     def test_exceptions(self):
         base_type = Type()
@@ -83,3 +87,31 @@ class SerializationTest(unittest.TestCase):
         packet_buffer.reset_cursor()
 
         self.assertEqual(VarInt.read(packet_buffer), 50000)
+
+        for value, data in ((0, b'\x00'), (300, b'\xac\x02'),
+                            (16384, b'\x80\x80\x01'),
+                            (-1, b'\xff\xff\xff\xff\x0f')):
+            self.assertEqual(VarInt.encode(value), data)
+            self.assertEqual(VarInt.size(value), len(data))
+            buffer = bytearray(b'x')
+            self.assertEqual(VarInt.encode_into(value, buffer), len(data))
+            self.assertEqual(buffer, b'x' + data)
+            self.assertEqual(VarInt.decode(buffer, 1), (value, len(buffer)))
+        self.assertEqual(VarInt.size(2 ** 32 - 1), 5)
+        self.assertEqual(VarLong.size(-1), 10)
+
+        with self.assertRaises(ValueError):
+            VarInt.encode(-2 ** 31 - 1)
+        with self.assertRaises(ValueError):
+            VarInt.decode(b'\xff' * 5)
+        with self.assertRaises(EOFError):
+            VarInt.decode(b'\xff\xff', 0)
+
+        reader = PacketReader(b'\x05\xac\x02\xff\xff\xff\xff\x0f\x80')
+        self.assertEqual([VarInt.read(reader) for _ in range(3)],
+                         [5, 300, -1])
+        self.assertEqual(reader.offset, 8)
+        with self.assertRaises(EOFError):
+            VarInt.read(reader)
+        with self.assertRaises(EOFError):
+            VarInt.read(PacketReader(b''))
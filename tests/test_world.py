@@ -0,0 +1,160 @@
+import unittest
+
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking.connection import (
+    Connection, ConnectionContext, PlayingReactor
+)
+from minecraft.networking.packets import clientbound
+from minecraft.networking.types import Position
+from minecraft.utility import numpy
+from minecraft.world import World, ChunkSection
+
+from .compat import mock
+
+
+class ChunkSectionTest(unittest.TestCase):
+    def test_palette(self):
+        section = ChunkSection()
+        self.assertIsNone(section.blocks)
+        section.set(ChunkSection.index(1, 2, 3), 0)
+        self.assertIsNone(section.blocks)
+
+        for i in range(300):
+            section.set(i, 1000 + i)
+        self.assertEqual(section.blocks.typecode, 'H')
+        self.assertEqual(len(section.blocks), 4096)
+        self.assertEqual(section.get(0), 1000)
+        self.assertEqual(section.get(299), 1299)
+        self.assertEqual(section.get(300), 0)
+
+        section = ChunkSection.from_blocks([5, 6], [0, 1] * 2048)
+        self.assertEqual(section.blocks.typecode, 'B')
+        self.assertEqual((section.get(0), section.get(1)), (5, 6))
+        with self.assertRaises(ValueError):
+            ChunkSection.from_blocks([5, 6], [0, 1])
+
+    @unittest.skipIf(numpy is None, 'Requires NumPy.')
+    def test_from_ndarray(self):
+        blocks = numpy.arange(4096, dtype=numpy.uint32) % 300 + 1000
+        section = ChunkSection.from_blocks(None, blocks)
+        self.assertEqual(section.palette, list(range(1000, 1300)))
+        self.assertEqual(section.blocks.typecode, 'H')
+        self.assertEqual([section.get(i) for i in range(4096)],
+                         blocks.tolist())
+
+        section = ChunkSection.from_blocks(
+            [5, 6], numpy.array([0, 1] * 2048, numpy.uint32))
+        self.assertEqual(section.blocks.typecode, 'B')
+        self.assertEqual((section.get(0), section.get(1)), (5, 6))
+        with self.assertRaises(ValueError):
+            ChunkSection.from_blocks([5, 6], numpy.array([0, 1]))
+
+    def test_numpy_required(self):
+        with mock.patch('minecraft.utility.numpy', None):
+            with self.assertRaises(ImportError):
+                World(use_numpy=True)
+        self.assertEqual(World().use_numpy, numpy is not None)
+        self.assertFalse(World(use_numpy=False).use_numpy)
+
+
+class WorldTest(unittest.TestCase):
+    def setUp(self):
+        self.context = ConnectionContext(
+            protocol_version=SUPPORTED_PROTOCOL_VERSIONS[-1])
+
+    def test_blocks(self):
+        world = World()
+        self.assertIsNone(world.get_block(Position(1, 2, 3)))
+        world.set_block(Position(-1, 255, -17), 9)
+        self.assertEqual(world.get_block((-1, 255, -17)), 9)
+        self.assertIsNone(world.get_block((-2, 255, -17)))
+        self.assertIsNone(world.get_block((-1, 256, -17)))
+        self.assertEqual(list(world.chunks), [(-1, -2)])
+        chunk = world.chunks[-1, -2]
+        self.assertEqual(chunk.sections[:15], [None] * 15)
+        self.assertEqual(chunk.sections[15].get(
+            ChunkSection.index(15, 15, 15)), 9)
+
+        world.unload_chunk(-1, -2)
+        self.assertIsNone(world.get_block((-1, 255, -17)))
+
+    def test_eviction(self):
+        world = World(max_chunks=2)
+        world.center = (10, 10)
+        world.set_block((0, 0, 0), 1)
+        world.set_block((160, 0, 160), 2)
+        world.set_block((320, 0, 320), 3)
+        self.assertEqual(sorted(world.chunks), [(10, 10), (20, 20)])
+        world.set_block((0, 0, 0), 1)
+        self.assertEqual(sorted(world.chunks), [(0, 0), (10, 10)])
+
+    def test_batch_eviction(self):
+        world = World(max_chunks=16)
+        for x in range(16):
+            world.get_chunk(x, 0)
+        world.get_chunk(-1, 0)
+        self.assertEqual(sorted(world.chunks),
+                         [(x, 0) for x in range(-1, 13)])
+        world.get_chunk(-2, 0)
+        world.get_chunk(-3, 0)
+        self.assertEqual(sorted(world.chunks),
+                         [(x, 0) for x in range(-3, 13)])
+
+    def _connection(self, world):
+        connection = Connection('localhost')
+        connection.context = self.context
+        connection.reactor = PlayingReactor(connection)
+        connection.write_packet = mock.Mock()
+        world.register(connection)
+        return connection
+
+    def test_packets(self):
+        world = World()
+        connection = self._connection(world)
+
+        Record = clientbound.play.MultiBlockChangePacket.Record
+        connection._react(clientbound.play.MultiBlockChangePacket(
+            self.context, chunk_x=2, chunk_z=-3, records=[
+                Record(x=1, y=2, z=3, block_state_id=4),
+                Record(x=15, y=200, z=0, block_state_id=5)]))
+        connection._react(clientbound.play.BlockChangePacket(
+            self.context, location=Position(33, 2, -45), block_state_id=6))
+
+        self.assertEqual(world.get_block((33, 2, -45)), 6)
+        self.assertEqual(world.get_block((47, 200, -48)), 5)
+        self.assertEqual(world.get_block((34, 2, -45)), None)
+
+        connection._react(clientbound.play.JoinGamePacket(self.context))
+        self.assertEqual(world.chunks, {})
+
+        world.set_block((0, 0, 0), 1)
+        connection._react(clientbound.play.RespawnPacket(
+            self.context, dimension=-1, difficulty=0, game_mode=0,
+            level_type='default'))
+        self.assertEqual(world.chunks, {})
+
+    def test_center(self):
+        world = World()
+        connection = self._connection(world)
+        Packet = clientbound.play.PlayerPositionAndLookPacket
+
+        connection._react(Packet(
+            self.context, x=100.5, y=64.0, z=-0.5, yaw=0.0, pitch=0.0,
+            flags=0, teleport_id=1))
+        self.assertEqual(world.center, (6, -1))
+        connection._react(Packet(
+            self.context, x=-101.0, y=0.0, z=32.5, yaw=0.0, pitch=0.0,
+            flags=Packet.FLAG_REL_X | Packet.FLAG_REL_Z, teleport_id=2))
+        self.assertEqual(world.center, (-1, 2))
+
+    def test_unregister(self):
+        world = World()
+        connection = self._connection(world)
+        world.unregister(connection)
+        connection._react(clientbound.play.BlockChangePacket(
+            self.context, location=Position(1, 2, 3), block_state_id=6))
+        connection._react(clientbound.play.PlayerPositionAndLookPacket(
+            self.context, x=100.0, y=64.0, z=100.0, yaw=0.0, pitch=0.0,
+            flags=0, teleport_id=1))
+        self.assertEqual(world.chunks, {})
+        self.assertEqual(world.center, (0, 0))